@@ -1,26 +1,56 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-from typing import List
+from fastapi.responses import JSONResponse, StreamingResponse
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional, Tuple
+import asyncio
+import json
+import tarfile
+import zipfile
 from models import (
-    UploadResponse,
+    JobResponse,
     SearchResponse,
     SearchResult,
+    SearchFilters,
+    BatchSearchQuery,
+    BatchSearchRequest,
+    BatchSearchResponse,
+    CollectionConfig,
+    CollectionInfo,
     HealthResponse,
+    ReadinessResponse,
+    DocumentInfo,
+    DocumentListResponse,
     ErrorResponse
 )
-from services import embedding_service, document_processor, vector_db_service
+from services import vector_db_service, query_batcher, query_cache, metrics, job_queue, lifecycle
+from services.job_queue import QueueFullError, is_archive
 from config import settings
 
 router = APIRouter()
 
+# Number of filenames included in health check responses
+HEALTH_MAX_LISTED_FILES = 100
 
-@router.post("/upload", response_model=UploadResponse, responses={400: {"model": ErrorResponse}})
-async def upload_pdf(file: UploadFile = File(...)):
+
+@router.post(
+    "/upload",
+    response_model=JobResponse,
+    status_code=202,
+    responses={400: {"model": ErrorResponse}, 503: {"model": ErrorResponse}}
+)
+async def upload_pdf(
+    file: UploadFile = File(...),
+    mode: Literal["append", "replace"] = Query("append", description="Add chunks, or re-index an existing document")
+):
     """
     Upload a PDF file for processing and indexing.
     
     - **file**: PDF file to upload
+    - **mode**: `append` adds every chunk; `replace` re-indexes a document with the
+      same filename, embedding only new chunks and deleting removed ones
     
-    Returns information about the uploaded file and created chunks.
+    The file is queued for ingestion and a job is returned immediately.
+    Poll `/api/jobs/{job_id}` for progress.
     """
     # Validate file type
     if not file.filename.endswith('.pdf'):
@@ -30,109 +60,234 @@ async def upload_pdf(file: UploadFile = File(...)):
         )
     
     try:
-        # Read file content
-        content = await file.read()
-        
-        # Process PDF: extract text and create chunks
-        chunks = document_processor.process_pdf(content, file.filename)
-        
-        if not chunks:
-            raise HTTPException(
-                status_code=400,
-                detail="No text could be extracted from the PDF"
-            )
-        
-        # Generate embeddings for all chunks
-        chunk_texts = [chunk['text'] for chunk in chunks]
-        embeddings = embedding_service.embed_texts(chunk_texts)
-        
-        # Prepare metadata - include header information
-        metadatas = []
-        for chunk in chunks:
-            metadata = {
-                "filename": chunk['filename'],
-                "chunk_index": chunk['chunk_index']
-            }
-            
-            # Add header information if available
-            if 'header' in chunk:
-                metadata['header'] = chunk['header']
-                metadata['header_level'] = chunk.get('header_level', 0)
-                metadata['is_partial'] = chunk.get('is_partial', False)
-            elif 'chunk_type' in chunk:
-                metadata['chunk_type'] = chunk['chunk_type']
-            
-            metadatas.append(metadata)
-        
-        # Store in vector database
-        doc_ids = vector_db_service.add_documents(
-            texts=chunk_texts,
-            embeddings=embeddings,
-            metadatas=metadatas
+        # Spool the upload to disk and queue it for ingestion
+        with metrics.timer("upload_spool_seconds", "Time spent spooling and enqueueing an upload"):
+            job = await job_queue.submit(file.file, file.filename, mode)
+        return JobResponse(**job)
+    
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "30"}
         )
-        
-        return UploadResponse(
-            message="File uploaded and processed successfully",
-            filename=file.filename,
-            chunks_created=len(chunks),
-            document_ids=doc_ids
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error queuing file: {str(e)}"
         )
+
+
+@router.post(
+    "/upload/bulk",
+    response_model=JobResponse,
+    status_code=202,
+    responses={400: {"model": ErrorResponse}, 503: {"model": ErrorResponse}}
+)
+async def upload_bulk(
+    files: List[UploadFile] = File(...),
+    mode: Literal["append", "replace"] = Query("append", description="Add chunks, or re-index existing documents")
+):
+    """
+    Upload many PDF files, or a single zip/tar archive of PDFs, as one ingestion job.
     
-    except HTTPException:
-        raise
+    - **files**: PDF files, or one `.zip`, `.tar`, `.tar.gz` or `.tgz` archive
+    - **mode**: `append` or `replace` (see `/api/upload`)
+    
+    Documents are extracted, embedded and stored in a pipeline, and chunks of
+    consecutive documents are written to the vector database together.
+    Poll `/api/jobs/{job_id}` for progress and per-document results.
+    """
+    archive_upload = len(files) == 1 and is_archive(files[0].filename)
+    
+    if not archive_upload and not all(f.filename.endswith('.pdf') for f in files):
+        raise HTTPException(
+            status_code=400,
+            detail="Only PDF files or a single zip/tar archive are supported"
+        )
+    
+    if len(files) > settings.BULK_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BULK_MAX_FILES} files can be uploaded at once"
+        )
+    
+    try:
+        with metrics.timer("upload_spool_seconds", "Time spent spooling and enqueueing an upload"):
+            job = await job_queue.submit_bulk([(f.file, f.filename) for f in files], mode)
+        return JobResponse(**job)
+    
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "30"}
+        )
+    except (ValueError, zipfile.BadZipFile, tarfile.TarError) as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid upload: {str(e)}"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Error processing file: {str(e)}"
+            detail=f"Error queuing files: {str(e)}"
+        )
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse, responses={404: {"model": ErrorResponse}})
+async def get_job(job_id: str):
+    """
+    Get the status of an ingestion job.
+    
+    - **job_id**: ID returned by `/api/upload`
+    
+    Returns the current stage, chunk progress and per-stage timings.
+    """
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job '{job_id}' not found"
         )
+    
+    return JobResponse(**job)
+
+
+async def _vector_db(method: str, *args, **kwargs) -> Any:
+    """
+    Call a vector database method without blocking the event loop: on a thread,
+    or in the backend process for workers of a multi-process server.
+    """
+    if settings.REMOTE_BACKEND:
+        return await getattr(vector_db_service, method)(*args, **kwargs)
+    return await asyncio.to_thread(getattr(vector_db_service, method), *args, **kwargs)
+
+
+async def _generation() -> int:
+    """Current collection generation, which keys the result cache."""
+    if settings.REMOTE_BACKEND:
+        return await vector_db_service.get_generation()
+    return vector_db_service.generation
+
+
+async def _search(method: str, *args, **kwargs) -> Tuple[Dict[str, Any], int]:
+    """Run `search` or `search_many` and return the results with the generation they were searched at."""
+    if settings.REMOTE_BACKEND:
+        return await getattr(vector_db_service, method)(*args, **kwargs)
+    generation = vector_db_service.generation
+    results = await asyncio.to_thread(getattr(vector_db_service, method), *args, **kwargs)
+    return results, generation
+
+
+async def _embed_query(query: str) -> List[float]:
+    """Embed a search query, using the query cache and batching with concurrent searches."""
+    query_embedding = query_cache.get_embedding(query)
+    
+    if query_embedding is None:
+        with metrics.timer("search_embedding_seconds", "Time a search waited for its query embedding"):
+            query_embedding = await query_batcher.embed(query_cache.normalize(query))
+        query_cache.put_embedding(query, query_embedding)
+    
+    return query_embedding
+
+
+def _format_search_results(results: dict, query_index: int = 0, limit: Optional[int] = None) -> List[SearchResult]:
+    """Convert the results of one query of a vector database query into search results."""
+    search_results = []
+    
+    if results['documents'] and results['documents'][query_index]:
+        for i in range(len(results['documents'][query_index][:limit])):
+            # Distance to similarity score (higher is better) for the collection's distance space
+            distance = results['distances'][query_index][i]
+            similarity = vector_db_service.similarity(distance)
+            
+            metadata = results['metadatas'][query_index][i]
+            
+            # A chunk being written concurrently can be visible in the index before its metadata
+            if metadata is None or results['documents'][query_index][i] is None:
+                continue
+            
+            search_results.append(
+                SearchResult(
+                    document_name=metadata['filename'],
+                    chunk_text=results['documents'][query_index][i],
+                    chunk_index=metadata['chunk_index'],
+                    similarity=round(similarity, 4),
+                    header=metadata.get('header'),
+                    header_level=metadata.get('header_level'),
+                    chunk_type=metadata.get('chunk_type'),
+                    page_start=metadata.get('page_start'),
+                    page_end=metadata.get('page_end')
+                )
+            )
+    
+    return search_results
 
 
 @router.get("/search", response_model=SearchResponse, responses={400: {"model": ErrorResponse}})
 async def search_documents(
     query: str = Query(..., description="Search query", min_length=1),
-    top_k: int = Query(10, description="Number of results to return", ge=1, le=100)
+    top_k: int = Query(10, description="Number of results to return", ge=1, le=100),
+    mode: Optional[Literal["hnsw", "quantized"]] = Query(None, description="Search index (default: SEARCH_MODE)"),
+    oversampling: Optional[float] = Query(None, description="Quantized mode: candidates rescored per result", ge=1, le=100),
+    ef: Optional[int] = Query(None, description="HNSW candidates considered (default: the collection's search_ef)", ge=1, le=1000),
+    filename: Optional[List[str]] = Query(None, description="Only search these documents (repeatable)"),
+    header_level: Optional[List[int]] = Query(None, description="Only chunks under headers of these levels (repeatable)"),
+    chunk_type: Optional[List[str]] = Query(None, description="Only chunks of these types (repeatable)"),
+    uploaded_after: Optional[datetime] = Query(None, description="Only chunks uploaded at or after this time (ISO 8601)"),
+    uploaded_before: Optional[datetime] = Query(None, description="Only chunks uploaded before this time (ISO 8601)")
 ):
     """
     Search for documents based on a query.
     
     - **query**: Search query text
     - **top_k**: Number of top results to return (default: 10, max: 100)
+    - **filename**, **header_level**, **chunk_type**: Restrict results to chunks matching
+      any of the given values; repeat the parameter for several values
+    - **uploaded_after**, **uploaded_before**: Restrict results by upload time
+    - **mode**: `hnsw` searches the collection's index, `quantized` the quantized tier
+      with exact rescoring (requires `QUANTIZED_INDEX`)
+    - **oversampling**: Candidates rescored per result in quantized mode
+      (default: `QUANTIZED_OVERSAMPLING`)
+    - **ef**: HNSW search breadth for this request; higher improves recall at some latency cost
     
     Returns matching document chunks with similarity scores.
     """
+    filters = SearchFilters(
+        filename=filename,
+        header_level=header_level,
+        chunk_type=chunk_type,
+        uploaded_after=uploaded_after,
+        uploaded_before=uploaded_before
+    )
+    options = _search_options(filters.model_dump(exclude_none=True) or None, mode, oversampling, ef)
+    where = _filters_to_where(filters)
+    
     try:
-        # Generate embedding for the query
-        query_embedding = embedding_service.embed_text(query)
-        
-        # Search in vector database
-        results = vector_db_service.search(
-            query_embedding=query_embedding,
-            n_results=top_k
-        )
-        
-        # Format results
-        search_results = []
-        
-        if results['documents'] and results['documents'][0]:
-            for i in range(len(results['documents'][0])):
-                # Distance to similarity (ChromaDB returns L2 distance by default)
-                # Convert distance to similarity score (0 to 1, higher is better)
-                distance = results['distances'][0][i]
-                similarity = 1 / (1 + distance)  # Simple conversion
-                
-                metadata = results['metadatas'][0][i]
+        with metrics.timer("search_seconds", "End-to-end latency of a single search"):
+            search_results = query_cache.get_results(query, top_k, options, await _generation())
+            
+            if search_results is None and _matches_nothing(where):
+                search_results = []
+            
+            if search_results is None:
+                query_embedding = await _embed_query(query)
                 
-                search_results.append(
-                    SearchResult(
-                        document_name=metadata['filename'],
-                        chunk_text=results['documents'][0][i],
-                        chunk_index=metadata['chunk_index'],
-                        similarity=round(similarity, 4),
-                        header=metadata.get('header'),
-                        header_level=metadata.get('header_level'),
-                        chunk_type=metadata.get('chunk_type')
-                    )
+                # Search in vector database
+                results, generation = await _search(
+                    "search",
+                    query_embedding=query_embedding,
+                    n_results=top_k,
+                    where=where,
+                    mode=mode,
+                    oversampling=oversampling,
+                    ef=ef
                 )
+                
+                search_results = _format_search_results(results)
+                query_cache.put_results(query, top_k, options, generation, search_results)
         
         return SearchResponse(
             query=query,
@@ -147,6 +302,202 @@ async def search_documents(
         )
 
 
+def _search_options(
+    filters: Optional[Dict[str, Any]],
+    mode: Optional[str],
+    oversampling: Optional[float],
+    ef: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Filters plus the search mode settings that change results, used to key the
+    result cache and group batch queries. Raises 400 for an unavailable mode.
+    """
+    mode = mode or settings.SEARCH_MODE
+    if mode != "quantized":
+        return {**(filters or {}), "ef": ef} if ef is not None else filters
+    
+    if vector_db_service.quantized is None:
+        raise HTTPException(status_code=400, detail="Quantized search is disabled (set QUANTIZED_INDEX)")
+    
+    return {
+        **(filters or {}),
+        "mode": mode,
+        "oversampling": oversampling if oversampling is not None else settings.QUANTIZED_OVERSAMPLING
+    }
+
+
+def _filters_to_where(filters: Optional[SearchFilters]) -> Optional[Dict[str, Any]]:
+    """Translate search filters into a vector database where clause."""
+    if filters is None:
+        return None
+    
+    conditions = []
+    for key in ("filename", "header_level", "chunk_type"):
+        value = getattr(filters, key)
+        if isinstance(value, list):
+            conditions.append({key: {"$in": value}})
+        elif value is not None:
+            conditions.append({key: value})
+    
+    # Upload times are stored as Unix seconds
+    if filters.uploaded_after is not None:
+        conditions.append({"uploaded_at": {"$gte": filters.uploaded_after.timestamp()}})
+    if filters.uploaded_before is not None:
+        conditions.append({"uploaded_at": {"$lt": filters.uploaded_before.timestamp()}})
+    
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+def _matches_nothing(where: Optional[Dict[str, Any]]) -> bool:
+    """Whether a where clause filters on an empty list of values, which no chunk matches."""
+    if where is None:
+        return False
+    
+    return any(
+        value == {"$in": []}
+        for clause in where.get("$and", [where])
+        for value in clause.values()
+    )
+
+
+async def _batch_search(queries: List[BatchSearchQuery]) -> List[SearchResponse]:
+    """
+    Run a batch of searches.
+    
+    Queries not answered by the result cache are embedded with a single model
+    call, and queries sharing the same filters are searched with a single
+    multi-vector collection query. Responses are in the order of the queries.
+    """
+    generation = await _generation()
+    filters = [
+        _search_options(
+            query.filters.model_dump(exclude_none=True) if query.filters else None,
+            query.mode,
+            query.oversampling,
+            query.ef
+        )
+        for query in queries
+    ]
+    search_results: List[Optional[List[SearchResult]]] = [
+        query_cache.get_results(query.query, query.top_k, query_filters, generation)
+        for query, query_filters in zip(queries, filters)
+    ]
+    pending = [i for i, results in enumerate(search_results) if results is None]
+    
+    # Embed every distinct uncached query text in one model call
+    embeddings = {}
+    missing = {}
+    for i in pending:
+        embedding = query_cache.get_embedding(queries[i].query)
+        if embedding is not None:
+            embeddings[i] = embedding
+        else:
+            missing.setdefault(query_cache.normalize(queries[i].query), []).append(i)
+    
+    if missing:
+        with metrics.timer("search_embedding_seconds", "Time a search waited for its query embedding"):
+            vectors = await query_batcher.embed_batch(list(missing))
+        for indices, vector in zip(missing.values(), vectors):
+            query_cache.put_embedding(queries[indices[0]].query, vector)
+            for i in indices:
+                embeddings[i] = vector
+    
+    # One collection query per distinct set of filters and search mode
+    groups: Dict[str, List[int]] = {}
+    for i in pending:
+        groups.setdefault(json.dumps(filters[i], sort_keys=True, default=str), []).append(i)
+    
+    for indices in groups.values():
+        where = _filters_to_where(queries[indices[0]].filters)
+        
+        if _matches_nothing(where):
+            results = None
+        else:
+            results, generation = await _search(
+                "search_many",
+                [embeddings[i] for i in indices],
+                max(queries[i].top_k for i in indices),
+                where,
+                queries[indices[0]].mode,
+                queries[indices[0]].oversampling,
+                queries[indices[0]].ef
+            )
+        
+        for position, i in enumerate(indices):
+            search_results[i] = (
+                _format_search_results(results, position, limit=queries[i].top_k) if results else []
+            )
+            query_cache.put_results(queries[i].query, queries[i].top_k, filters[i], generation, search_results[i])
+    
+    return [
+        SearchResponse(query=query.query, results=results, total_results=len(results))
+        for query, results in zip(queries, search_results)
+    ]
+
+
+@router.post(
+    "/search/batch",
+    response_model=BatchSearchResponse,
+    responses={400: {"model": ErrorResponse}}
+)
+async def batch_search(
+    request: BatchSearchRequest,
+    stream: bool = Query(False, description="Stream one JSON line per query (application/x-ndjson)")
+):
+    """
+    Search for many queries in one request.
+    
+    - **queries**: List of queries, each with its own `top_k` (default: 10, max: 100),
+      optional `filters` (`filename`, `header_level`, `chunk_type`: a value or a list of
+      values; `uploaded_after`/`uploaded_before`: ISO 8601 times) and optional
+      `mode`/`oversampling`/`ef` as for single searches
+    - **stream**: Return newline-delimited JSON, one search response per line,
+      written as soon as each slice of queries is searched
+    
+    Returns one search response per query, in the order of the queries.
+    """
+    if len(request.queries) > settings.BATCH_SEARCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many queries (maximum {settings.BATCH_SEARCH_MAX_QUERIES})"
+        )
+    
+    if stream:
+        chunk_size = max(1, settings.BATCH_SEARCH_STREAM_CHUNK)
+        
+        async def generate():
+            for start in range(0, len(request.queries), chunk_size):
+                try:
+                    responses = await _batch_search(request.queries[start:start + chunk_size])
+                except Exception as e:
+                    # Headers are already sent; report the failure in-band and stop
+                    yield json.dumps({"error": f"Error performing search: {str(e)}"}) + "\n"
+                    return
+                for response in responses:
+                    yield response.model_dump_json() + "\n"
+        
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+    
+    try:
+        with metrics.timer("batch_search_seconds", "End-to-end latency of a batch search"):
+            responses = await _batch_search(request.queries)
+        
+        return BatchSearchResponse(
+            responses=responses,
+            total_queries=len(responses)
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error performing search: {str(e)}"
+        )
+
+
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """
@@ -155,15 +506,19 @@ async def health_check():
     Returns information about the system configuration and indexed documents.
     """
     try:
-        total_chunks = vector_db_service.count_documents()
-        available_files = vector_db_service.get_all_filenames()
+        total_chunks = await _vector_db("count_documents")
+        total_documents = await _vector_db("count_filenames")
+        available_files = [
+            document['filename']
+            for document in await _vector_db("list_documents", limit=HEALTH_MAX_LISTED_FILES)
+        ]
         
         return HealthResponse(
             status="healthy",
             model_type=settings.MODEL_TYPE,
             model_path=settings.MODEL_PATH,
             total_chunks=total_chunks,
-            total_documents=len(available_files),
+            total_documents=total_documents,
             available_files=available_files
         )
     
@@ -174,6 +529,93 @@ async def health_check():
         )
 
 
+@router.get("/collection", response_model=CollectionInfo)
+async def get_collection():
+    """
+    Get the collection's configuration.
+    
+    Returns the vector store, distance space and HNSW parameters the collection
+    was created with, and its chunk count.
+    """
+    return CollectionInfo(
+        **await _vector_db("get_collection_config"),
+        total_chunks=await _vector_db("count_documents")
+    )
+
+
+@router.post(
+    "/collection",
+    response_model=CollectionInfo,
+    responses={409: {"model": ErrorResponse}}
+)
+async def create_collection(
+    config: CollectionConfig,
+    force: bool = Query(False, description="Delete all indexed documents if the collection is not empty")
+):
+    """
+    Recreate the collection with a distance space and HNSW parameters.
+    
+    - **space**: `l2`, `cosine` or `ip` (inner product, for normalized embeddings)
+    - **hnsw_m**, **hnsw_construction_ef**, **hnsw_search_ef**: HNSW index parameters
+      (ignored by the NumPy store, which searches exactly)
+    - **force**: Required when the collection holds documents; they are all deleted
+    
+    The distance space of an existing collection cannot be changed in place.
+    """
+    if await _vector_db("count_documents") > 0 and not force:
+        raise HTTPException(
+            status_code=409,
+            detail="Collection is not empty; pass force=true to delete all documents and recreate it"
+        )
+    
+    try:
+        await _vector_db("recreate_collection", config.model_dump())
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error creating collection: {str(e)}"
+        )
+    
+    return await get_collection()
+
+
+@router.get("/live")
+async def liveness():
+    """
+    Liveness probe.
+    
+    Returns immediately without touching the model or the vector database.
+    Fails (503) only if startup failed, so the process gets restarted.
+    """
+    if lifecycle.stage == "failed":
+        return JSONResponse(status_code=503, content={"status": "failed", "error": lifecycle.error})
+    return {"status": "alive"}
+
+
+@router.get(
+    "/ready",
+    response_model=ReadinessResponse,
+    responses={503: {"model": ReadinessResponse}}
+)
+async def readiness():
+    """
+    Readiness probe.
+    
+    Returns 503 until the vector store is open and the model is loaded and
+    warmed up, with the current startup stage and the duration of each
+    completed stage (including the import of the application).
+    """
+    response = ReadinessResponse(
+        ready=lifecycle.ready,
+        stage=lifecycle.stage,
+        timings=lifecycle.timings,
+        error=lifecycle.error
+    )
+    if not lifecycle.ready:
+        return JSONResponse(status_code=503, content=response.model_dump())
+    return response
+
+
 @router.delete("/documents/{filename}")
 async def delete_document(filename: str):
     """
@@ -184,7 +626,7 @@ async def delete_document(filename: str):
     Returns the number of deleted chunks.
     """
     try:
-        deleted_count = vector_db_service.delete_by_filename(filename)
+        deleted_count = await _vector_db("delete_by_filename", filename)
         
         if deleted_count == 0:
             raise HTTPException(
@@ -206,23 +648,62 @@ async def delete_document(filename: str):
         )
 
 
-@router.get("/documents")
-async def list_documents():
+@router.get("/documents", response_model=DocumentListResponse)
+async def list_documents(
+    offset: int = Query(0, description="Number of documents to skip", ge=0),
+    limit: int = Query(100, description="Maximum number of documents to return", ge=1, le=1000)
+):
     """
-    List all uploaded documents.
+    List uploaded documents, ordered by filename.
+    
+    - **offset**: Number of documents to skip (default: 0)
+    - **limit**: Page size (default: 100, max: 1000)
     
-    Returns a list of all document filenames in the system.
+    Returns a page of document filenames and the total number of documents.
     """
     try:
-        filenames = vector_db_service.get_all_filenames()
+        documents = await _vector_db("list_documents", offset=offset, limit=limit)
         
-        return {
-            "total_documents": len(filenames),
-            "documents": filenames
-        }
+        return DocumentListResponse(
+            total_documents=await _vector_db("count_filenames"),
+            offset=offset,
+            limit=limit,
+            documents=[document['filename'] for document in documents]
+        )
     
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error listing documents: {str(e)}"
         )
+
+
+@router.get("/documents/{filename}", response_model=DocumentInfo, responses={404: {"model": ErrorResponse}})
+async def get_document(filename: str):
+    """
+    Get catalog information about a document.
+    
+    - **filename**: Name of the file
+    
+    Returns the chunk count, stored size and upload time.
+    """
+    document = await _vector_db("get_document", filename)
+    
+    if document is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Document '{filename}' not found"
+        )
+    
+    return DocumentInfo(**document)
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Get runtime metrics.
+    
+    Returns counters, gauges and histograms as JSON. The same metrics are
+    exposed in the Prometheus text format at `/metrics`.
+    """
+    return metrics.snapshot()
@@ -0,0 +1,120 @@
+"""
+Chunker micro-benchmark.
+
+Times header detection and streaming chunking on a large seeded synthetic
+document (text only, no PDF rendering or extraction), alongside a reference
+detector that tries each header pattern with a separate re.match per line,
+as the chunker did before the patterns were compiled into one alternation.
+
+Results are written as JSON, tagged with the git commit, so runs can be
+compared with benchmarks/compare.py.
+
+Usage:
+    python -m benchmarks.bench_chunking --pages 10000 --output chunking.json
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.run_benchmarks import _git_commit  # noqa: E402
+from benchmarks.stats import percentiles  # noqa: E402
+from benchmarks.synthetic import LINES_PER_PAGE, generate_lines  # noqa: E402
+
+
+def reference_detect_headers(text: str, patterns: List) -> List[Dict[str, Any]]:
+    """Header detection with one re.match call per pattern and line."""
+    headers = []
+    current_pos = 0
+    for i, line in enumerate(text.split('\n')):
+        line_stripped = line.strip()
+        if len(line_stripped) >= 3:
+            for pattern, default_level in patterns:
+                if re.match(pattern, line_stripped):
+                    level = default_level + (len(line) - len(line.lstrip())) // 4
+                    headers.append({'position': current_pos, 'level': min(level, 3), 'text': line_stripped, 'line_num': i})
+                    break
+        current_pos += len(line) + 1
+    return headers
+
+
+def _measure(func, megabytes: float, repeats: int) -> Dict[str, Any]:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return {"megabytes_per_second": megabytes / min(samples), "latency": percentiles(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark header detection and chunking")
+    parser.add_argument("--pages", type=int, default=2000, help="Pages of synthetic text")
+    parser.add_argument("--header-density", type=float, default=0.3, help="Probability a paragraph starts a section")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per measurement (the fastest is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="chunking_results.json", help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    # Importing the services neither loads the model nor opens the stores
+    from services.document_processor import HEADER_PATTERNS, document_processor
+    results = run(args, document_processor, HEADER_PATTERNS)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(
+        f"detect_headers {results['detect_headers']['megabytes_per_second']:.1f} MB/s "
+        f"({results['detect_speedup']:.1f}x reference), "
+        f"chunk_pages {results['chunk_pages']['megabytes_per_second']:.1f} MB/s"
+    )
+    print(f"Results written to {args.output}")
+
+
+def run(args: argparse.Namespace, document_processor, patterns: List) -> Dict[str, Any]:
+    print(f"Generating {args.pages} pages of text...")
+    lines = generate_lines(args.pages, args.header_density, seed=args.seed)
+    pages = [
+        (number, "\n".join(lines[start:start + LINES_PER_PAGE]))
+        for number, start in enumerate(range(0, len(lines), LINES_PER_PAGE), start=1)
+    ]
+    text = "\n".join(lines)
+    megabytes = len(text) / 1e6
+
+    if reference_detect_headers(text, patterns) != document_processor._detect_headers(text):
+        sys.exit("Header detection differs from the reference detector")
+
+    print("Benchmarking header detection...")
+    detect = _measure(lambda: document_processor._detect_headers(text), megabytes, args.repeats)
+    reference = _measure(lambda: reference_detect_headers(text, patterns), megabytes, args.repeats)
+
+    print("Benchmarking chunking...")
+    chunks = list(document_processor.chunk_pages(pages, "benchmark.pdf"))
+    chunking = _measure(lambda: list(document_processor.chunk_pages(pages, "benchmark.pdf")), megabytes, args.repeats)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "megabytes": megabytes,
+            "args": vars(args)
+        },
+        "chunks": len(chunks),
+        "detect_headers": detect,
+        "reference_detect_headers": reference,
+        "detect_speedup": detect["megabytes_per_second"] / reference["megabytes_per_second"],
+        "chunk_pages": chunking
+    }
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Compare two benchmark result files.
+
+Prints every numeric result present in both files with the relative change.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json
+"""
+import argparse
+import json
+from typing import Any, Dict
+
+
+def flatten(results: Any, prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves keyed by their path. List entries are keyed by collection size or dimension when present."""
+    values = {}
+    if isinstance(results, dict):
+        for key, value in results.items():
+            if key == "meta":
+                continue
+            values.update(flatten(value, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(results, list):
+        for index, value in enumerate(results):
+            label = value.get("collection_size", value.get("dimension", index)) if isinstance(value, dict) else index
+            values.update(flatten(value, f"{prefix}[{label}]"))
+    elif isinstance(results, (int, float)) and not isinstance(results, bool):
+        values[prefix] = float(results)
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--filter", default="", help="Only show results whose path contains this text")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline:  {baseline['meta']['git_commit']} ({baseline['meta']['timestamp']})")
+    print(f"candidate: {candidate['meta']['git_commit']} ({candidate['meta']['timestamp']})")
+    print()
+
+    before, after = flatten(baseline), flatten(candidate)
+    width = max((len(path) for path in before), default=10)
+    print(f"{'result':<{width}}  {'baseline':>12}  {'candidate':>12}  {'change':>8}")
+    for path in sorted(before.keys() & after.keys()):
+        if args.filter not in path:
+            continue
+        old, new = before[path], after[path]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{path:<{width}}  {old:>12.6g}  {new:>12.6g}  {change:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Closed-loop load generator for a running Document Search API.
+
+A fixed pool of workers shares one pooled HTTP connection pool
+(AsyncDocumentSearchClient) and issues searches paced to a target QPS; each
+worker waits for its response before taking the next slot, so throughput is
+capped by both the target rate and the number of workers. Optional
+background uploads run alongside, and a liveness probe measures how long
+the event loop takes to answer a trivial request, which exposes blocking.
+
+Queries come from a query log (one query per line, or JSON lines with a
+"query" field) or a synthetic Zipf-distributed set of queries, which gives the
+heavy head of repeated queries typical of real traffic.
+
+Every --report-interval seconds a line with throughput, error rate and
+latency percentiles is printed; the full timeline and totals can be written
+as JSON with --output.
+
+Usage:
+    python -m benchmarks.load_test --base-url http://localhost:8000 --qps 50 --duration 60
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.stats import percentiles  # noqa: E402
+from benchmarks.synthetic import generate_pdf, generate_queries  # noqa: E402
+from example_client import AsyncDocumentSearchClient  # noqa: E402
+
+
+def load_queries(path: str) -> List[str]:
+    """Read a query log: plain text, one query per line, or JSON lines with a 'query' field."""
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                line = json.loads(line).get("query", "")
+            if line:
+                queries.append(line)
+    return queries
+
+
+class QuerySource:
+    """Draws queries from a log in order (looping), or from a Zipf distribution over synthetic queries."""
+
+    def __init__(self, queries: Optional[List[str]], distinct: int, zipf_exponent: float, seed: int):
+        self.rng = random.Random(seed)
+        self.position = 0
+
+        if queries:
+            self.queries, self.weights = queries, None
+        else:
+            self.queries = generate_queries(distinct, seed=seed)
+            self.weights = [1 / (rank + 1) ** zipf_exponent for rank in range(distinct)]
+
+    def next(self) -> str:
+        if self.weights is None:
+            query = self.queries[self.position % len(self.queries)]
+            self.position += 1
+            return query
+        return self.rng.choices(self.queries, self.weights)[0]
+
+
+class Recorder:
+    """Collects request outcomes into fixed-width time windows."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.started = time.monotonic()
+        self.windows: Dict[int, Dict[str, Dict[str, List]]] = defaultdict(
+            lambda: defaultdict(lambda: {"latencies": [], "errors": []})
+        )
+
+    def record(self, kind: str, seconds: float, error: Optional[str] = None):
+        window = int((time.monotonic() - self.started) // self.interval)
+        bucket = self.windows[window][kind]
+        if error is None:
+            bucket["latencies"].append(seconds)
+        else:
+            bucket["errors"].append(error)
+
+    def summarize(self, buckets: List[Dict[str, List]], seconds: float) -> Dict[str, Any]:
+        latencies = [value for bucket in buckets for value in bucket["latencies"]]
+        errors = [error for bucket in buckets for error in bucket["errors"]]
+        total = len(latencies) + len(errors)
+        error_types: Dict[str, int] = defaultdict(int)
+        for error in errors:
+            error_types[error] += 1
+
+        return {
+            "requests": total,
+            "throughput": total / seconds if seconds else 0.0,
+            "error_rate": len(errors) / total if total else 0.0,
+            "errors": dict(error_types),
+            "latency": percentiles(latencies)
+        }
+
+    def window(self, index: int) -> Dict[str, Any]:
+        return {
+            "start": index * self.interval,
+            **{kind: self.summarize([bucket], self.interval) for kind, bucket in self.windows[index].items()}
+        }
+
+    def totals(self, seconds: float) -> Dict[str, Any]:
+        kinds = {kind for window in self.windows.values() for kind in window}
+        return {
+            kind: self.summarize([window[kind] for window in self.windows.values() if kind in window], seconds)
+            for kind in sorted(kinds)
+        }
+
+
+def _error_name(error: Exception) -> str:
+    response = getattr(error, "response", None)
+    if response is not None:
+        return f"HTTP {response.status_code}"
+    return type(error).__name__
+
+
+async def _timed_call(recorder: Recorder, kind: str, func, *args, **kwargs):
+    started = time.perf_counter()
+    try:
+        result = await func(*args, **kwargs)
+    except Exception as e:
+        recorder.record(kind, time.perf_counter() - started, _error_name(e))
+        return None
+    recorder.record(kind, time.perf_counter() - started)
+    return result
+
+
+async def search_worker(client, recorder, source: QuerySource, pacer: Dict[str, float], qps: float, top_k: int, deadline: float):
+    """Closed loop: claim the next send slot, wait for it, search, and wait for the response."""
+    while True:
+        slot = pacer["next"]
+        pacer["next"] = slot + 1 / qps
+        if slot >= deadline:
+            return
+
+        delay = slot - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await _timed_call(recorder, "search", client.search, source.next(), top_k)
+
+
+async def upload_worker(client, recorder, interval: float, pages: int, deadline: float, wait: bool, seed: int):
+    """Upload a new synthetic PDF every interval seconds; optionally time each job to completion."""
+    pending = []
+    index = 0
+    while time.monotonic() + interval < deadline:
+        await asyncio.sleep(interval)
+        content = generate_pdf(pages, seed=seed + index)
+        job = await _timed_call(recorder, "upload", client.upload_content, content, f"loadtest-{seed}-{index}.pdf")
+        index += 1
+
+        if job is not None and wait:
+            pending.append(asyncio.ensure_future(
+                _timed_call(recorder, "ingestion", client.wait_for_job, job["job_id"], poll_interval=0.5)
+            ))
+
+    # Jobs still running at the deadline are not counted
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def probe_worker(client, recorder, interval: float, deadline: float):
+    """Time the liveness endpoint; spikes mean the server's event loop is blocked."""
+    while time.monotonic() < deadline:
+        await _timed_call(recorder, "live", client.live)
+        await asyncio.sleep(interval)
+
+
+async def reporter(recorder: Recorder, deadline: float):
+    reported = 0
+    while True:
+        await asyncio.sleep(max(0.0, recorder.started + (reported + 1) * recorder.interval - time.monotonic()))
+        window = recorder.window(reported)
+        reported += 1
+
+        parts = [f"t={window['start'] + recorder.interval:6.1f}s"]
+        for kind in ("search", "upload", "live"):
+            if kind in window:
+                stats = window[kind]
+                latency = stats["latency"]
+                parts.append(
+                    f"{kind}: {stats['throughput']:6.1f}/s err {stats['error_rate'] * 100:4.1f}%"
+                    + (f" p50 {latency['p50'] * 1000:7.1f}ms p99 {latency['p99'] * 1000:7.1f}ms" if latency["count"] else "")
+                )
+        print(" | ".join(parts), flush=True)
+
+        if time.monotonic() >= deadline:
+            return
+
+
+async def run(args) -> Dict[str, Any]:
+    queries = load_queries(args.query_log) if args.query_log else None
+    source = QuerySource(queries, args.distinct_queries, args.zipf_exponent, args.seed)
+    recorder = Recorder(args.report_interval)
+
+    async with AsyncDocumentSearchClient(args.base_url, max_connections=args.concurrency + 4) as client:
+        await client.health_check()
+
+        started = time.monotonic()
+        recorder.started = started
+        deadline = started + args.duration
+        pacer = {"next": started}
+
+        tasks = [
+            asyncio.ensure_future(search_worker(client, recorder, source, pacer, args.qps, args.top_k, deadline))
+            for _ in range(args.concurrency)
+        ]
+        if args.upload_interval > 0:
+            tasks.append(asyncio.ensure_future(
+                upload_worker(client, recorder, args.upload_interval, args.upload_pages, deadline, args.wait_for_jobs, args.seed)
+            ))
+        if args.probe_interval > 0:
+            tasks.append(asyncio.ensure_future(probe_worker(client, recorder, args.probe_interval, deadline)))
+        report = asyncio.ensure_future(reporter(recorder, deadline))
+
+        await asyncio.gather(*tasks)
+        elapsed = time.monotonic() - started
+        await report
+
+    return {
+        "config": vars(args),
+        "duration": elapsed,
+        "totals": recorder.totals(elapsed),
+        "timeline": [recorder.window(index) for index in sorted(recorder.windows)]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Closed-loop load generator for the Document Search API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--qps", type=float, default=20.0, help="Target search rate")
+    parser.add_argument("--concurrency", type=int, default=16, help="Search workers (maximum requests in flight)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to run")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--query-log", help="Replay queries from this file instead of synthetic ones")
+    parser.add_argument("--distinct-queries", type=int, default=1000, help="Synthetic query vocabulary size")
+    parser.add_argument("--zipf-exponent", type=float, default=1.1, help="Skew of the synthetic query distribution")
+    parser.add_argument("--upload-interval", type=float, default=0.0, help="Seconds between background uploads (0 disables)")
+    parser.add_argument("--upload-pages", type=int, default=10, help="Pages per uploaded synthetic PDF")
+    parser.add_argument("--wait-for-jobs", action="store_true", help="Also time uploaded jobs until ingestion completes")
+    parser.add_argument("--probe-interval", type=float, default=0.25, help="Seconds between liveness probes (0 disables)")
+    parser.add_argument("--report-interval", type=float, default=5.0, help="Seconds per reported window")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write totals and the per-window timeline as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    print()
+    for kind, stats in results["totals"].items():
+        latency = stats["latency"]
+        line = f"{kind:>9}: {stats['requests']} requests, {stats['throughput']:.1f}/s, errors {stats['error_rate'] * 100:.2f}%"
+        if latency["count"]:
+            line += (
+                f", p50 {latency['p50'] * 1000:.1f}ms p95 {latency['p95'] * 1000:.1f}ms"
+                f" p99 {latency['p99'] * 1000:.1f}ms max {latency['max'] * 1000:.1f}ms"
+            )
+        print(line)
+        if stats["errors"]:
+            print(f"           {stats['errors']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Offline benchmark suite for ingestion, chunking and search.
+
+Generates synthetic PDFs, embeds with a tiny local stand-in model (or a model
+given with --model), and measures:
+
+- PDF text extraction (extract_text_from_pdf)
+- header detection and header splitting (_detect_headers, _split_by_headers)
+- embedding throughput (embed_texts, cache disabled)
+- vector store write rate (add_documents) while growing the collection
+- search latency percentiles at each collection size
+- Matryoshka truncation: recall@k against full-dimension search and bytes per vector
+
+Results are written as JSON, tagged with the git commit, so runs can be
+compared with benchmarks/compare.py.
+
+Usage:
+    python -m benchmarks.run_benchmarks --output results.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+# Run from anywhere: the services read settings relative to the project root
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.stats import percentiles  # noqa: E402
+from benchmarks.synthetic import generate_pdf, generate_queries  # noqa: E402
+from benchmarks.tiny_model import build_tiny_model  # noqa: E402
+
+
+def _timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def bench_extraction(processor, pdfs: List[bytes], pages: int) -> Dict[str, Any]:
+    texts, samples = [], []
+    for pdf in pdfs:
+        text, seconds = _timed(processor.extract_text_from_pdf, pdf)
+        texts.append(text)
+        samples.append(seconds)
+
+    return {
+        "documents": len(pdfs),
+        "pages_per_second": len(pdfs) * pages / sum(samples),
+        "megabytes_per_second": sum(len(pdf) for pdf in pdfs) / 1e6 / sum(samples),
+        "latency": percentiles(samples)
+    }, texts
+
+
+def bench_chunking(processor, texts: List[str]) -> Dict[str, Any]:
+    detect_samples, split_samples, chunks = [], [], []
+    for text in texts:
+        headers, seconds = _timed(processor._detect_headers, text)
+        detect_samples.append(seconds)
+        sections, seconds = _timed(processor._split_by_headers, text)
+        split_samples.append(seconds)
+        chunks.extend(chunk for chunk, _ in sections if chunk.strip())
+
+    total_chars = sum(len(text) for text in texts)
+    return {
+        "chunks": len(chunks),
+        "detect_headers": {
+            "megabytes_per_second": total_chars / 1e6 / sum(detect_samples),
+            "latency": percentiles(detect_samples)
+        },
+        "split_by_headers": {
+            "megabytes_per_second": total_chars / 1e6 / sum(split_samples),
+            "latency": percentiles(split_samples)
+        }
+    }, chunks
+
+
+def bench_embedding(embedding_service, texts: List[str], batch_size: int) -> Dict[str, Any]:
+    embeddings, samples = [], []
+
+    # Warm up so one-time initialization does not skew the first batch
+    embedding_service.embed_texts(texts[:batch_size], use_cache=False)
+
+    for start in range(0, len(texts), batch_size):
+        batch, seconds = _timed(embedding_service.embed_texts, texts[start:start + batch_size], use_cache=False)
+        embeddings.extend(batch)
+        samples.append(seconds)
+
+    return {
+        "texts": len(texts),
+        "batch_size": batch_size,
+        "texts_per_second": len(texts) / sum(samples),
+        "padding_efficiency": embedding_service.padding_efficiency(),
+        "batch_latency": percentiles(samples)
+    }, embeddings
+
+
+def bench_matryoshka(
+    embedding_service,
+    embeddings: List[List[float]],
+    queries: List[str],
+    dimensions: List[int],
+    top_k: int
+) -> List[Dict[str, Any]]:
+    """
+    Recall@k of exact search over truncated, re-normalized vectors, taking
+    exact search over the full vectors as ground truth.
+
+    Only meaningful with a Matryoshka-trained model (--model); the tiny local
+    model's truncated embeddings are essentially random.
+    """
+    import numpy as np
+
+    def project(vectors, dimension):
+        truncated = vectors[:, :dimension]
+        return truncated / np.maximum(np.linalg.norm(truncated, axis=1, keepdims=True), 1e-12)
+
+    corpus = np.asarray(embeddings, dtype=np.float32)
+    query_vectors = np.asarray(embedding_service.embed_texts(queries, use_cache=False), dtype=np.float32)
+    full_dimension = corpus.shape[1]
+    k = min(top_k, len(corpus))
+
+    def top_ids(dimension):
+        scores = project(query_vectors, dimension) @ project(corpus, dimension).T
+        return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+    truth = top_ids(full_dimension)
+    report = []
+    for dimension in sorted(set(d for d in dimensions if 0 < d <= full_dimension) | {full_dimension}):
+        found = top_ids(dimension)
+        recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(truth, found)])
+        report.append({
+            "dimension": dimension,
+            "recall_at_k": float(recall),
+            "bytes_per_vector": dimension * 4,
+            "size_ratio": dimension / full_dimension
+        })
+        print(f"  {dimension} dims: recall@{k} {recall:.3f}, {dimension * 4} bytes/vector")
+
+    return report
+
+
+def bench_collection(
+    vector_db_service,
+    embedding_service,
+    texts: List[str],
+    embeddings: List[List[float]],
+    sizes: List[int],
+    queries: List[str],
+    top_k: int,
+    write_batch_size: int,
+    seed: int
+) -> Dict[str, Any]:
+    """
+    Grow the collection to each size and measure write rate and search latency.
+
+    Chunk texts are reused cyclically; their embeddings get small seeded noise
+    (renormalized) so the collection does not contain exact duplicates.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    base = np.asarray(embeddings, dtype=np.float32)
+    query_embeddings = embedding_service.embed_texts(queries, use_cache=False)
+
+    vector_db_service.clear_collection()
+    writes, searches = [], []
+    stored = 0
+
+    for size in sorted(sizes):
+        write_samples = []
+        while stored < size:
+            count = min(write_batch_size, size - stored)
+            positions = [(stored + i) % len(texts) for i in range(count)]
+            vectors = base[positions] + rng.normal(0, 0.05, (count, base.shape[1])).astype(np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+            _, seconds = _timed(
+                vector_db_service.add_documents,
+                [texts[p] for p in positions],
+                vectors.tolist(),
+                [{"filename": f"bench-{(stored + i) // 100}.pdf", "chunk_index": (stored + i) % 100} for i in range(count)]
+            )
+            write_samples.append(seconds)
+            stored += count
+
+        if write_samples:
+            writes.append({
+                "collection_size": size,
+                "chunks_per_second": (size - (writes[-1]["collection_size"] if writes else 0)) / sum(write_samples),
+                "batch_latency": percentiles(write_samples)
+            })
+
+        search_samples = []
+        for query_embedding in query_embeddings:
+            _, seconds = _timed(vector_db_service.search, query_embedding, top_k)
+            search_samples.append(seconds)
+        searches.append({
+            "collection_size": size,
+            "top_k": top_k,
+            "latency": percentiles(search_samples)
+        })
+        print(f"  {size} chunks: search p50 {searches[-1]['latency']['p50'] * 1000:.2f} ms")
+
+    return {"writes": writes, "search": searches}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for ingestion, chunking and search")
+    parser.add_argument("--documents", type=int, default=20, help="Synthetic PDFs to generate")
+    parser.add_argument("--pages", type=int, default=10, help="Pages per synthetic PDF")
+    parser.add_argument("--header-density", type=float, default=0.3, help="Probability a paragraph starts a section")
+    parser.add_argument("--collection-sizes", default="1000,10000,50000", help="Comma-separated collection sizes")
+    parser.add_argument("--queries", type=int, default=200, help="Search queries per collection size")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--embed-batch-size", type=int, default=64)
+    parser.add_argument("--write-batch-size", type=int, default=512)
+    parser.add_argument("--matryoshka-dims", default="64,128,256,512", help="Comma-separated truncated dimensions")
+    parser.add_argument("--vector-store", default="chroma", choices=["chroma", "numpy"], help="Vector store backend")
+    parser.add_argument("--model", help="Embedding model directory (default: build a tiny local model)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="embeddingsearch-bench-")
+    try:
+        model_path = args.model or build_tiny_model(os.path.join(work_dir, "tiny_model"), seed=args.seed)
+
+        # Settings are read when the services are imported
+        os.environ.update({
+            "MODEL_TYPE": "custom",
+            "MODEL_PATH": model_path,
+            "CHROMA_PERSIST_DIRECTORY": os.path.join(work_dir, "chroma"),
+            "VECTOR_STORE": args.vector_store,
+            "NUMPY_STORE_DIRECTORY": os.path.join(work_dir, "numpy_store"),
+            "COLLECTION_NAME": "benchmark",
+            "EMBEDDING_CACHE_ENABLED": "false",
+            "EMBEDDING_STORED_DIMENSION": "0",
+            "ANONYMIZED_TELEMETRY": "False"
+        })
+        from services.document_processor import document_processor
+        from services.embedding_service import embedding_service
+        from services.vector_db_service import vector_db_service
+
+        # Loaded up front so model loading is not timed as part of the first embedding batch
+        embedding_service.load()
+        vector_db_service.initialize()
+
+        print(f"Generating {args.documents} PDFs of {args.pages} pages...")
+        pdfs = [generate_pdf(args.pages, args.header_density, seed=args.seed + i) for i in range(args.documents)]
+
+        print("Benchmarking extraction...")
+        extraction, texts = bench_extraction(document_processor, pdfs, args.pages)
+
+        print("Benchmarking chunking...")
+        chunking, chunks = bench_chunking(document_processor, texts)
+
+        print(f"Benchmarking embedding of {len(chunks)} chunks...")
+        embedding, embeddings = bench_embedding(embedding_service, chunks, args.embed_batch_size)
+
+        print("Benchmarking Matryoshka truncation...")
+        matryoshka = bench_matryoshka(
+            embedding_service,
+            embeddings,
+            generate_queries(args.queries, seed=args.seed),
+            [int(dimension) for dimension in args.matryoshka_dims.split(",") if dimension.strip()],
+            args.top_k
+        )
+
+        print("Benchmarking writes and search...")
+        collection = bench_collection(
+            vector_db_service,
+            embedding_service,
+            chunks,
+            embeddings,
+            [int(size) for size in args.collection_sizes.split(",") if size.strip()],
+            generate_queries(args.queries, seed=args.seed),
+            args.top_k,
+            args.write_batch_size,
+            args.seed
+        )
+
+        results = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "git_commit": _git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "model": args.model or "tiny-local",
+                "vector_store": args.vector_store,
+                "embedding_dimension": embedding_service.get_embedding_dimension(),
+                "args": vars(args)
+            },
+            "extraction": extraction,
+            "chunking": chunking,
+            "embedding": embedding,
+            "matryoshka": matryoshka,
+            **collection
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
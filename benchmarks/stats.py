@@ -0,0 +1,23 @@
+"""Summary statistics shared by the benchmark and load-testing tools."""
+from typing import Dict, Sequence
+
+
+def percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    """Summary statistics (nearest-rank percentiles) of latency samples in seconds."""
+    if not samples:
+        return {"count": 0}
+
+    ordered = sorted(samples)
+
+    def rank(p: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "min": ordered[0],
+        "p50": rank(50),
+        "p95": rank(95),
+        "p99": rank(99),
+        "max": ordered[-1]
+    }
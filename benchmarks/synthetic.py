@@ -0,0 +1,147 @@
+"""
+Synthetic PDF generator for benchmarks.
+
+Writes minimal PDFs by hand (one Helvetica text stream per page) so the
+benchmarks need nothing beyond the project's own dependencies. Documents are
+seeded and therefore identical across runs.
+"""
+import random
+from typing import List, Tuple
+
+WORDS = (
+    "system data model service request response value process result index "
+    "query document section record policy contract payment account report "
+    "network storage memory latency throughput batch vector search client "
+    "server update delete version schema field table metric event window "
+    "context header chunk token embedding pipeline worker queue cache "
+    "analysis review summary detail method approach design goal scope"
+).split()
+
+LINE_WIDTH = 90  # Characters per line
+LINES_PER_PAGE = 48
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 16))]
+    words[0] = words[0].capitalize()
+    return " ".join(words) + "."
+
+
+def _paragraph(rng: random.Random) -> List[str]:
+    """A paragraph of sentences wrapped to LINE_WIDTH characters."""
+    text = " ".join(_sentence(rng) for _ in range(rng.randint(3, 7)))
+    lines, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > LINE_WIDTH:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _header(rng: random.Random, numbers: List[int]) -> str:
+    """A header in one of the styles the document processor recognizes."""
+    title = " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(2, 4)))
+    style = rng.random()
+
+    if style < 0.5:
+        # Numbered, with occasional subsections
+        if numbers[0] and rng.random() < 0.5:
+            numbers[1] += 1
+        else:
+            numbers[0] += 1
+            numbers[1] = 0
+        return "".join(f"{n}." for n in numbers if n) + f" {title}"
+    if style < 0.7:
+        return title.upper() + " OVERVIEW"
+    if style < 0.85:
+        return f"Section {rng.randint(1, 99)}: {title}"
+    return f"{title}:"
+
+
+def generate_lines(pages: int, header_density: float, seed: int = 0) -> List[str]:
+    """
+    Text lines of a synthetic document.
+
+    header_density is the probability that a paragraph starts a new section
+    with a header. Paragraphs are separated by blank lines.
+    """
+    rng = random.Random(seed)
+    numbers = [0, 0]
+    lines: List[str] = []
+
+    while len(lines) < pages * LINES_PER_PAGE:
+        if rng.random() < header_density:
+            lines.append(_header(rng, numbers))
+        lines.extend(_paragraph(rng))
+        lines.append("")
+
+    return lines[:pages * LINES_PER_PAGE]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def render_pdf(lines: List[str]) -> bytes:
+    """Render text lines into a PDF, LINES_PER_PAGE lines per page."""
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+
+    # Object numbers: 1 catalog, 2 page tree, 3 font, then (page, content) pairs
+    objects: List[Tuple[int, bytes]] = []
+    page_refs = []
+    for index, page_lines in enumerate(pages):
+        page_number = 4 + 2 * index
+        content_number = page_number + 1
+        page_refs.append(f"{page_number} 0 R")
+
+        # Blank lines are drawn as a single space so text extraction keeps paragraph breaks
+        stream = "BT /F1 10 Tf 14 TL 50 750 Td\n" + "".join(
+            f"({_escape(line) or ' '}) Tj T*\n" for line in page_lines
+        ) + "ET"
+        stream_bytes = stream.encode("latin-1", errors="replace")
+
+        objects.append((
+            page_number,
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_number} 0 R >>".encode()
+        ))
+        objects.append((
+            content_number,
+            f"<< /Length {len(stream_bytes)} >>\nstream\n".encode() + stream_bytes + b"\nendstream"
+        ))
+
+    objects[:0] = [
+        (1, b"<< /Type /Catalog /Pages 2 0 R >>"),
+        (2, f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(pages)} >>".encode()),
+        (3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"),
+    ]
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number, body in objects:
+        offsets[number] = len(out)
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+
+    xref_offset = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n".encode()
+    out += b"0000000000 65535 f \n"
+    for number in range(1, len(objects) + 1):
+        out += f"{offsets[number]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+
+    return bytes(out)
+
+
+def generate_pdf(pages: int = 10, header_density: float = 0.3, seed: int = 0) -> bytes:
+    """A synthetic PDF with the given number of pages and header density."""
+    return render_pdf(generate_lines(pages, header_density, seed))
+
+
+def generate_queries(count: int, seed: int = 0) -> List[str]:
+    """Short synthetic search queries drawn from the same vocabulary as the documents."""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))) for _ in range(count)]
@@ -0,0 +1,57 @@
+"""
+Tiny local stand-in embedding model for offline benchmarks.
+
+Builds a small randomly initialized (but seeded) BERT sentence-transformer
+with a word-level vocabulary covering the synthetic documents. Its
+embeddings are meaningless, but it exercises the same tokenization,
+inference and pooling code paths as a real model without network access.
+"""
+import os
+import string
+from .synthetic import WORDS
+
+SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+
+
+def build_tiny_model(
+    path: str,
+    hidden_size: int = 64,
+    num_layers: int = 2,
+    max_seq_length: int = 256,
+    seed: int = 0
+) -> str:
+    """Create the model at path unless it already exists. Returns path."""
+    if os.path.exists(os.path.join(path, "modules.json")):
+        return path
+
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    os.makedirs(path, exist_ok=True)
+
+    # Whole words of the synthetic vocabulary, plus characters so any text tokenizes
+    characters = list(string.ascii_lowercase + string.digits + string.punctuation)
+    vocab = SPECIAL_TOKENS + sorted(set(WORDS)) + characters + [f"##{c}" for c in characters]
+    vocab_file = os.path.join(path, "vocab.txt")
+    with open(vocab_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(vocab) + "\n")
+
+    torch.manual_seed(seed)
+    tokenizer = BertTokenizerFast(vocab_file, do_lower_case=True)
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=hidden_size,
+        num_hidden_layers=num_layers,
+        num_attention_heads=2,
+        intermediate_size=hidden_size * 2,
+        max_position_embeddings=512
+    )
+    BertModel(config).save_pretrained(path)
+    tokenizer.save_pretrained(path)
+
+    transformer = models.Transformer(path, max_seq_length=max_seq_length)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), pooling_mode="mean")
+    SentenceTransformer(modules=[transformer, pooling, models.Normalize()]).save(path)
+
+    return path
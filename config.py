@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Literal
+from typing import List, Literal
 
 
 class Settings(BaseSettings):
@@ -9,18 +9,95 @@ class Settings(BaseSettings):
     MODEL_TYPE: Literal["custom", "huggingface"] = "custom"
     MODEL_PATH: str = "models/nomic-embed-text-v1.5/nomic-embed-text-v1.5-az"
     EMBEDDING_DIMENSION: int = 768
+    # Matryoshka truncation: keep the first N dimensions of every embedding and re-normalize
+    # (0 = full model dimension). Re-project an existing collection with: python -m scripts.reproject_collection
+    EMBEDDING_STORED_DIMENSION: int = 0
+    # Inference backend: PyTorch, ONNX Runtime fp32, or ONNX Runtime with dynamic int8 quantization.
+    # ONNX models are exported into MODEL_PATH/onnx/ with: python -m scripts.export_onnx
+    EMBEDDING_BACKEND: Literal["torch", "onnx", "onnx-int8"] = "torch"
+    # Texts are sorted by token length and batched so each forward pass stays under this many
+    # padded tokens (texts x longest text); 0 disables bucketing and uses the model's default batches
+    EMBED_TOKEN_BUDGET: int = 16384
+    EMBED_MAX_BATCH_TEXTS: int = 256  # Upper bound on texts per forward pass
+    
+    # Embedding Cache Configuration
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = "./embedding_cache/embeddings.db"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 500000  # Least recently used entries are evicted beyond this
     
     # ChromaDB Configuration
     CHROMA_PERSIST_DIRECTORY: str = "./chroma_db"
     COLLECTION_NAME: str = "document_embeddings"
+    # Vector store backend: ChromaDB (HNSW) or exact search over a memory-mapped NumPy matrix
+    VECTOR_STORE: Literal["chroma", "numpy"] = "chroma"
+    NUMPY_STORE_DIRECTORY: str = "./numpy_store"
+    # Distance and HNSW parameters of newly created collections (existing ones keep theirs)
+    VECTOR_SPACE: Literal["l2", "cosine", "ip"] = "cosine"
+    HNSW_M: int = 16  # Graph links per node: more improves recall, costs memory and insert time
+    HNSW_CONSTRUCTION_EF: int = 100  # Candidates considered while inserting
+    HNSW_SEARCH_EF: int = 100  # Candidates considered per query (raised per request with `ef`)
+    # Quantized search tier kept next to the collection: int8 or binary codes scanned exhaustively,
+    # candidates rescored against full-precision vectors on disk
+    QUANTIZED_INDEX: Literal["none", "int8", "binary"] = "none"
+    SEARCH_MODE: Literal["hnsw", "quantized"] = "hnsw"  # Default mode of searches without an explicit mode
+    QUANTIZED_OVERSAMPLING: float = 4.0  # Candidates rescored per result (top_k x oversampling)
+    
+    # Searches filtered to documents with at most this many chunks in total score
+    # those chunks exactly (found through the catalog) instead of filtering the HNSW index
+    FILTERED_EXACT_SEARCH_MAX_CHUNKS: int = 5000
     
     # Document Processing Configuration
     CHUNK_SIZE: int = 500
     CHUNK_OVERLAP: int = 50
-    
+    # Unit of chunk sizes: characters (CHUNK_SIZE), or tokens of the embedding model's tokenizer,
+    # where sections are split and small adjacent ones merged to fill up to CHUNK_MAX_TOKENS tokens
+    CHUNK_SIZE_UNIT: Literal["characters", "tokens"] = "characters"
+    CHUNK_MAX_TOKENS: int = 0  # Token budget per chunk (0 = the model's max sequence length, which also caps it)
+    # Text before the first header is dropped if the header appears within this many pages; past them
+    # the text is kept as paragraph chunks and streamed, so header-less documents aren't held in memory
+    CHUNK_PREAMBLE_MAX_PAGES: int = 3
+
+    # Ingestion Concurrency Configuration
+    EXTRACTION_WORKERS: int = 2  # Processes used for PDF parsing and chunking
+    EXTRACTION_PARALLEL_MIN_PAGES: int = 64  # PDFs with this many pages are split across all extraction processes
+    EMBEDDING_WORKERS: int = 1  # Threads used for model inference during ingestion
+    MAX_CONCURRENT_UPLOADS: int = 4  # Uploads processed at once, others wait
+    EMBED_BATCH_SIZE: int = 64  # Chunks embedded per step (job progress granularity)
+    INGEST_CHUNK_BATCH_SIZE: int = 512  # Chunks of a document held in memory at once per pipeline stage
+    BULK_WRITE_BATCH_SIZE: int = 512  # Chunks from consecutive documents written in one call
+    BULK_MAX_FILES: int = 1000  # Maximum PDFs accepted in one bulk upload or archive
+
+    # Query Batching Configuration
+    QUERY_BATCH_MAX_SIZE: int = 32  # Maximum queries embedded in one model call
+    QUERY_BATCH_MAX_WAIT_MS: float = 5.0  # How long a batch waits for more queries
+    BATCH_SEARCH_MAX_QUERIES: int = 1000  # Maximum queries in one batch search request
+    BATCH_SEARCH_STREAM_CHUNK: int = 64  # Queries searched per step when streaming NDJSON
+
+    # Query Cache Configuration
+    QUERY_CACHE_ENABLED: bool = True
+    QUERY_CACHE_MAX_EMBEDDINGS: int = 10000  # Normalized query text -> embedding
+    QUERY_CACHE_MAX_RESULTS: int = 10000  # (query, top_k, filters) -> results, dropped on every write
+    QUERY_CACHE_TTL_SECONDS: float = 300.0
+
+    # Ingestion Job Queue Configuration
+    JOB_DATABASE_PATH: str = "./jobs/jobs.db"
+    UPLOAD_SPOOL_DIRECTORY: str = "./jobs/spool"
+    JOB_WORKERS: int = 2  # Jobs processed concurrently
+    JOB_QUEUE_MAX_PENDING: int = 1000  # Uploads are rejected once this many jobs are waiting
+
     # Server Configuration
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    SERVER_TIMING_ENABLED: bool = False  # Add a Server-Timing header with per-stage durations
+    # The model and vector store are loaded after the server starts listening; /api/ready
+    # returns 503 until they are loaded and the model has encoded one batch of each size
+    WARMUP_BATCH_SIZES: List[int] = [1, 32]  # Set to [] to skip the warmup
+    # Multi-process serving: with WORKERS > 1, main.py runs that many HTTP worker processes and one
+    # backend process (python -m services.backend) owning the model, vector store and job queue,
+    # which the workers call over a Unix socket at BACKEND_SOCKET
+    WORKERS: int = 1
+    BACKEND_SOCKET: str = "./jobs/backend.sock"
+    REMOTE_BACKEND: bool = False  # Set by main.py for its workers: call the backend instead of loading the services
     
     class Config:
         env_file = ".env"
@@ -28,3 +105,9 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
+
+# ONNX model files (relative to MODEL_PATH) loaded by each ONNX EMBEDDING_BACKEND
+ONNX_MODEL_FILES = {
+    "onnx": "onnx/model.onnx",
+    "onnx-int8": "onnx/model_qint8.onnx",
+}
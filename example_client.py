@@ -3,9 +3,17 @@ Example client for the Document Search API.
 Demonstrates how to integrate the search system into your application.
 """
 
+import asyncio
 import requests
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
+import json
 import os
+import time
+
+try:
+    import httpx  # Only needed for AsyncDocumentSearchClient
+except ImportError:
+    httpx = None
 
 
 class DocumentSearchClient:
@@ -32,15 +40,20 @@ class DocumentSearchClient:
         response.raise_for_status()
         return response.json()
     
-    def upload_pdf(self, file_path: str) -> Dict:
+    def upload_pdf(self, file_path: str, mode: str = "append") -> Dict:
         """
         Upload a PDF file for processing.
         
+        The file is queued for ingestion; use wait_for_job() to block until
+        it has been indexed.
+        
         Args:
             file_path: Path to the PDF file
+            mode: 'append' to add all chunks, or 'replace' to re-index an
+                existing document with the same filename incrementally
             
         Returns:
-            Dict with upload results
+            Dict with the created ingestion job
         """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
@@ -50,11 +63,84 @@ class DocumentSearchClient:
         
         with open(file_path, 'rb') as f:
             files = {'file': (os.path.basename(file_path), f, 'application/pdf')}
-            response = requests.post(f"{self.api_base}/upload", files=files)
+            response = requests.post(f"{self.api_base}/upload", files=files, params={'mode': mode})
+        
+        response.raise_for_status()
+        return response.json()
+    
+    def bulk_upload(self, file_paths: List[str], mode: str = "append") -> Dict:
+        """
+        Upload many PDF files, or a single zip/tar archive of PDFs, as one job.
+        
+        Args:
+            file_paths: Paths to PDF files, or a single archive path
+            mode: 'append' or 'replace' (see upload_pdf)
+            
+        Returns:
+            Dict with the created ingestion job
+        """
+        archive_extensions = ('.zip', '.tar', '.tar.gz', '.tgz')
+        is_archive = len(file_paths) == 1 and file_paths[0].lower().endswith(archive_extensions)
         
+        for file_path in file_paths:
+            if not os.path.exists(file_path):
+                raise FileNotFoundError(f"File not found: {file_path}")
+            if not is_archive and not file_path.lower().endswith('.pdf'):
+                raise ValueError("Only PDF files or a single zip/tar archive are supported")
+        
+        handles = [open(file_path, 'rb') for file_path in file_paths]
+        try:
+            content_type = 'application/octet-stream' if is_archive else 'application/pdf'
+            files = [
+                ('files', (os.path.basename(path), handle, content_type))
+                for path, handle in zip(file_paths, handles)
+            ]
+            response = requests.post(f"{self.api_base}/upload/bulk", files=files, params={'mode': mode})
+        finally:
+            for handle in handles:
+                handle.close()
+        
+        response.raise_for_status()
+        return response.json()
+    
+    def get_job(self, job_id: str) -> Dict:
+        """
+        Get the status of an ingestion job.
+        
+        Args:
+            job_id: ID returned by upload_pdf() or bulk_upload()
+            
+        Returns:
+            Dict with job stage, progress, timings and per-document results
+        """
+        response = requests.get(f"{self.api_base}/jobs/{job_id}")
         response.raise_for_status()
         return response.json()
     
+    def wait_for_job(self, job_id: str, poll_interval: float = 1.0, timeout: Optional[float] = None) -> Dict:
+        """
+        Poll an ingestion job until it completes or fails.
+        
+        Args:
+            job_id: ID returned by upload_pdf() or bulk_upload()
+            poll_interval: Seconds between status checks
+            timeout: Maximum seconds to wait (None waits forever)
+            
+        Returns:
+            Dict with the final job status
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        
+        while True:
+            job = self.get_job(job_id)
+            if job['status'] in ('completed', 'failed'):
+                return job
+            
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Job {job_id} did not finish within {timeout} seconds")
+            
+            time.sleep(poll_interval)
+    
     def search(self, query: str, top_k: int = 10) -> Dict:
         """
         Search for documents matching the query.
@@ -71,14 +157,74 @@ class DocumentSearchClient:
         response.raise_for_status()
         return response.json()
     
-    def list_documents(self) -> Dict:
+    def batch_search(self, queries: List[Dict]) -> Dict:
+        """
+        Search for many queries in one request.
+        
+        Args:
+            queries: List of dicts with 'query' and optional 'top_k' and
+                'filters' (e.g. {'filename': ['a.pdf', 'b.pdf']})
+            
+        Returns:
+            Dict with one search response per query, in order
+        """
+        response = requests.post(f"{self.api_base}/search/batch", json={'queries': queries})
+        response.raise_for_status()
+        return response.json()
+    
+    def stream_batch_search(self, queries: List[Dict]) -> Iterator[Dict]:
+        """
+        Search for many queries, yielding each search response as it arrives.
+        
+        Args:
+            queries: Same as batch_search
+            
+        Yields:
+            One search response per query, in order
+        """
+        with requests.post(
+            f"{self.api_base}/search/batch",
+            params={'stream': 'true'},
+            json={'queries': queries},
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    item = json.loads(line)
+                    if 'error' in item:
+                        raise RuntimeError(item['error'])
+                    yield item
+    
+    def list_documents(self, offset: int = 0, limit: int = 100) -> Dict:
+        """
+        List uploaded documents, one page at a time.
+        
+        Args:
+            offset: Number of documents to skip
+            limit: Maximum number of documents to return
+            
+        Returns:
+            Dict with total document count and a page of filenames
+        """
+        response = requests.get(
+            f"{self.api_base}/documents",
+            params={"offset": offset, "limit": limit}
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def get_document(self, filename: str) -> Dict:
         """
-        List all uploaded documents.
+        Get catalog information about a document.
         
+        Args:
+            filename: Name of the file
+            
         Returns:
-            Dict with document list
+            Dict with chunk count, stored size and upload time
         """
-        response = requests.get(f"{self.api_base}/documents")
+        response = requests.get(f"{self.api_base}/documents/{filename}")
         response.raise_for_status()
         return response.json()
     
@@ -97,6 +243,105 @@ class DocumentSearchClient:
         return response.json()
 
 
+class AsyncDocumentSearchClient:
+    """
+    Asyncio client for the Document Search API.
+    
+    Requests share one pooled HTTP connection pool, so many concurrent calls
+    reuse a bounded set of keep-alive connections. Requires `httpx`.
+    Use as an async context manager, or call close() when done.
+    """
+    
+    def __init__(self, base_url: str = "http://localhost:8000", max_connections: int = 100, timeout: float = 60.0):
+        """
+        Initialize the client.
+        
+        Args:
+            base_url: Base URL of the API server
+            max_connections: Size of the connection pool
+            timeout: Per-request timeout in seconds
+        """
+        if httpx is None:
+            raise ImportError("AsyncDocumentSearchClient requires httpx (pip install httpx)")
+        
+        self.base_url = base_url.rstrip('/')
+        self.api_base = f"{self.base_url}/api"
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout
+        )
+    
+    async def __aenter__(self) -> "AsyncDocumentSearchClient":
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    
+    async def close(self):
+        """Close the connection pool."""
+        await self.client.aclose()
+    
+    async def _request(self, method: str, path: str, **kwargs) -> Dict:
+        response = await self.client.request(method, f"{self.api_base}{path}", **kwargs)
+        response.raise_for_status()
+        return response.json()
+    
+    async def health_check(self) -> Dict:
+        """Check the health status of the API."""
+        return await self._request("GET", "/health")
+    
+    async def live(self) -> Dict:
+        """Liveness probe; answers without touching the model or the database."""
+        return await self._request("GET", "/live")
+    
+    async def upload_content(self, content: bytes, filename: str, mode: str = "append") -> Dict:
+        """Upload PDF bytes for processing. Returns the queued ingestion job."""
+        return await self._request(
+            "POST",
+            "/upload",
+            params={'mode': mode},
+            files={'file': (filename, content, 'application/pdf')}
+        )
+    
+    async def upload_pdf(self, file_path: str, mode: str = "append") -> Dict:
+        """Upload a PDF file for processing. Returns the queued ingestion job."""
+        with open(file_path, 'rb') as f:
+            content = f.read()
+        return await self.upload_content(content, os.path.basename(file_path), mode)
+    
+    async def get_job(self, job_id: str) -> Dict:
+        """Get the status of an ingestion job."""
+        return await self._request("GET", f"/jobs/{job_id}")
+    
+    async def wait_for_job(self, job_id: str, poll_interval: float = 1.0, timeout: Optional[float] = None) -> Dict:
+        """Poll an ingestion job until it completes or fails."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        
+        while True:
+            job = await self.get_job(job_id)
+            if job['status'] in ('completed', 'failed'):
+                return job
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Job {job_id} did not finish within {timeout} seconds")
+            await asyncio.sleep(poll_interval)
+    
+    async def search(self, query: str, top_k: int = 10) -> Dict:
+        """Search for documents matching the query."""
+        return await self._request("GET", "/search", params={'query': query, 'top_k': min(top_k, 100)})
+    
+    async def batch_search(self, queries: List[Dict]) -> Dict:
+        """Search for many queries in one request (see DocumentSearchClient.batch_search)."""
+        return await self._request("POST", "/search/batch", json={'queries': queries})
+    
+    async def list_documents(self, offset: int = 0, limit: int = 100) -> Dict:
+        """List uploaded documents, one page at a time."""
+        return await self._request("GET", "/documents", params={"offset": offset, "limit": limit})
+    
+    async def delete_document(self, filename: str) -> Dict:
+        """Delete a document and all its chunks."""
+        return await self._request("DELETE", f"/documents/{filename}")
+
+
 def example_usage():
     """Example usage of the Document Search Client."""
     
@@ -138,10 +383,15 @@ def example_usage():
     
     if pdf_path:
         try:
-            result = client.upload_pdf(pdf_path)
-            print(f"✓ Uploaded successfully!")
-            print(f"  File: {result['filename']}")
-            print(f"  Chunks created: {result['chunks_created']}")
+            job = client.upload_pdf(pdf_path)
+            print(f"✓ Uploaded, waiting for job {job['job_id']}...")
+            result = client.wait_for_job(job['job_id'])
+            if result['status'] == 'completed':
+                print(f"✓ Processed successfully!")
+                print(f"  File: {result['filename']}")
+                print(f"  Chunks created: {result['chunks_created']}")
+            else:
+                print(f"✗ Processing failed: {result['error']}")
         except Exception as e:
             print(f"✗ Upload failed: {e}")
     
@@ -1,14 +1,56 @@
-from fastapi import FastAPI
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+import os
+import subprocess
+import sys
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from api import router
+from services import ingestion_service, query_batcher, job_queue, metrics, lifecycle
+from services.backend_client import backend_client
+from services.metrics import start_request_timing, end_request_timing, format_server_timing
 from config import settings
 import uvicorn
 
+# Importing the app and services is kept cheap; the model loads in the lifespan
+lifecycle.record("import", time.perf_counter() - _import_started)
+
+# Paths served while the services are still starting
+STARTUP_PATHS = {"/", "/metrics", "/docs", "/redoc", "/openapi.json", "/api/live", "/api/ready", "/api/metrics"}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start loading the services in the background, so the server listens at once."""
+    print("=" * 60)
+    print("Starting Document Search API")
+    print("=" * 60)
+    print(f"Model Type: {settings.MODEL_TYPE}")
+    print(f"Model Path: {settings.MODEL_PATH}")
+    print(f"ChromaDB Directory: {settings.CHROMA_PERSIST_DIRECTORY}")
+    print("=" * 60)
+    startup = asyncio.create_task(lifecycle.start())
+    
+    yield
+    
+    # Cleanup on shutdown
+    print("Shutting down Document Search API")
+    startup.cancel()
+    await job_queue.stop()
+    await query_batcher.stop()
+    ingestion_service.shutdown()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Document Search API",
     description="API for uploading PDFs, processing them with embeddings, and semantic search",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -20,6 +62,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def require_ready(request: Request, call_next):
+    """Answer 503 until the model is loaded and warm, except for probes and docs."""
+    if not lifecycle.ready and request.url.path not in STARTUP_PATHS:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": f"Service is starting ({lifecycle.stage})"},
+            headers={"Retry-After": "1"}
+        )
+    return await call_next(request)
+
+
+if settings.SERVER_TIMING_ENABLED:
+    @app.middleware("http")
+    async def server_timing(request: Request, call_next):
+        """Report the request's per-stage durations in a Server-Timing header."""
+        token = start_request_timing()
+        try:
+            response = await call_next(request)
+        finally:
+            timings = end_request_timing(token)
+        
+        if timings:
+            response.headers["Server-Timing"] = format_server_timing(timings)
+        return response
+
+
 # Include API routes
 app.include_router(router, prefix="/api", tags=["Document Search"])
 
@@ -35,28 +105,44 @@ async def root():
     }
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize services on startup."""
-    print("=" * 60)
-    print("Starting Document Search API")
-    print("=" * 60)
-    print(f"Model Type: {settings.MODEL_TYPE}")
-    print(f"Model Path: {settings.MODEL_PATH}")
-    print(f"ChromaDB Directory: {settings.CHROMA_PERSIST_DIRECTORY}")
-    print("=" * 60)
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Runtime metrics in the Prometheus text exposition format.
+    Workers of a multi-process server add the backend process's metrics to their own.
+    """
+    text = ""
+    skip = []
+    if settings.REMOTE_BACKEND and lifecycle.ready:
+        text, skip = await backend_client.acall("metrics")
+    return PlainTextResponse(text + metrics.to_prometheus(skip=skip), media_type="text/plain; version=0.0.4")
 
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on shutdown."""
-    print("Shutting down Document Search API")
+def run_workers():
+    """
+    Serve with WORKERS HTTP worker processes sharing one backend process
+    (services/backend.py) that holds the only copy of the model and the vector store.
+    """
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "services.backend"],
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    # Inherited by the workers uvicorn spawns
+    os.environ["REMOTE_BACKEND"] = "true"
+    try:
+        uvicorn.run("main:app", host=settings.HOST, port=settings.PORT, workers=settings.WORKERS)
+    finally:
+        backend.terminate()
+        backend.wait()
 
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host=settings.HOST,
-        port=settings.PORT,
-        reload=False  # Disabled reload for Python 3.13 compatibility
-    )
+    if settings.WORKERS > 1:
+        run_workers()
+    else:
+        uvicorn.run(
+            "main:app",
+            host=settings.HOST,
+            port=settings.PORT,
+            reload=False  # Disabled reload for Python 3.13 compatibility
+        )
@@ -1,13 +1,36 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Literal, Union
 
 
-class UploadResponse(BaseModel):
-    """Response model for file upload."""
-    message: str
+class JobDocumentResult(BaseModel):
+    """Outcome of one document within an ingestion job."""
     filename: str
+    status: str  # completed, failed
+    chunks_created: int  # Chunks embedded and added
+    chunks_unchanged: int = 0  # Chunks kept as-is when replacing a document
+    chunks_deleted: int = 0  # Stale chunks removed when replacing a document
+    error: Optional[str] = None
+
+
+class JobResponse(BaseModel):
+    """Status of an ingestion job."""
+    job_id: str
+    filename: str  # Uploaded filename, archive name or "N files" for bulk uploads
+    mode: Literal["append", "replace"] = "append"
+    file_count: int
+    file_size: int
+    status: str  # queued, running, completed, failed
+    stage: str  # queued, extracting, embedding, storing, completed, failed
+    chunks_total: int
+    chunks_embedded: int
     chunks_created: int
-    document_ids: List[str]
+    error: Optional[str] = None
+    timings: Dict[str, float]  # Seconds spent in each stage
+    documents: List[JobDocumentResult] = []  # Per-document results, in completion order
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
 
 
 class SearchResult(BaseModel):
@@ -19,6 +42,8 @@ class SearchResult(BaseModel):
     header: Optional[str] = None  # Section header if available
     header_level: Optional[int] = None  # Header level (1-3)
     chunk_type: Optional[str] = None  # Type if no header (e.g., 'paragraph_group')
+    page_start: Optional[int] = None  # First and last page of the chunk (1-based)
+    page_end: Optional[int] = None
 
 
 class SearchResponse(BaseModel):
@@ -28,6 +53,72 @@ class SearchResponse(BaseModel):
     total_results: int
 
 
+class SearchFilters(BaseModel):
+    """Metadata filters applied to a search. All given filters must match."""
+    filename: Optional[Union[str, List[str]]] = None  # One filename or any of several
+    header_level: Optional[Union[int, List[int]]] = None  # Header level(s) of the chunk's section
+    chunk_type: Optional[Union[str, List[str]]] = None  # Type(s) of chunks without a header
+    uploaded_after: Optional[datetime] = None  # Chunk uploaded at or after this time
+    uploaded_before: Optional[datetime] = None  # Chunk uploaded before this time
+
+
+class BatchSearchQuery(BaseModel):
+    """One query of a batch search."""
+    query: str = Field(..., min_length=1)
+    top_k: int = Field(10, ge=1, le=100)
+    filters: Optional[SearchFilters] = None
+    mode: Optional[Literal["hnsw", "quantized"]] = None  # Default: SEARCH_MODE
+    oversampling: Optional[float] = Field(None, ge=1, le=100)  # Quantized mode candidates per result
+    ef: Optional[int] = Field(None, ge=1, le=1000)  # HNSW search breadth override
+
+
+class BatchSearchRequest(BaseModel):
+    """Request model for batch search."""
+    queries: List[BatchSearchQuery] = Field(..., min_length=1)
+
+
+class BatchSearchResponse(BaseModel):
+    """Response model for batch search. Results are in the order of the queries."""
+    responses: List[SearchResponse]
+    total_queries: int
+
+
+class DocumentInfo(BaseModel):
+    """Catalog entry of an indexed document."""
+    filename: str
+    chunk_count: int
+    byte_size: int  # UTF-8 size of the stored chunk texts
+    uploaded_at: float
+    updated_at: float
+
+
+class DocumentListResponse(BaseModel):
+    """Response model for a page of documents."""
+    total_documents: int
+    offset: int
+    limit: int
+    documents: List[str]
+
+
+class CollectionConfig(BaseModel):
+    """Distance space and HNSW parameters used to create a collection."""
+    space: Literal["l2", "cosine", "ip"] = "cosine"
+    hnsw_m: int = Field(16, ge=2, le=128)
+    hnsw_construction_ef: int = Field(100, ge=1, le=2000)
+    hnsw_search_ef: int = Field(100, ge=1, le=2000)
+
+
+class CollectionInfo(BaseModel):
+    """Configuration of the document collection."""
+    name: str
+    vector_store: str
+    space: str
+    hnsw_m: Optional[int] = None  # None for stores without an HNSW index
+    hnsw_construction_ef: Optional[int] = None
+    hnsw_search_ef: Optional[int] = None
+    total_chunks: int
+
+
 class HealthResponse(BaseModel):
     """Response model for health check."""
     status: str
@@ -35,7 +126,15 @@ class HealthResponse(BaseModel):
     model_path: str
     total_chunks: int
     total_documents: int
-    available_files: List[str]
+    available_files: List[str]  # First files by name; use /api/documents to page through all
+
+
+class ReadinessResponse(BaseModel):
+    """Response model for the readiness probe."""
+    ready: bool
+    stage: str  # starting, vector_store, model_load, warmup, ready, failed
+    timings: Dict[str, float]  # Seconds spent in each completed startup stage
+    error: Optional[str] = None  # Why startup failed
 
 
 class ErrorResponse(BaseModel):
@@ -0,0 +1 @@
+"""One-off maintenance commands."""
@@ -0,0 +1,139 @@
+"""
+Export the embedding model to ONNX and quantize it to int8.
+
+Writes MODEL_PATH/onnx/model.onnx (fp32) and MODEL_PATH/onnx/model_qint8.onnx
+(dynamic int8 quantization), the files loaded by EMBEDDING_BACKEND=onnx and
+EMBEDDING_BACKEND=onnx-int8. Afterwards every exported variant is compared
+against the PyTorch model: the command fails if the cosine similarity between
+torch and ONNX embeddings of any sample text drops below --min-cosine.
+
+Usage:
+    python -m scripts.export_onnx [--model-path models/my-model] [--quantization-config avx2]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import numpy as np  # noqa: E402
+from sentence_transformers import SentenceTransformer  # noqa: E402
+from config import settings, ONNX_MODEL_FILES  # noqa: E402
+
+SAMPLE_TEXTS = [
+    "What are the termination conditions of the contract?",
+    "1. Introduction",
+    "The system uses a modular architecture with multiple components.",
+    "Payment is due within thirty days of the invoice date unless agreed otherwise in writing.",
+    "CONCLUSION",
+]
+
+
+def export_fp32(model_path: str):
+    """Export the model to MODEL_PATH/onnx/model.onnx."""
+    model = SentenceTransformer(model_path, backend="onnx", model_kwargs={"export": True})
+    with tempfile.TemporaryDirectory() as save_dir:
+        model.transformers_model.save_pretrained(save_dir)
+        destination = os.path.join(model_path, ONNX_MODEL_FILES["onnx"])
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        shutil.move(os.path.join(save_dir, "model.onnx"), destination)
+    print(f"Exported fp32 ONNX model to {destination}")
+
+
+def export_int8(model_path: str, quantization_config: str):
+    """Quantize the fp32 ONNX model to MODEL_PATH/onnx/model_qint8.onnx."""
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    model = SentenceTransformer(
+        model_path,
+        backend="onnx",
+        model_kwargs={"file_name": ONNX_MODEL_FILES["onnx"]}
+    )
+    export_dynamic_quantized_onnx_model(model, quantization_config, model_path, file_suffix="qint8")
+    print(f"Exported int8 ONNX model ({quantization_config}) to {os.path.join(model_path, ONNX_MODEL_FILES['onnx-int8'])}")
+
+
+def _encode(model: SentenceTransformer, texts: List[str], repeats: int) -> Tuple[np.ndarray, float]:
+    embeddings = model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        model.encode(texts, convert_to_numpy=True)
+    return embeddings, (time.perf_counter() - started) / max(1, repeats)
+
+
+def parity_check(model_path: str, backends: List[str], texts: List[str], repeats: int) -> Dict[str, Dict[str, float]]:
+    """Compare each ONNX backend's embeddings (and speed) against the torch model."""
+    reference, torch_seconds = _encode(SentenceTransformer(model_path, device="cpu"), texts, repeats)
+    report = {}
+
+    for backend in backends:
+        model = SentenceTransformer(
+            model_path,
+            backend="onnx",
+            model_kwargs={"file_name": ONNX_MODEL_FILES[backend], "provider": "CPUExecutionProvider"}
+        )
+        embeddings, seconds = _encode(model, texts, repeats)
+        cosine = np.sum(reference * embeddings, axis=1)
+        report[backend] = {
+            "min_cosine": float(cosine.min()),
+            "mean_cosine": float(cosine.mean()),
+            "max_abs_diff": float(np.abs(reference - embeddings).max()),
+            "speedup": torch_seconds / seconds if seconds else 0.0
+        }
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX (fp32 and int8)")
+    parser.add_argument("--model-path", default=settings.MODEL_PATH, help="Local model directory (default: MODEL_PATH)")
+    parser.add_argument(
+        "--quantization-config",
+        default="avx2",
+        choices=["avx2", "avx512", "avx512_vnni", "arm64"],
+        help="Target instruction set for int8 quantization"
+    )
+    parser.add_argument("--skip-int8", action="store_true", help="Only export the fp32 ONNX model")
+    parser.add_argument("--check-only", action="store_true", help="Skip exporting and only run the parity check")
+    parser.add_argument("--texts-file", help="Sample texts for the parity check, one per line")
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Minimum torch/ONNX cosine similarity per text")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed encode passes for the speed comparison")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.model_path):
+        parser.error(f"{args.model_path} is not a local model directory")
+
+    backends = ["onnx"] if args.skip_int8 else ["onnx", "onnx-int8"]
+    if not args.check_only:
+        export_fp32(args.model_path)
+        if not args.skip_int8:
+            export_int8(args.model_path, args.quantization_config)
+
+    texts = SAMPLE_TEXTS
+    if args.texts_file:
+        with open(args.texts_file, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+
+    print(f"\nParity check against torch on {len(texts)} texts:")
+    report = parity_check(args.model_path, backends, texts, args.repeats)
+    failed = False
+    for backend, result in report.items():
+        ok = result["min_cosine"] >= args.min_cosine
+        failed = failed or not ok
+        print(
+            f"  {backend:<10} min cosine {result['min_cosine']:.5f}  mean {result['mean_cosine']:.5f}  "
+            f"max |diff| {result['max_abs_diff']:.5f}  speedup {result['speedup']:.2f}x  {'OK' if ok else 'FAILED'}"
+        )
+
+    if failed:
+        print(f"\nAt least one backend is below --min-cosine {args.min_cosine}; keep EMBEDDING_BACKEND=torch for it.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Re-project an existing collection to a smaller Matryoshka dimension.
+
+Every stored vector is truncated to its first --dimension components and
+re-normalized, the same projection EMBEDDING_STORED_DIMENSION applies to new
+embeddings, so existing chunks need not be re-embedded. Vectors are copied in
+batches into a temporary collection, which then replaces the original; chunk
+IDs, texts and metadata are unchanged, so the document catalog stays valid.
+The quantized index (QUANTIZED_INDEX) is cleared; the server rebuilds it from
+the re-projected collection when it starts.
+
+Stop the server before running it, then start it with the same
+EMBEDDING_STORED_DIMENSION. Only the chroma VECTOR_STORE is supported.
+
+Usage:
+    python -m scripts.reproject_collection [--dimension 256] [--batch-size 1000]
+"""
+import argparse
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import chromadb  # noqa: E402
+import numpy as np  # noqa: E402
+from chromadb.config import Settings as ChromaSettings  # noqa: E402
+from config import settings  # noqa: E402
+from services.quantized_index import QuantizedIndex  # noqa: E402
+
+
+def project(embeddings: np.ndarray, dimension: int) -> np.ndarray:
+    """Keep the first `dimension` components of each row and re-normalize to unit length."""
+    truncated = embeddings[:, :dimension]
+    norms = np.linalg.norm(truncated, axis=1, keepdims=True)
+    return truncated / np.maximum(norms, 1e-12)
+
+
+def reproject(client, name: str, dimension: int, batch_size: int) -> int:
+    """Replace collection `name` with a copy whose vectors are projected to `dimension`. Returns chunks copied."""
+    source = client.get_collection(name=name)
+    temporary_name = f"{name}_reproject"
+
+    # A previous interrupted run may have left its temporary collection behind
+    if temporary_name in [collection.name for collection in client.list_collections()]:
+        client.delete_collection(name=temporary_name)
+    target = client.create_collection(name=temporary_name, metadata=source.metadata)
+
+    total = source.count()
+    copied = 0
+    while copied < total:
+        batch = source.get(
+            limit=batch_size,
+            offset=copied,
+            include=["embeddings", "documents", "metadatas"]
+        )
+        if not batch['ids']:
+            break
+
+        target.add(
+            ids=batch['ids'],
+            embeddings=project(np.asarray(batch['embeddings'], dtype=np.float32), dimension).tolist(),
+            documents=batch['documents'],
+            metadatas=batch['metadatas']
+        )
+        copied += len(batch['ids'])
+        print(f"  {copied}/{total} chunks")
+
+    client.delete_collection(name=name)
+    target.modify(name=name)
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Truncate stored embeddings to a smaller Matryoshka dimension")
+    parser.add_argument(
+        "--dimension",
+        type=int,
+        default=settings.EMBEDDING_STORED_DIMENSION,
+        help="Target dimension (default: EMBEDDING_STORED_DIMENSION)"
+    )
+    parser.add_argument("--collection", default=settings.COLLECTION_NAME, help="Collection to re-project")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Chunks copied per batch")
+    args = parser.parse_args()
+
+    if settings.VECTOR_STORE != "chroma":
+        parser.error("Only the chroma vector store can be re-projected; re-index documents instead")
+    if args.dimension <= 0:
+        parser.error("--dimension must be positive (or set EMBEDDING_STORED_DIMENSION)")
+
+    client = chromadb.Client(
+        ChromaSettings(
+            persist_directory=settings.CHROMA_PERSIST_DIRECTORY,
+            is_persistent=True
+        )
+    )
+    collection = client.get_collection(name=args.collection)
+    sample = collection.get(limit=1, include=["embeddings"])
+    if not sample['ids']:
+        print(f"Collection '{args.collection}' is empty; nothing to re-project.")
+        return
+
+    current = len(sample['embeddings'][0])
+    if args.dimension == current:
+        print(f"Collection '{args.collection}' already stores {current}-dimensional vectors.")
+        return
+    if args.dimension > current:
+        parser.error(f"Cannot re-project {current}-dimensional vectors to {args.dimension} dimensions; re-index instead")
+
+    print(f"Re-projecting '{args.collection}' from {current} to {args.dimension} dimensions...")
+    copied = reproject(client, args.collection, args.dimension, args.batch_size)
+    if settings.QUANTIZED_INDEX != "none":
+        QuantizedIndex(
+            os.path.join(settings.CHROMA_PERSIST_DIRECTORY, "quantized_index"),
+            settings.QUANTIZED_INDEX
+        ).clear()
+        print("Cleared the quantized index; it is rebuilt when the server starts.")
+    print(f"Done: {copied} chunks, vector storage reduced {current / args.dimension:.1f}x.")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,5 +2,21 @@
 from .embedding_service import embedding_service
 from .document_processor import document_processor
 from .vector_db_service import vector_db_service
+from .ingestion import ingestion_service
+from .query_batcher import query_batcher
+from .query_cache import query_cache
+from .metrics import metrics
+from .job_queue import job_queue
+from .lifecycle import lifecycle
 
-__all__ = ['embedding_service', 'document_processor', 'vector_db_service']
+__all__ = [
+    'embedding_service',
+    'document_processor',
+    'vector_db_service',
+    'ingestion_service',
+    'query_batcher',
+    'query_cache',
+    'metrics',
+    'job_queue',
+    'lifecycle',
+]
@@ -0,0 +1,130 @@
+"""
+Backend process of a multi-process server.
+
+Owns the embedding model, the vector store and the ingestion job queue, and
+serves the HTTP workers (started with REMOTE_BACKEND=true) over a Unix socket
+at BACKEND_SOCKET, so the model weights and the vector store are loaded once
+however many workers there are. Query embeddings from all workers go through
+one QueryBatcher and are embedded in shared micro-batches.
+
+main.py starts it when WORKERS > 1; it can also be run on its own:
+    python -m services.backend
+"""
+import asyncio
+import os
+import pickle
+import signal
+from typing import Any, Dict
+from config import settings
+from .backend_client import encode_message, read_message
+from .ingestion import ingestion_service
+from .job_queue import job_queue
+from .lifecycle import lifecycle
+from .metrics import metrics
+from .query_batcher import query_batcher
+from .vector_db_service import vector_db_service
+
+
+# VectorDBService methods the workers may call; they run on threads as they block
+VECTOR_DB_METHODS = {
+    "get_collection_config",
+    "recreate_collection",
+    "delete_by_filename",
+    "get_all_filenames",
+    "list_documents",
+    "get_document",
+    "count_filenames",
+    "count_documents",
+}
+
+# Open worker connections and the tasks serving them, closed on shutdown
+_connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+
+async def _dispatch(method: str, args: tuple, kwargs: Dict[str, Any]) -> Any:
+    if method == "embed":
+        return await query_batcher.embed(*args)
+    if method == "embed_batch":
+        return await query_batcher.embed_batch(*args)
+    if method == "status":
+        return {"stage": lifecycle.stage, "timings": lifecycle.timings, "error": lifecycle.error}
+    if method == "metrics":
+        return metrics.to_prometheus(), metrics.names()
+    if method == "generation":
+        return vector_db_service.generation
+    if method in ("search", "search_many"):
+        # The distance space lets workers convert distances to similarities themselves, and
+        # the generation read before searching lets them cache the results without another call
+        generation = vector_db_service.generation
+        results = await asyncio.to_thread(getattr(vector_db_service, method), *args, **kwargs)
+        return results, vector_db_service.collection.space, generation
+    if method in VECTOR_DB_METHODS:
+        return await asyncio.to_thread(getattr(vector_db_service, method), *args, **kwargs)
+    raise ValueError(f"Unknown backend method: {method}")
+
+
+async def _handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Answer the calls of one worker connection, one at a time."""
+    _connections[asyncio.current_task()] = writer
+    try:
+        while True:
+            try:
+                method, args, kwargs = await read_message(reader)
+            except asyncio.IncompleteReadError:
+                return
+
+            try:
+                message = encode_message(("ok", await _dispatch(method, args, kwargs)))
+            except Exception as e:
+                try:
+                    message = encode_message(("error", e))
+                except (pickle.PicklingError, TypeError, AttributeError):
+                    message = encode_message(("error", RuntimeError(f"{type(e).__name__}: {e}")))
+
+            writer.write(message)
+            await writer.drain()
+    finally:
+        del _connections[asyncio.current_task()]
+        writer.close()
+
+
+async def serve(path: str):
+    """Listen on the Unix socket, initialize the services and serve until SIGINT or SIGTERM."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+
+    # Listen first so workers can follow the startup through the status call
+    server = await asyncio.start_unix_server(_handle_connection, path=path)
+    os.chmod(path, 0o600)
+    print(f"Backend listening on {path}")
+    try:
+        await lifecycle.start()
+        await stopping.wait()
+    finally:
+        print("Shutting down backend")
+        server.close()
+        # Closing a connection ends its task at the next read, once any call in progress is answered
+        for writer in list(_connections.values()):
+            writer.close()
+        await asyncio.gather(*_connections, return_exceptions=True)
+        await job_queue.stop()
+        await query_batcher.stop()
+        ingestion_service.shutdown()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def main():
+    if settings.REMOTE_BACKEND:
+        raise SystemExit("The backend loads the services itself; unset REMOTE_BACKEND")
+    asyncio.run(serve(settings.BACKEND_SOCKET))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import asyncio
+import pickle
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+from config import settings
+from .vector_store import distance_to_similarity
+
+
+# Messages are pickles prefixed with their length as a 4-byte big-endian integer
+_LENGTH = struct.Struct("!I")
+
+
+def encode_message(message: Any) -> bytes:
+    payload = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    return _LENGTH.pack(len(payload)) + payload
+
+
+async def read_message(reader: asyncio.StreamReader) -> Any:
+    """Read one message from a stream; raises asyncio.IncompleteReadError at EOF."""
+    (size,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    return pickle.loads(await reader.readexactly(size))
+
+
+def _result(response: Tuple[str, Any]) -> Any:
+    status, value = response
+    if status == "error":
+        raise value
+    return value
+
+
+class BackendClient:
+    """
+    Client of the backend process (services/backend.py) over its Unix socket.
+
+    Each call sends (method, args, kwargs) and waits for ("ok", result) or
+    ("error", exception), which is re-raised. Connections serve one call at a
+    time and are pooled; a new connection is opened whenever none is idle.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._streams: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    async def acall(self, method: str, *args, **kwargs) -> Any:
+        if self._streams:
+            reader, writer = self._streams.pop()
+        else:
+            reader, writer = await asyncio.open_unix_connection(self.path)
+
+        try:
+            writer.write(encode_message((method, args, kwargs)))
+            await writer.drain()
+            response = await read_message(reader)
+        except BaseException:
+            writer.close()
+            raise
+
+        self._streams.append((reader, writer))
+        return _result(response)
+
+
+class RemoteVectorDBService:
+    """
+    Stand-in for VectorDBService in HTTP workers of a multi-process server:
+    the methods used by the API are coroutines calling the backend process.
+    Searches return the collection generation they ran against with their
+    results, so a search takes one round trip.
+    """
+
+    def __init__(self, client: BackendClient):
+        self._client = client
+        self._space = settings.VECTOR_SPACE  # Distance space of the last search's collection
+        # The API only checks whether a quantized index exists; the backend has the same settings
+        self.quantized = True if settings.QUANTIZED_INDEX != "none" else None
+
+    async def get_generation(self) -> int:
+        return await self._client.acall("generation")
+
+    async def search(self, query_embedding: List[float], *args, **kwargs) -> Tuple[Dict[str, Any], int]:
+        results, self._space, generation = await self._client.acall("search", query_embedding, *args, **kwargs)
+        return results, generation
+
+    async def search_many(self, query_embeddings: List[List[float]], *args, **kwargs) -> Tuple[Dict[str, Any], int]:
+        results, self._space, generation = await self._client.acall(
+            "search_many", query_embeddings, *args, **kwargs
+        )
+        return results, generation
+
+    def similarity(self, distance: float) -> float:
+        """Similarity score for a distance returned by the last search, without a round trip."""
+        return distance_to_similarity(self._space, distance)
+
+    async def get_collection_config(self) -> Dict[str, Any]:
+        return await self._client.acall("get_collection_config")
+
+    async def recreate_collection(self, config: Dict[str, Any]):
+        await self._client.acall("recreate_collection", config)
+
+    async def delete_by_filename(self, filename: str) -> int:
+        return await self._client.acall("delete_by_filename", filename)
+
+    async def get_all_filenames(self) -> List[str]:
+        return await self._client.acall("get_all_filenames")
+
+    async def list_documents(self, offset: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        return await self._client.acall("list_documents", offset=offset, limit=limit)
+
+    async def get_document(self, filename: str) -> Optional[Dict[str, Any]]:
+        return await self._client.acall("get_document", filename)
+
+    async def count_filenames(self) -> int:
+        return await self._client.acall("count_filenames")
+
+    async def count_documents(self) -> int:
+        return await self._client.acall("count_documents")
+
+
+class RemoteQueryBatcher:
+    """
+    Stand-in for QueryBatcher in HTTP workers of a multi-process server.
+    Each query is sent to the backend as is, so it is batched with the
+    concurrent queries of every worker there.
+    """
+
+    def __init__(self, client: BackendClient):
+        self._client = client
+
+    async def embed(self, text: str) -> List[float]:
+        return await self._client.acall("embed", text)
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return await self._client.acall("embed_batch", texts)
+
+    async def stop(self):
+        pass
+
+
+# Singleton instance
+backend_client = BackendClient(settings.BACKEND_SOCKET)
@@ -0,0 +1,189 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+
+class DocumentCatalog:
+    """
+    Persistent catalog of indexed documents backed by SQLite.
+
+    Tracks filename -> chunk IDs, chunk count, byte size and upload time so
+    document listings and health checks don't have to scan the vector store.
+    It is kept up to date by VectorDBService on every add/delete/clear.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    filename TEXT PRIMARY KEY,
+                    chunk_count INTEGER NOT NULL,
+                    byte_size INTEGER NOT NULL,
+                    uploaded_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunks (
+                    id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    byte_size INTEGER NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_filename ON chunks (filename)")
+        return self._conn
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _refresh_documents(self, conn: sqlite3.Connection, filenames: List[str], now: float):
+        """Recompute the per-document totals for the given filenames from their chunks."""
+        for filename in set(filenames):
+            count, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(byte_size), 0) FROM chunks WHERE filename = ?",
+                (filename,)
+            ).fetchone()
+
+            if count == 0:
+                conn.execute("DELETE FROM documents WHERE filename = ?", (filename,))
+            else:
+                conn.execute(
+                    "INSERT INTO documents (filename, chunk_count, byte_size, uploaded_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(filename) DO UPDATE SET chunk_count = excluded.chunk_count, "
+                    "byte_size = excluded.byte_size, updated_at = excluded.updated_at",
+                    (filename, count, size, now, now)
+                )
+
+    def add_chunks(self, ids: List[str], filenames: List[str], texts: List[str]):
+        """Record newly stored chunks."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunks (id, filename, byte_size) VALUES (?, ?, ?)",
+                [(chunk_id, filename, len(text.encode('utf-8'))) for chunk_id, filename, text in zip(ids, filenames, texts)]
+            )
+            self._refresh_documents(conn, filenames, now)
+
+    def remove_chunks(self, ids: List[str]):
+        """Forget deleted chunks."""
+        if not ids:
+            return
+
+        now = time.time()
+        with self._transaction() as conn:
+            filenames = []
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                filenames.extend(
+                    row[0] for row in conn.execute(
+                        f"SELECT DISTINCT filename FROM chunks WHERE id IN ({placeholders})", batch
+                    )
+                )
+                conn.execute(f"DELETE FROM chunks WHERE id IN ({placeholders})", batch)
+            self._refresh_documents(conn, filenames, now)
+
+    def get_chunk_ids(self, filename: str) -> List[str]:
+        """IDs of all chunks stored for a filename."""
+        with self._lock:
+            return [
+                row[0] for row in
+                self._connect().execute("SELECT id FROM chunks WHERE filename = ?", (filename,))
+            ]
+
+    def get_chunk_ids_for(self, filenames: List[str]) -> List[str]:
+        """IDs of all chunks stored for any of the filenames."""
+        ids = []
+        with self._lock:
+            for start in range(0, len(filenames), 500):
+                batch = filenames[start:start + 500]
+                ids.extend(
+                    row[0] for row in self._connect().execute(
+                        f"SELECT id FROM chunks WHERE filename IN ({','.join('?' * len(batch))})", batch
+                    )
+                )
+        return ids
+
+    def count_chunks_for(self, filenames: List[str]) -> int:
+        """Number of chunks stored for any of the filenames."""
+        with self._lock:
+            total = 0
+            for start in range(0, len(filenames), 500):
+                batch = filenames[start:start + 500]
+                total += self._connect().execute(
+                    f"SELECT COALESCE(SUM(chunk_count), 0) FROM documents WHERE filename IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchone()[0]
+        return total
+
+    def get_document(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Catalog entry for a filename, or None if it is not indexed."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT * FROM documents WHERE filename = ?", (filename,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def list_documents(self, offset: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """Catalog entries ordered by filename. A negative limit returns all entries."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT * FROM documents ORDER BY filename LIMIT ? OFFSET ?", (limit, offset)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count_documents(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def count_chunks(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def clear(self):
+        """Forget every document."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM chunks")
+            conn.execute("DELETE FROM documents")
+
+    def rebuild(self, collection, page_size: int = 1000):
+        """Rebuild the catalog from the vector store collection, one page at a time."""
+        self.clear()
+        offset = 0
+        while True:
+            page = collection.get(include=["metadatas", "documents"], limit=page_size, offset=offset)
+            if not page['ids']:
+                break
+
+            self.add_chunks(
+                page['ids'],
+                [(metadata or {}).get('filename', '') for metadata in page['metadatas']],
+                [text or '' for text in page['documents']]
+            )
+            offset += len(page['ids'])
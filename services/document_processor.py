@@ -1,10 +1,81 @@
-from typing import List, Tuple, Dict
+from typing import Iterable, Iterator, List, Tuple, Dict, Optional, Union
 from pypdf import PdfReader
 import io
+import os
 import re
+import time
 from config import settings
 
 
+# Common header patterns: (pattern, default level)
+HEADER_PATTERNS = [
+    # Numbered headers: 1. Title, 1.1 Subtitle, etc.
+    (r'^(\d+\.(?:\d+\.)*)\s+(.+)$', 1),
+    # Roman numerals: I. Title, II. Title
+    (r'^([IVXLCDM]+)\.\s+(.+)$', 1),
+    # Lettered headers: A. Title, B. Title
+    (r'^([A-Z])\.\s+(.+)$', 2),
+    # ALL CAPS headers (minimum 3 words or 15 chars)
+    (r'^([A-Z][A-Z\s]{14,})$', 1),
+    # Title Case headers (3+ consecutive capitalized words)
+    (r'^((?:[A-Z][a-z]+\s+){2,}[A-Z][a-z]+)$', 2),
+    # Headers ending with colon
+    (r'^(.{3,50}):$', 2),
+    # Chapter/Section keywords
+    (r'^(Chapter|Section|Part|Article|Appendix)\s+(\d+|[IVXLCDM]+|[A-Z])[\s:-]*(.*)$', 1),
+]
+
+# All header patterns as one alternation, tried in order in a single match; the
+# named group of the matching alternative (h0, h1, ...) gives its default level
+_HEADER_REGEX = re.compile("|".join(f"(?P<h{i}>{pattern})" for i, (pattern, _) in enumerate(HEADER_PATTERNS)))
+_HEADER_LEVELS = {f"h{i}": level for i, (_, level) in enumerate(HEADER_PATTERNS)}
+
+
+def _may_be_header(line_stripped: str) -> bool:
+    """
+    Cheap prefilter: every header pattern starts with a digit or an uppercase
+    ASCII letter, or ends with a colon. Most body lines fail it and skip the regex.
+    """
+    first = line_stripped[0]
+    return first.isdigit() or 'A' <= first <= 'Z' or line_stripped[-1] == ':'
+
+
+class _ParagraphGroups:
+    """
+    Greedily packs paragraphs into chunks of up to `limit` characters.
+    Paragraphs are added one at a time; a chunk is returned as soon as it is full.
+    """
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.paragraphs: List[str] = []
+        self.length = 0  # Length of the chunk text with its trailing separator
+        self.page_start = 0
+        self.page_end = 0
+    
+    def add(self, paragraph: str, page_start: int, page_end: int) -> Optional[Tuple[str, int, int]]:
+        """Add a paragraph. Returns the previous chunk (text, page_start, page_end) if it is full."""
+        full = None
+        if self.paragraphs and self.length + len(paragraph) > self.limit:
+            full = self.flush()
+        
+        if not self.paragraphs:
+            self.page_start = page_start
+        self.paragraphs.append(paragraph)
+        self.length += len(paragraph) + 2
+        self.page_end = page_end
+        return full
+    
+    def flush(self) -> Optional[Tuple[str, int, int]]:
+        """Return the pending chunk, if any, and start a new one."""
+        if not self.paragraphs:
+            return None
+        
+        chunk = ("\n\n".join(self.paragraphs), self.page_start, self.page_end)
+        self.paragraphs, self.length = [], 0
+        return chunk
+
+
 class DocumentProcessor:
     """Service for processing PDF documents."""
     
@@ -12,173 +83,310 @@ class DocumentProcessor:
         self.chunk_size = settings.CHUNK_SIZE
         self.chunk_overlap = settings.CHUNK_OVERLAP
         self.max_chunk_size = settings.CHUNK_SIZE * 3  # Maximum size before force-splitting
+        self.preamble_max_pages = settings.CHUNK_PREAMBLE_MAX_PAGES
+        self.tokenizer = None  # Model tokenizer for token-sized chunks, loaded on first use
     
-    def extract_text_from_pdf(self, pdf_content: bytes) -> str:
-        """Extract text from PDF file."""
+    @staticmethod
+    def _open_pdf(source: Union[str, bytes]) -> PdfReader:
+        return PdfReader(source if isinstance(source, str) else io.BytesIO(source))
+    
+    def count_pages(self, source: Union[str, bytes]) -> int:
+        """Number of pages of a PDF (file path or bytes)."""
         try:
-            pdf_file = io.BytesIO(pdf_content)
-            pdf_reader = PdfReader(pdf_file)
-            
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+            return len(self._open_pdf(source).pages)
+        except Exception as e:
+            raise Exception(f"Error extracting text from PDF: {str(e)}")
+    
+    def extract_pages(
+        self,
+        source: Union[str, bytes],
+        start: int = 0,
+        stop: Optional[int] = None
+    ) -> Iterator[Tuple[int, str]]:
+        """
+        Extract text from a PDF (file path or bytes) one page at a time.
+        Yields (page_number, text) with 1-based page numbers, for the pages
+        from index `start` up to `stop` (default: all pages).
+        """
+        try:
+            pdf_reader = self._open_pdf(source)
+            stop = len(pdf_reader.pages) if stop is None else min(stop, len(pdf_reader.pages))
             
-            return text.strip()
+            for index in range(start, stop):
+                yield index + 1, pdf_reader.pages[index].extract_text()
         
         except Exception as e:
             raise Exception(f"Error extracting text from PDF: {str(e)}")
     
+    def extract_text_from_pdf(self, pdf_content: bytes) -> str:
+        """Extract text from PDF file."""
+        return "".join(text + "\n" for _, text in self.extract_pages(pdf_content)).strip()
+    
+    def _header_level(self, line: str, line_stripped: Optional[str] = None) -> Optional[int]:
+        """Header level (1-3) of a line, or None if it is not a header."""
+        if line_stripped is None:
+            line_stripped = line.strip()
+        
+        # Skip empty lines or very short lines
+        if len(line_stripped) < 3 or not _may_be_header(line_stripped):
+            return None
+        
+        match = _HEADER_REGEX.match(line_stripped)
+        if match is None:
+            return None
+        
+        # Determine header level based on indentation and pattern
+        indent_level = len(line) - len(line.lstrip())
+        level = _HEADER_LEVELS[match.lastgroup] + (indent_level // 4)  # Adjust level by indentation
+        return min(level, 3)  # Cap at level 3
+    
     def _detect_headers(self, text: str) -> List[Dict[str, any]]:
         """
         Detect headers and subheaders in text using common patterns.
         Returns list of dicts with header info: {position, level, text}
         """
         headers = []
-        lines = text.split('\n')
         current_pos = 0
         
-        # Common header patterns
-        patterns = [
-            # Numbered headers: 1. Title, 1.1 Subtitle, etc.
-            (r'^(\d+\.(?:\d+\.)*)\s+(.+)$', 1),
-            # Roman numerals: I. Title, II. Title
-            (r'^([IVXLCDM]+)\.\s+(.+)$', 1),
-            # Lettered headers: A. Title, B. Title
-            (r'^([A-Z])\.\s+(.+)$', 2),
-            # ALL CAPS headers (minimum 3 words or 15 chars)
-            (r'^([A-Z][A-Z\s]{14,})$', 1),
-            # Title Case headers (3+ consecutive capitalized words)
-            (r'^((?:[A-Z][a-z]+\s+){2,}[A-Z][a-z]+)$', 2),
-            # Headers ending with colon
-            (r'^(.{3,50}):$', 2),
-            # Chapter/Section keywords
-            (r'^(Chapter|Section|Part|Article|Appendix)\s+(\d+|[IVXLCDM]+|[A-Z])[\s:-]*(.*)$', 1),
-        ]
-        
-        for i, line in enumerate(lines):
+        for i, line in enumerate(text.split('\n')):
             line_stripped = line.strip()
-            
-            # Skip empty lines or very short lines
-            if len(line_stripped) < 3:
-                current_pos += len(line) + 1
-                continue
-            
-            # Check each pattern
-            for pattern, default_level in patterns:
-                match = re.match(pattern, line_stripped)
-                if match:
-                    # Determine header level based on indentation and pattern
-                    indent_level = len(line) - len(line.lstrip())
-                    level = default_level + (indent_level // 4)  # Adjust level by indentation
-                    
-                    headers.append({
-                        'position': current_pos,
-                        'level': min(level, 3),  # Cap at level 3
-                        'text': line_stripped,
-                        'line_num': i
-                    })
-                    break
+            level = self._header_level(line, line_stripped)
+            if level is not None:
+                headers.append({
+                    'position': current_pos,
+                    'level': level,
+                    'text': line_stripped,
+                    'line_num': i
+                })
             
             current_pos += len(line) + 1
         
         return headers
     
-    def _split_by_headers(self, text: str) -> List[Tuple[str, Dict[str, any]]]:
+    def _iter_sections(self, pages: Iterable[Tuple[int, str]]) -> Iterator[Tuple[str, Dict[str, any]]]:
         """
-        Split text by detected headers.
-        Returns list of tuples: (chunk_text, metadata)
+        Split page texts into chunks by headers, one line at a time.
+        Yields tuples (chunk_text, metadata) as soon as each chunk is complete,
+        so only the current section is held in memory.
+        
+        Each header starts a section that runs to the next header. Sections
+        longer than max_chunk_size are split into partial chunks at paragraph
+        boundaries. Text before the first header is dropped if the header
+        appears within preamble_max_pages pages; otherwise the document is
+        treated as having no headers there, and its text up to the first one is
+        grouped into paragraph chunks of about chunk_size. Only those first
+        pages are held back, so header-less documents are streamed too.
+        Metadata includes the first and last page of each chunk.
         """
-        headers = self._detect_headers(text)
+        header: Optional[Dict[str, any]] = None  # Header of the current section
+        lines: List[Tuple[str, int]] = []  # Lines of the current section and their pages
+        length = 0  # Length of the section's lines joined by newlines
+        content_start = content_end = None  # Offsets of the section's first and last non-space characters
+        splitting = False  # Whether the current section is split into partial chunks
+        partials = 0  # Partial chunks emitted for the current section
+        paragraph: List[Tuple[str, int]] = []
+        groups = _ParagraphGroups(self.chunk_size)
+        preamble: List[Tuple[str, Dict[str, any]]] = []  # Chunks of the text before the first header
+        streaming_preamble = False  # Whether the text before the first header is kept and streamed
+        first_page = 0
+        started = False
         
-        if not headers:
-            # No headers detected, fall back to paragraph-based chunking
-            return self._split_by_paragraphs(text)
+        def group_metadata() -> Dict[str, any]:
+            if header is None:
+                return {'type': 'paragraph_group'}
+            return {'header': header['text'], 'header_level': header['level'], 'is_partial': True}
         
-        chunks = []
+        def end_paragraph() -> Iterator[Tuple[str, Dict[str, any]]]:
+            nonlocal partials
+            if paragraph:
+                text = "\n".join(line for line, _ in paragraph).strip()
+                full = groups.add(text, paragraph[0][1], paragraph[-1][1])
+                paragraph.clear()
+                if full is not None:
+                    partials += 1
+                    yield full[0], {**group_metadata(), 'page_start': full[1], 'page_end': full[2]}
         
-        # Split text at each header
-        for i, header in enumerate(headers):
-            start_pos = header['position']
-            
-            # Find end position (next header or end of text)
-            if i < len(headers) - 1:
-                end_pos = headers[i + 1]['position']
-            else:
-                end_pos = len(text)
-            
-            section_text = text[start_pos:end_pos].strip()
-            
-            # If section is too large, split it further
-            if len(section_text) > self.max_chunk_size:
-                sub_chunks = self._split_large_section(section_text, header)
-                chunks.extend(sub_chunks)
+        def add_paragraph_line(line: str, page_number: int, blank: bool) -> Iterator[Tuple[str, Dict[str, any]]]:
+            if not blank:
+                paragraph.append((line, page_number))
             else:
-                chunks.append((section_text, {
-                    'header': header['text'],
-                    'header_level': header['level']
-                }))
-        
-        return chunks
-    
-    def _split_large_section(self, text: str, header: Dict) -> List[Tuple[str, Dict]]:
-        """Split a large section into smaller chunks while preserving context."""
-        chunks = []
-        paragraphs = re.split(r'\n\s*\n', text)
+                yield from end_paragraph()
         
-        current_chunk = ""
-        header_text = header['text']
-        
-        for para in paragraphs:
-            para = para.strip()
-            if not para:
-                continue
-            
-            # If adding this paragraph exceeds max size, save current chunk
-            if current_chunk and len(current_chunk) + len(para) > self.max_chunk_size:
-                chunks.append((current_chunk.strip(), {
-                    'header': header_text,
+        def end_section() -> Iterator[Tuple[str, Dict[str, any]]]:
+            if header is None or splitting:
+                yield from end_paragraph()
+                last = groups.flush()
+                if last is not None:
+                    metadata = group_metadata()
+                    if header is not None:
+                        metadata['is_partial'] = partials > 0
+                    yield last[0], {**metadata, 'page_start': last[1], 'page_end': last[2]}
+            elif lines:
+                pages = [page_number for line, page_number in lines if line.strip()]
+                yield "\n".join(line for line, _ in lines).strip(), {
+                    'header': header['text'],
                     'header_level': header['level'],
-                    'is_partial': True
-                }))
-                current_chunk = para + "\n\n"
-            else:
-                current_chunk += para + "\n\n"
+                    'page_start': pages[0],
+                    'page_end': pages[-1]
+                }
         
-        # Add remaining text
-        if current_chunk.strip():
-            chunks.append((current_chunk.strip(), {
-                'header': header_text,
-                'header_level': header['level'],
-                'is_partial': len(chunks) > 0
-            }))
+        for page_number, page_text in pages:
+            for line in page_text.split('\n'):
+                if not started:
+                    # Leading whitespace of the document is ignored
+                    line = line.lstrip()
+                    if not line:
+                        continue
+                    started = True
+                    first_page = page_number
+                
+                line_stripped = line.strip()
+                level = self._header_level(line, line_stripped)
+                if level is not None:
+                    if header is None and not streaming_preamble:
+                        preamble.clear()
+                        paragraph.clear()
+                    else:
+                        yield from end_section()
+                    header = {'text': line_stripped, 'level': level}
+                    lines, length, content_start, content_end = [], 0, None, None
+                    splitting, partials = False, 0
+                    groups = _ParagraphGroups(self.max_chunk_size)
+                
+                if header is None:
+                    if not streaming_preamble and page_number >= first_page + self.preamble_max_pages:
+                        # No header in the first pages: keep the text, without holding it until one appears
+                        yield from preamble
+                        preamble.clear()
+                        streaming_preamble = True
+                    if streaming_preamble:
+                        yield from add_paragraph_line(line, page_number, not line_stripped)
+                    else:
+                        preamble.extend(add_paragraph_line(line, page_number, not line_stripped))
+                    continue
+                
+                if splitting:
+                    yield from add_paragraph_line(line, page_number, not line_stripped)
+                    continue
+                
+                # Buffer the section until it is known to exceed max_chunk_size
+                offset = length + 1 if lines else 0
+                lines.append((line, page_number))
+                length = offset + len(line)
+                if line_stripped:
+                    if content_start is None:
+                        content_start = offset + len(line) - len(line.lstrip())
+                    content_end = offset + len(line.rstrip())
+                
+                if content_start is not None and content_end - content_start > self.max_chunk_size:
+                    splitting = True
+                    for buffered_line, buffered_page in lines:
+                        yield from add_paragraph_line(buffered_line, buffered_page, not buffered_line.strip())
+                    lines = []
         
-        return chunks
+        yield from preamble
+        yield from end_section()
+    
+    def _get_tokenizer(self):
+        """The embedding model's tokenizer, loaded from MODEL_PATH unless one was assigned."""
+        if self.tokenizer is None:
+            from transformers import AutoTokenizer
+            
+            path = settings.MODEL_PATH
+            # Models saved by older sentence-transformers keep the tokenizer in a module folder
+            if os.path.isdir(os.path.join(path, "0_Transformer")) and not os.path.exists(os.path.join(path, "tokenizer_config.json")):
+                path = os.path.join(path, "0_Transformer")
+            self.tokenizer = AutoTokenizer.from_pretrained(path, trust_remote_code=settings.MODEL_TYPE == "huggingface")
+        return self.tokenizer
+    
+    def _count_tokens(self, texts: List[str]) -> List[int]:
+        """Number of tokens of each text, without special tokens."""
+        encoded = self._get_tokenizer()(
+            texts,
+            add_special_tokens=False,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            verbose=False
+        )
+        return [len(ids) for ids in encoded['input_ids']]
+    
+    def _token_windows(self, text: str, limit: int) -> Iterator[Tuple[str, int]]:
+        """Split a text into pieces of at most `limit` tokens. Yields (piece, tokens)."""
+        tokenizer = self._get_tokenizer()
+        if getattr(tokenizer, "is_fast", False):
+            # Cut the original text at token offsets
+            offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)['offset_mapping']
+            for start in range(0, len(offsets), limit):
+                window = offsets[start:start + limit]
+                yield text[window[0][0]:window[-1][1]].strip(), len(window)
+        else:
+            tokens = tokenizer.tokenize(text)
+            for start in range(0, len(tokens), limit):
+                window = tokens[start:start + limit]
+                yield tokenizer.convert_tokens_to_string(window).strip(), len(window)
     
-    def _split_by_paragraphs(self, text: str) -> List[Tuple[str, Dict]]:
+    def _pack_tokens(
+        self,
+        sections: Iterable[Tuple[str, Dict[str, any]]],
+        token_limit: int
+    ) -> Iterator[Tuple[str, Dict[str, any]]]:
         """
-        Fallback method: split by paragraphs when no headers detected.
+        Resize chunks from _iter_sections to the model's token budget.
+        
+        Chunks longer than `token_limit` tokens (special tokens included) are
+        split at paragraph boundaries, and paragraphs that are still too long
+        at token boundaries. Consecutive chunks are then merged while they fit,
+        so small sections share one chunk instead of padding out a forward
+        pass each. A merged chunk keeps the header of its first section, is
+        partial if any of its parts is, and spans all of their pages.
+        Token counts of merged text are the sums of the parts' counts.
         """
-        paragraphs = re.split(r'\n\s*\n', text)
-        chunks = []
-        current_chunk = ""
+        limit = max(1, token_limit - self._get_tokenizer().num_special_tokens_to_add())
+        separator_tokens = self._count_tokens(["\n\n"])[0]
+        pending: List[Tuple[str, Dict[str, any]]] = []
+        pending_tokens = 0
         
-        for para in paragraphs:
-            para = para.strip()
-            if not para:
-                continue
-            
-            # If adding this paragraph exceeds target size, save current chunk
-            if current_chunk and len(current_chunk) + len(para) > self.chunk_size:
-                chunks.append((current_chunk.strip(), {'type': 'paragraph_group'}))
-                current_chunk = para + "\n\n"
-            else:
-                current_chunk += para + "\n\n"
+        def merged() -> Tuple[str, Dict[str, any]]:
+            metadata = dict(pending[0][1])
+            metadata['page_end'] = pending[-1][1]['page_end']
+            if 'header' in metadata and len(pending) > 1:
+                metadata['is_partial'] = any(part.get('is_partial', False) for _, part in pending)
+            return "\n\n".join(text for text, _ in pending), metadata
         
-        # Add remaining text
-        if current_chunk.strip():
-            chunks.append((current_chunk.strip(), {'type': 'paragraph_group'}))
+        for text, metadata in sections:
+            tokens = self._count_tokens([text])[0]
+            if tokens <= limit:
+                pieces = [(text, metadata, tokens)]
+            else:
+                pieces = []
+                if 'header' in metadata:
+                    metadata = {**metadata, 'is_partial': True}
+                paragraphs = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
+                for paragraph, paragraph_tokens in zip(paragraphs, self._count_tokens(paragraphs)):
+                    if paragraph_tokens <= limit:
+                        pieces.append((paragraph, metadata, paragraph_tokens))
+                    else:
+                        pieces.extend((piece, metadata, piece_tokens) for piece, piece_tokens in self._token_windows(paragraph, limit))
+            
+            for piece, piece_metadata, piece_tokens in pieces:
+                if pending and pending_tokens + separator_tokens + piece_tokens > limit:
+                    yield merged()
+                    pending, pending_tokens = [], 0
+                
+                if pending:
+                    pending_tokens += separator_tokens
+                pending.append((piece, piece_metadata))
+                pending_tokens += piece_tokens
         
-        return chunks
+        if pending:
+            yield merged()
+    
+    def _split_by_headers(self, text: str) -> List[Tuple[str, Dict[str, any]]]:
+        """
+        Split text by detected headers.
+        Returns list of tuples: (chunk_text, metadata)
+        """
+        return list(self._iter_sections([(1, text)]))
     
     def chunk_text(self, text: str) -> List[Tuple[str, int]]:
         """
@@ -201,36 +409,97 @@ class DocumentProcessor:
         
         return indexed_chunks
     
-    def process_pdf(self, pdf_content: bytes, filename: str) -> List[dict]:
+    def stream_pdf(
+        self,
+        source: Union[str, bytes],
+        filename: str,
+        timings: Optional[Dict[str, float]] = None,
+        token_limit: int = 0
+    ) -> Iterator[dict]:
         """
-        Process PDF: extract text, chunk it by headers/structure, and prepare for embedding.
-        Returns list of chunk dictionaries with metadata.
+        Extract and chunk a PDF (file path or bytes) page by page.
+        Yields chunk dictionaries with metadata as soon as each chunk is complete,
+        so memory use does not grow with the size of the document.
+        
+        If a timings dict is given, the seconds spent in text extraction and
+        header splitting are accumulated in it under 'pdf_extraction' and 'header_split'.
+        With a token_limit, chunks are sized in model tokens (see _pack_tokens)
+        instead of characters.
         """
-        text = self.extract_text_from_pdf(pdf_content)
+        return self.chunk_pages(self.extract_pages(source), filename, timings, token_limit)
+    
+    def chunk_pages(
+        self,
+        pages: Iterable[Tuple[int, str]],
+        filename: str,
+        timings: Optional[Dict[str, float]] = None,
+        token_limit: int = 0
+    ) -> Iterator[dict]:
+        """
+        Chunk a document given as (page_number, text) pairs in page order; see stream_pdf.
+        Time spent producing the pages is counted as 'pdf_extraction'.
+        """
+        timings = timings if timings is not None else {}
+        timings['pdf_extraction'] = timings['header_split'] = 0.0
         
-        # Get chunks with metadata using header-based splitting
-        chunks_with_meta = self._split_by_headers(text)
+        def timed_pages() -> Iterator[Tuple[int, str]]:
+            page_iterator = iter(pages)
+            while True:
+                started = time.perf_counter()
+                page = next(page_iterator, None)
+                timings['pdf_extraction'] += time.perf_counter() - started
+                if page is None:
+                    return
+                yield page
         
-        processed_chunks = []
-        for chunk_index, (chunk_text, metadata) in enumerate(chunks_with_meta):
-            if chunk_text.strip():  # Only include non-empty chunks
-                chunk_data = {
-                    "text": chunk_text,
-                    "chunk_index": chunk_index,
-                    "filename": filename
-                }
-                
-                # Add header information if available
-                if 'header' in metadata:
-                    chunk_data['header'] = metadata['header']
-                    chunk_data['header_level'] = metadata.get('header_level', 0)
-                    chunk_data['is_partial'] = metadata.get('is_partial', False)
-                elif 'type' in metadata:
-                    chunk_data['chunk_type'] = metadata['type']
-                
-                processed_chunks.append(chunk_data)
+        sections = self._iter_sections(timed_pages())
+        if token_limit > 0:
+            sections = self._pack_tokens(sections, token_limit)
+        chunk_index = 0
+        while True:
+            started = time.perf_counter()
+            section = next(sections, None)
+            # Page extraction happens inside the chunker; count it only once
+            timings['header_split'] += time.perf_counter() - started
+            if section is None:
+                break
+            
+            chunk_text, metadata = section
+            chunk_data = {
+                "text": chunk_text,
+                "chunk_index": chunk_index,
+                "filename": filename,
+                "page_start": metadata['page_start'],
+                "page_end": metadata['page_end']
+            }
+            
+            # Add header information if available
+            if 'header' in metadata:
+                chunk_data['header'] = metadata['header']
+                chunk_data['header_level'] = metadata.get('header_level', 0)
+                chunk_data['is_partial'] = metadata.get('is_partial', False)
+            elif 'type' in metadata:
+                chunk_data['chunk_type'] = metadata['type']
+            
+            chunk_index += 1
+            yield chunk_data
         
-        return processed_chunks
+        timings['header_split'] -= timings['pdf_extraction']
+    
+    def process_pdf(
+        self,
+        pdf_content: bytes,
+        filename: str,
+        timings: Optional[Dict[str, float]] = None
+    ) -> List[dict]:
+        """
+        Process PDF: extract text, chunk it by headers/structure, and prepare for embedding.
+        Returns list of chunk dictionaries with metadata.
+        
+        If a timings dict is given, the seconds spent in text extraction and
+        header splitting are stored in it under 'pdf_extraction' and 'header_split'.
+        """
+        return list(self.stream_pdf(pdf_content, filename, timings))
 
 
 # Singleton instance
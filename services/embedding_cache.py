@@ -0,0 +1,137 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from .metrics import metrics
+
+
+class EmbeddingCache:
+    """
+    Persistent on-disk cache of text embeddings backed by SQLite.
+
+    Entries are keyed by a hash of the model identity and the exact text, so a
+    different model (or a retrained custom model) never reuses stale vectors.
+    The least recently used entries are evicted once the cache holds more than
+    EMBEDDING_CACHE_MAX_ENTRIES vectors.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._entries = 0  # Rows in the table, counted once on connect and kept up to date by put_many
+        self._lock = threading.Lock()
+
+        self.hits = metrics.counter("embedding_cache_hits_total", "Chunk embeddings served from the cache")
+        self.misses = metrics.counter("embedding_cache_misses_total", "Chunk embeddings computed by the model")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+            self._entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return self._conn
+
+    @staticmethod
+    def make_key(model_id: str, text: str) -> str:
+        """Cache key for a text embedded by the given model."""
+        return hashlib.sha256(f"{model_id}\0{text}".encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Look up cached vectors, refreshing their LRU position. Missing keys are omitted."""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+
+        with self._lock:
+            conn = self._connect()
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+
+            if found:
+                now = time.time()
+                # One transaction for all hits rather than a commit per autocommitted UPDATE
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, key) for key in found]
+                    )
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+
+        hits = sum(1 for key in keys if key in found)
+        self.hits.inc(hits)
+        self.misses.inc(len(keys) - hits)
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]):
+        """Store vectors and evict the least recently used entries beyond the size limit."""
+        if not vectors:
+            return
+
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            keys = list(vectors)
+            # The connection is in autocommit mode; write all vectors in one explicit transaction
+            conn.execute("BEGIN")
+            try:
+                # Keys already cached are replaced, not added; counted by primary key lookups
+                existing = 0
+                for start in range(0, len(keys), 500):
+                    batch = keys[start:start + 500]
+                    existing += conn.execute(
+                        f"SELECT COUNT(*) FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                        batch
+                    ).fetchone()[0]
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                    [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in vectors.items()]
+                )
+                entries = self._entries + len(keys) - existing
+
+                overflow = entries - self.max_entries
+                if overflow > 0:
+                    conn.execute(
+                        "DELETE FROM embeddings WHERE key IN "
+                        "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                        (overflow,)
+                    )
+                    entries -= overflow
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._entries = entries
+
+    def stats(self) -> Dict[str, float]:
+        """Entry count and hit/miss counters."""
+        with self._lock:
+            self._connect()
+            entries = self._entries
+        return {"entries": entries, "hits": self.hits.value, "misses": self.misses.value}
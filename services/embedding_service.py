@@ -1,69 +1,292 @@
 import os
-from typing import List
-from sentence_transformers import SentenceTransformer
-import torch
-from config import settings
+import threading
+from typing import List, Optional
+import numpy as np
+from config import settings, ONNX_MODEL_FILES
+from .embedding_cache import EmbeddingCache
+from .metrics import metrics
 
 
 class EmbeddingService:
-    """Service for generating embeddings using configurable models."""
+    """
+    Service for generating embeddings using configurable models.
+    
+    The model is not loaded on construction, so importing the service is cheap:
+    call load() (done at server startup) or it is loaded by the first embedding call.
+    """
     
     def __init__(self):
         self.model = None
+        self.model_id: Optional[str] = None
+        self.stored_dimension = 0
         self.model_path = settings.MODEL_PATH
         self.model_type = settings.MODEL_TYPE
-        self._load_model()
+        self.backend = settings.EMBEDDING_BACKEND
+        self.cache: Optional[EmbeddingCache] = None
+        self.texts_encoded = metrics.counter("embedding_texts_encoded_total", "Texts encoded by the model")
+        self.tokens_processed = metrics.counter("embedding_tokens_total", "Tokens (after truncation) encoded by the model")
+        self.padded_tokens = metrics.counter("embedding_padded_tokens_total", "Tokens in model batches including padding")
+        metrics.gauge("embedding_padding_efficiency", "Real tokens / padded tokens across model batches", self.padding_efficiency)
+        self._load_lock = threading.Lock()
+    
+    def load(self):
+        """Load the model and open the embedding cache, once; concurrent callers wait for the first."""
+        if self.model is not None:
+            return
+        
+        with self._load_lock:
+            if self.model is not None:
+                return
+            
+            if settings.EMBEDDING_CACHE_ENABLED:
+                self.cache = EmbeddingCache(settings.EMBEDDING_CACHE_PATH, settings.EMBEDDING_CACHE_MAX_ENTRIES)
+            model = self._load_model()
+            self.model_id = self._model_identity()
+            self.stored_dimension = self._stored_dimension(model)
+            # Published last: a non-None model means the service is fully loaded
+            self.model = model
+    
+    def warmup(self, batch_sizes: List[int]):
+        """
+        Encode a throwaway batch of chunk-sized texts at each batch size, so the
+        backend allocates its kernels and buffers before the first real request.
+        """
+        self.load()
+        text = ("The quick brown fox jumps over the lazy dog. " * (settings.CHUNK_SIZE // 45 + 1))[:settings.CHUNK_SIZE]
+        for batch_size in batch_sizes:
+            if batch_size > 0:
+                self._encode([text] * batch_size)
+    
+    def _model_identity(self) -> str:
+        """
+        Identity of the loaded model used to namespace cached embeddings.
+        Custom models include their files' modification times so retraining invalidates the cache.
+        ONNX backends produce slightly different vectors, so they get their own namespace.
+        """
+        model_id = f"{self.model_type}:{self.model_path}"
+        
+        if self.model_type == "custom" and os.path.isdir(self.model_path):
+            # Exported ONNX files live in onnx/ and must not invalidate the torch model's entries
+            mtimes = [
+                os.path.getmtime(os.path.join(self.model_path, name))
+                for name in sorted(os.listdir(self.model_path))
+                if name != "onnx"
+            ]
+            model_id += f":{max(mtimes, default=0):.0f}"
+        
+        if self.backend != "torch":
+            model_id += f":{self.backend}"
+            onnx_file = os.path.join(self.model_path, ONNX_MODEL_FILES[self.backend])
+            if os.path.exists(onnx_file):
+                model_id += f":{os.path.getmtime(onnx_file):.0f}"
+        
+        return model_id
+    
+    def _stored_dimension(self, model) -> int:
+        """Dimension of the returned embeddings: EMBEDDING_STORED_DIMENSION, capped at the model's."""
+        model_dimension = model.get_sentence_embedding_dimension()
+        if settings.EMBEDDING_STORED_DIMENSION <= 0:
+            return model_dimension
+        return min(settings.EMBEDDING_STORED_DIMENSION, model_dimension)
+    
+    def _project(self, embeddings: np.ndarray) -> np.ndarray:
+        """
+        Matryoshka truncation: keep the first stored_dimension components and
+        re-normalize to unit length. Full-dimension embeddings are returned unchanged.
+        """
+        if embeddings.shape[-1] <= self.stored_dimension:
+            return embeddings
+        
+        truncated = embeddings[..., :self.stored_dimension]
+        norms = np.linalg.norm(truncated, axis=-1, keepdims=True)
+        return truncated / np.maximum(norms, 1e-12)
+    
+    def _backend_kwargs(self) -> dict:
+        """SentenceTransformer arguments selecting the configured inference backend."""
+        if self.backend == "torch":
+            return {}
+        
+        file_name = ONNX_MODEL_FILES[self.backend]
+        if self.model_type == "custom" and not os.path.exists(os.path.join(self.model_path, file_name)):
+            raise FileNotFoundError(
+                f"ONNX model not found at: {os.path.join(self.model_path, file_name)}. "
+                f"Export it with: python -m scripts.export_onnx"
+            )
+        
+        return {
+            "backend": "onnx",
+            "model_kwargs": {"file_name": file_name, "provider": "CPUExecutionProvider"}
+        }
     
     def _load_model(self):
         """Load the embedding model based on configuration."""
+        # Imported here: torch and sentence-transformers dominate the service's import time
+        import torch
+        from sentence_transformers import SentenceTransformer
+        
         try:
             if self.model_type == "custom":
                 # Load custom fine-tuned model
                 if not os.path.exists(self.model_path):
                     raise FileNotFoundError(f"Custom model not found at: {self.model_path}")
                 
-                print(f"Loading custom model from: {self.model_path}")
-                self.model = SentenceTransformer(self.model_path)
+                print(f"Loading custom model from: {self.model_path} (backend: {self.backend})")
+                model = SentenceTransformer(self.model_path, **self._backend_kwargs())
                 
             elif self.model_type == "huggingface":
                 # Load model from HuggingFace
-                print(f"Loading HuggingFace model: {self.model_path}")
-                self.model = SentenceTransformer(self.model_path, trust_remote_code=True)
+                print(f"Loading HuggingFace model: {self.model_path} (backend: {self.backend})")
+                model = SentenceTransformer(self.model_path, trust_remote_code=True, **self._backend_kwargs())
             
             else:
                 raise ValueError(f"Unsupported model type: {self.model_type}")
             
-            # Check if CUDA is available
-            device = "cuda" if torch.cuda.is_available() else "cpu"
-            self.model = self.model.to(device)
+            if self.backend == "torch":
+                # Check if CUDA is available
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                model = model.to(device)
+            else:
+                # ONNX backends run on the CPU execution provider
+                device = "cpu"
             print(f"Model loaded successfully on device: {device}")
+            return model
             
         except Exception as e:
             print(f"Error loading model: {str(e)}")
             raise
     
+    def _tokenize(self, texts: List[str]):
+        """
+        Model inputs for all texts, padded to the longest (None when they must go
+        through model.encode: models without a tokenizer or with a default prompt).
+        """
+        if getattr(self.model, "tokenizer", None) is None or getattr(self.model, "default_prompt_name", None):
+            return None
+        
+        # The model's own tokenization, truncated to its maximum sequence length, exactly as encode() does
+        return self.model.tokenize(texts)
+    
+    def _plan_batches(self, lengths: List[int]) -> List[List[int]]:
+        """
+        Group text indices into batches of similar token length.
+        
+        Texts are sorted by length and a batch is closed once its padded size
+        (texts x longest text) would exceed EMBED_TOKEN_BUDGET or it holds
+        EMBED_MAX_BATCH_TEXTS texts. Without a budget, batches hold
+        encode()'s default of 32 texts.
+        """
+        budget = settings.EMBED_TOKEN_BUDGET if settings.EMBED_TOKEN_BUDGET > 0 else float("inf")
+        max_texts = max(1, settings.EMBED_MAX_BATCH_TEXTS) if settings.EMBED_TOKEN_BUDGET > 0 else 32
+        batches, current = [], []
+        
+        for index in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+            # Sorted ascending, so the new text is the longest in the batch
+            if current and ((len(current) + 1) * lengths[index] > budget or len(current) >= max_texts):
+                batches.append(current)
+                current = []
+            current.append(index)
+        
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _forward(self, features: dict, indices: List[int], width: int) -> np.ndarray:
+        """Embed the texts at `indices` from the tokenized features, trimmed to the batch's longest text."""
+        import torch
+        
+        # Keep the `width` columns on the side opposite the padding
+        columns = slice(-width, None) if self.model.tokenizer.padding_side == "left" else slice(0, width)
+        device = self.model.device if self.backend == "torch" else "cpu"
+        batch = {
+            name: value[indices][:, columns].to(device) if isinstance(value, torch.Tensor) and value.dim() == 2 else value
+            for name, value in features.items()
+        }
+        
+        with torch.inference_mode():
+            embeddings = self.model.forward(batch)["sentence_embedding"]
+        return embeddings.float().cpu().numpy()
+    
+    def _encode(self, texts):
+        """
+        Run the model on a text or list of texts, recording inference metrics.
+        
+        Texts are tokenized once; the model runs on the tokenized features in
+        length-bucketed batches under a token budget (see _plan_batches), and
+        embeddings are returned in the original order.
+        """
+        batch = [texts] if isinstance(texts, str) else texts
+        
+        with metrics.timer("embedding_inference_seconds", "Time spent in model inference per call"):
+            features = self._tokenize(batch)
+            if features is None:
+                embeddings = self.model.encode(texts, convert_to_tensor=False)
+                lengths = None
+            else:
+                lengths = features["attention_mask"].sum(dim=1).tolist()
+                embeddings = np.empty((len(batch), self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+                padded = 0
+                for indices in self._plan_batches(lengths):
+                    width = max(lengths[i] for i in indices)
+                    embeddings[indices] = self._forward(features, indices, width)
+                    padded += len(indices) * width
+                if isinstance(texts, str):
+                    embeddings = embeddings[0]
+        
+        self.texts_encoded.inc(len(batch))
+        if lengths is not None:
+            self.tokens_processed.inc(sum(lengths))
+            self.padded_tokens.inc(padded)
+        return embeddings
+    
+    def padding_efficiency(self) -> float:
+        """Share of the tokens in padded model batches that were real tokens (1.0 = no padding)."""
+        padded = self.padded_tokens.value
+        return self.tokens_processed.value / padded if padded else 1.0
+    
     def embed_text(self, text: str) -> List[float]:
         """Generate embedding for a single text."""
-        if self.model is None:
-            raise RuntimeError("Model not loaded")
+        self.load()
         
-        embedding = self.model.encode(text, convert_to_tensor=False)
-        return embedding.tolist()
+        embedding = self._encode(text)
+        return self._project(np.asarray(embedding)).tolist()
     
-    def embed_texts(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts."""
-        if self.model is None:
-            raise RuntimeError("Model not loaded")
+    def embed_texts(self, texts: List[str], use_cache: bool = True) -> List[List[float]]:
+        """
+        Generate embeddings for multiple texts.
+        
+        When the embedding cache is enabled, texts embedded before by the same
+        model are served from the cache and only the misses are encoded. The
+        cache holds full-dimension vectors; truncation to EMBEDDING_STORED_DIMENSION
+        is applied on the way out.
+        """
+        self.load()
+        
+        if not use_cache or self.cache is None or not texts:
+            embeddings = self._encode(texts)
+            return self._project(np.asarray(embeddings)).tolist()
+        
+        keys = [self.cache.make_key(self.model_id, text) for text in texts]
+        cached = self.cache.get_many(keys)
+        
+        # Encode each distinct missing text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        
+        if missing:
+            encoded = self._encode(list(missing.values()))
+            computed = dict(zip(missing.keys(), np.asarray(encoded, dtype=np.float32)))
+            self.cache.put_many(computed)
+            cached.update(computed)
         
-        embeddings = self.model.encode(texts, convert_to_tensor=False)
-        return embeddings.tolist()
+        return self._project(np.stack([cached[key] for key in keys])).tolist()
     
     def get_embedding_dimension(self) -> int:
-        """Get the dimension of the embeddings."""
-        if self.model is None:
-            raise RuntimeError("Model not loaded")
+        """Get the dimension of the returned (stored) embeddings."""
+        self.load()
         
-        return self.model.get_sentence_embedding_dimension()
+        return self.stored_dimension
 
 
 # Singleton instance
@@ -0,0 +1,555 @@
+import asyncio
+import itertools
+import json
+import os
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import IO, Iterator, List, Dict, Any, Tuple, Optional
+from config import settings
+from .document_processor import document_processor
+from .embedding_service import embedding_service
+from .vector_db_service import vector_db_service, make_chunk_ids
+from .metrics import metrics
+
+
+# Extracted chunks are spooled next to the uploaded PDF in a file with this suffix
+CHUNKS_SUFFIX = ".chunks.jsonl"
+
+
+def _write_chunks(chunks: Iterator[dict], chunks_path: str) -> int:
+    """Spool chunks to a JSON lines file. Returns the number of chunks written."""
+    count = 0
+    with open(chunks_path, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            f.write(json.dumps(chunk) + "\n")
+            count += 1
+    return count
+
+
+def _extract_pdf(path: str, filename: str, chunks_path: str, token_limit: int = 0) -> Tuple[int, Dict[str, float]]:
+    """
+    Extraction worker entry point (runs inside the process pool).
+    Streams the PDF's chunks to a JSON lines file; returns the chunk count and stage timings.
+    """
+    timings: Dict[str, float] = {}
+    count = _write_chunks(document_processor.stream_pdf(path, filename, timings, token_limit), chunks_path)
+    return count, timings
+
+
+def _count_pages(path: str) -> int:
+    """Worker entry point: number of pages of a spooled PDF."""
+    return document_processor.count_pages(path)
+
+
+def _extract_page_range(path: str, start: int, stop: int, pages_path: str):
+    """Worker entry point: spool the text of pages [start, stop) of a PDF as JSON lines."""
+    with open(pages_path, 'w', encoding='utf-8') as f:
+        for page in document_processor.extract_pages(path, start, stop):
+            f.write(json.dumps(page) + "\n")
+
+
+def _chunk_page_files(
+    pages_paths: List[str],
+    filename: str,
+    chunks_path: str,
+    token_limit: int = 0
+) -> Tuple[int, Dict[str, float]]:
+    """Worker entry point: chunk spooled page ranges in order; returns the chunk count and stage timings."""
+    def pages() -> Iterator[Tuple[int, str]]:
+        for pages_path in pages_paths:
+            with open(pages_path, encoding='utf-8') as f:
+                for line in f:
+                    yield tuple(json.loads(line))
+
+    timings: Dict[str, float] = {}
+    count = _write_chunks(document_processor.chunk_pages(pages(), filename, timings, token_limit), chunks_path)
+    return count, timings
+
+
+def _read_chunks(f: IO[str], limit: int) -> List[dict]:
+    """Read up to `limit` spooled chunks."""
+    return [json.loads(line) for line in itertools.islice(f, limit)]
+
+
+def build_chunk_metadatas(chunks: List[dict], uploaded_at: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Build vector store metadata for processed chunks, including header information
+    and the upload time (Unix seconds, default now) used by date filters.
+    """
+    uploaded_at = time.time() if uploaded_at is None else uploaded_at
+    metadatas = []
+    for chunk in chunks:
+        metadata = {
+            "filename": chunk['filename'],
+            "chunk_index": chunk['chunk_index'],
+            "uploaded_at": uploaded_at
+        }
+        if 'page_start' in chunk:
+            metadata['page_start'] = chunk['page_start']
+            metadata['page_end'] = chunk['page_end']
+
+        # Add header information if available
+        if 'header' in chunk:
+            metadata['header'] = chunk['header']
+            metadata['header_level'] = chunk.get('header_level', 0)
+            metadata['is_partial'] = chunk.get('is_partial', False)
+        elif 'chunk_type' in chunk:
+            metadata['chunk_type'] = chunk['chunk_type']
+
+        metadatas.append(metadata)
+
+    return metadatas
+
+
+class IngestionReporter:
+    """Receives progress events from the ingestion pipeline. Methods are no-ops by default."""
+
+    def stage(self, stage: str):
+        """A pipeline stage ('extracting', 'embedding', 'storing') started work."""
+
+    def progress(self, chunks_embedded: int, chunks_total: int):
+        """Chunks embedded so far out of the chunks extracted so far."""
+
+    def timing(self, stage: str, seconds: float):
+        """A stage spent the given time on one unit of work."""
+
+    def document_done(self, index: int, result: Dict[str, Any]):
+        """The document at `index` in the ingested files finished (completed or failed)."""
+
+    def chunks_written(self, chunk_ids: List[str]):
+        """IDs of the chunks stored so far for documents that have not completed."""
+
+
+class IngestionService:
+    """
+    Runs the blocking ingestion stages off the event loop.
+
+    PDF extraction and chunking run in a process pool (pypdf is pure Python and
+    holds the GIL), model inference runs on dedicated threads, and vector store
+    writes are serialized on a single thread.
+
+    Documents are extracted page by page and their chunks spooled to disk, then
+    embedded and stored in batches of INGEST_CHUNK_BATCH_SIZE chunks, so memory
+    use is bounded by the batch size rather than the size of a document.
+    """
+
+    def __init__(self):
+        self._extraction_pool: Optional[ProcessPoolExecutor] = None
+        self._embedding_pool: Optional[ThreadPoolExecutor] = None
+        self._storage_pool: Optional[ThreadPoolExecutor] = None
+        self._upload_slots: Optional[asyncio.Semaphore] = None
+
+        # Stage timings measured in the extraction processes are recorded here
+        self.stage_histograms = {
+            "pdf_extraction": metrics.histogram("pdf_extraction_seconds", "Time spent extracting text from a PDF"),
+            "header_split": metrics.histogram("header_split_seconds", "Time spent splitting a document's text by headers")
+        }
+        self.documents_processed = metrics.counter("ingestion_documents_total", "Documents extracted and chunked")
+        self.parallel_extractions = metrics.counter(
+            "ingestion_parallel_extractions_total",
+            "Documents whose pages were extracted by several processes"
+        )
+        self.chunks_embedded = metrics.counter("ingestion_chunks_embedded_total", "Chunks embedded during ingestion")
+
+    def _chunk_token_limit(self) -> int:
+        """Token budget of chunks when CHUNK_SIZE_UNIT is tokens, else 0 (chunks sized in characters)."""
+        if settings.CHUNK_SIZE_UNIT != "tokens":
+            return 0
+
+        embedding_service.load()
+        tokenizer = embedding_service.model.tokenizer
+        if document_processor.tokenizer is None:
+            # Assigned before the pool starts, so forked extraction processes inherit it
+            document_processor.tokenizer = tokenizer
+        # Longer texts are truncated by the model, so chunks never exceed its maximum sequence length
+        max_length = embedding_service.model.get_max_seq_length() or tokenizer.model_max_length
+        if settings.CHUNK_MAX_TOKENS > 0:
+            return min(settings.CHUNK_MAX_TOKENS, max_length)
+        return max_length
+
+    def _get_extraction_pool(self) -> ProcessPoolExecutor:
+        if self._extraction_pool is None:
+            self._extraction_pool = ProcessPoolExecutor(
+                max_workers=max(1, settings.EXTRACTION_WORKERS)
+            )
+        return self._extraction_pool
+
+    def _get_embedding_pool(self) -> ThreadPoolExecutor:
+        if self._embedding_pool is None:
+            self._embedding_pool = ThreadPoolExecutor(
+                max_workers=max(1, settings.EMBEDDING_WORKERS),
+                thread_name_prefix="embedding"
+            )
+        return self._embedding_pool
+
+    def _get_storage_pool(self) -> ThreadPoolExecutor:
+        if self._storage_pool is None:
+            self._storage_pool = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="vector-db"
+            )
+        return self._storage_pool
+
+    def _get_upload_slots(self) -> asyncio.Semaphore:
+        if self._upload_slots is None:
+            self._upload_slots = asyncio.Semaphore(max(1, settings.MAX_CONCURRENT_UPLOADS))
+        return self._upload_slots
+
+    async def _run(self, executor: Executor, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, func, *args)
+
+    async def extract_pdf(self, path: str, filename: str, chunks_path: str) -> int:
+        """
+        Extract and chunk a spooled PDF in the extraction process pool. Returns the number of chunks spooled.
+
+        PDFs with at least EXTRACTION_PARALLEL_MIN_PAGES pages are split into
+        contiguous page ranges extracted by all pool workers at once, each
+        opening the spooled file itself; the page texts are then chunked in order.
+        """
+        # May load the model (and its tokenizer) on first use, which must not block the event loop
+        token_limit = await asyncio.to_thread(self._chunk_token_limit)
+        pool = self._get_extraction_pool()
+        workers = max(1, settings.EXTRACTION_WORKERS)
+        try:
+            pages = await self._run(pool, _count_pages, path) if workers > 1 else 0
+            if pages < max(2, settings.EXTRACTION_PARALLEL_MIN_PAGES):
+                count, timings = await self._run(pool, _extract_pdf, path, filename, chunks_path, token_limit)
+            else:
+                count, timings = await self._extract_parallel(
+                    pool, path, filename, chunks_path, pages, workers, token_limit
+                )
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool for the next upload
+            self._extraction_pool = None
+            raise
+        
+        for stage, seconds in timings.items():
+            self.stage_histograms[stage].observe(seconds)
+        self.documents_processed.inc()
+        return count
+
+    async def _extract_parallel(
+        self,
+        pool: ProcessPoolExecutor,
+        path: str,
+        filename: str,
+        chunks_path: str,
+        pages: int,
+        workers: int,
+        token_limit: int
+    ) -> Tuple[int, Dict[str, float]]:
+        # Two ranges per worker even out pages that are slower to extract
+        ranges = min(pages, workers * 2)
+        bounds = [pages * i // ranges for i in range(ranges + 1)]
+        pages_paths = [f"{chunks_path}.pages{i}" for i in range(ranges)]
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(
+                self._run(pool, _extract_page_range, path, bounds[i], bounds[i + 1], pages_paths[i])
+                for i in range(ranges)
+            ))
+            extracted = time.perf_counter()
+            count, timings = await self._run(pool, _chunk_page_files, pages_paths, filename, chunks_path, token_limit)
+        finally:
+            for pages_path in pages_paths:
+                if os.path.exists(pages_path):
+                    os.remove(pages_path)
+
+        self.parallel_extractions.inc()
+        # Reading the spooled pages back is part of extraction too
+        return count, {
+            "pdf_extraction": extracted - started + timings["pdf_extraction"],
+            "header_split": timings["header_split"]
+        }
+
+    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings on the inference threads."""
+        return await self._run(self._get_embedding_pool(), embedding_service.embed_texts, texts)
+
+    async def _store(self, func, *args):
+        """Run a vector database call on the storage thread."""
+        return await self._run(self._get_storage_pool(), func, *args)
+
+    async def delete_chunks(self, chunk_ids: List[str]):
+        """Delete chunks by ID on the storage thread, e.g. those of an interrupted ingestion."""
+        await self._store(vector_db_service.delete_ids, chunk_ids)
+
+    async def _start_document(self, filename: str, mode: str) -> Dict[str, Any]:
+        """State for planning a document's chunks batch by batch (see _plan_batch)."""
+        stored = await self._store(vector_db_service.get_document_chunks, filename) if mode == "replace" else {}
+        return {
+            "filename": filename,
+            "mode": mode,
+            "stored": stored,  # Chunk ID -> metadata stored for the filename
+            "seen": set(),  # IDs of the chunks planned so far
+            "occurrences": {},  # Repeated chunk texts, for make_chunk_ids
+            "uploaded_at": time.time()
+        }
+
+    def _plan_batch(self, document: Dict[str, Any], chunks: List[dict]) -> Dict[str, Any]:
+        """
+        Decide which chunks of a batch of a document must be embedded and written.
+
+        In 'append' mode every chunk is new. In 'replace' mode chunks get
+        deterministic IDs and are diffed against what is stored for the
+        filename: only new chunks are embedded and added, and chunks that moved
+        only get their metadata updated. Chunks no longer present are deleted
+        once the whole document is planned (see _finish_document).
+        Unchanged chunks stored before upload times were recorded get one.
+        """
+        metadatas = build_chunk_metadatas(chunks, document["uploaded_at"])
+        plan = {
+            "chunks": [],
+            "metadatas": [],
+            "ids": [],
+            "update_ids": [],
+            "update_metadatas": [],
+            "stale_ids": [],
+            "unchanged": 0,
+            "final": False
+        }
+
+        if document["mode"] == "append":
+            plan.update(chunks=chunks, metadatas=metadatas, ids=[str(uuid.uuid4()) for _ in chunks])
+            return plan
+
+        ids = make_chunk_ids(document["filename"], [chunk['text'] for chunk in chunks], document["occurrences"])
+        document["seen"].update(ids)
+        stored = document["stored"]
+
+        for chunk_id, chunk, metadata in zip(ids, chunks, metadatas):
+            if chunk_id not in stored:
+                plan["chunks"].append(chunk)
+                plan["metadatas"].append(metadata)
+                plan["ids"].append(chunk_id)
+            else:
+                plan["unchanged"] += 1
+                # Unchanged chunks keep the time they were first uploaded
+                metadata["uploaded_at"] = stored[chunk_id].get("uploaded_at", metadata["uploaded_at"])
+                if stored[chunk_id] != metadata:
+                    plan["update_ids"].append(chunk_id)
+                    plan["update_metadatas"].append(metadata)
+
+        return plan
+
+    @staticmethod
+    def _finish_document(document: Dict[str, Any]) -> Dict[str, Any]:
+        """Final, chunkless plan of a document: deletes the stored chunks it no longer contains."""
+        plan = {key: [] for key in ("chunks", "metadatas", "ids", "update_ids", "update_metadatas")}
+        plan.update(
+            stale_ids=[chunk_id for chunk_id in document["stored"] if chunk_id not in document["seen"]],
+            unchanged=0,
+            final=True
+        )
+        return plan
+
+    async def ingest_files(
+        self,
+        files: List[Tuple[str, str]],
+        reporter: Optional[IngestionReporter] = None,
+        mode: str = "append"
+    ) -> List[Dict[str, Any]]:
+        """
+        Ingest spooled PDFs given as (filename, path) pairs.
+
+        Extraction, embedding and storage run as pipelined stages connected by
+        bounded queues of chunk batches: while one batch is embedded, the next
+        is read from the extracted document and the previous one is written,
+        and the next document is extracted in the background. Batches of
+        consecutive documents are coalesced into collection writes of up to
+        BULK_WRITE_BATCH_SIZE chunks. If a document fails part-way, the chunks
+        already added for it are deleted again.
+
+        mode is 'append' (add all chunks) or 'replace' (re-index existing
+        documents with the same filename incrementally, see _plan_batch).
+
+        Returns one result per file: {filename, status, chunks_created,
+        chunks_unchanged, chunks_deleted, error}.
+        """
+        reporter = reporter or IngestionReporter()
+        results = [
+            {
+                "filename": filename,
+                "status": "pending",
+                "chunks_created": 0,
+                "chunks_unchanged": 0,
+                "chunks_deleted": 0,
+                "error": None
+            }
+            for filename, _ in files
+        ]
+        extracted: asyncio.Queue = asyncio.Queue(maxsize=1)
+        embedded: asyncio.Queue = asyncio.Queue(maxsize=1)
+        totals = {"chunks": 0, "embedded": 0}
+        written: Dict[int, List[str]] = {}  # IDs added so far for documents not yet completed
+
+        def fail(index: int, error: str):
+            if results[index]["status"] == "failed":
+                return
+            results[index].update(status="failed", error=error)
+            reporter.document_done(index, results[index])
+
+        def failed(plan: Dict[str, Any]) -> bool:
+            return results[plan["index"]]["status"] == "failed"
+
+        def start_extraction(index: int) -> Optional[asyncio.Future]:
+            if index >= len(files):
+                return None
+            filename, path = files[index]
+            return asyncio.ensure_future(self.extract_pdf(path, filename, path + CHUNKS_SUFFIX))
+
+        async def extract_stage():
+            batch_size = max(1, settings.INGEST_CHUNK_BATCH_SIZE)
+            upcoming = start_extraction(0)
+            try:
+                for index, (filename, path) in enumerate(files):
+                    # The next document is extracted while this one's batches are processed
+                    extraction, upcoming = upcoming, start_extraction(index + 1)
+                    chunks_path = path + CHUNKS_SUFFIX
+                    reporter.stage("extracting")
+                    started = time.perf_counter()
+                    try:
+                        if not await extraction:
+                            fail(index, "No text could be extracted from the PDF")
+                            continue
+
+                        document = await self._start_document(filename, mode)
+                        with open(chunks_path, encoding='utf-8') as f:
+                            while chunks := await asyncio.to_thread(_read_chunks, f, batch_size):
+                                plan = self._plan_batch(document, chunks)
+                                plan["index"] = index
+                                totals["chunks"] += len(plan["chunks"])
+                                reporter.progress(totals["embedded"], totals["chunks"])
+
+                                reporter.timing("extracting", time.perf_counter() - started)
+                                await extracted.put(plan)
+                                started = time.perf_counter()
+
+                        plan = self._finish_document(document)
+                        plan["index"] = index
+                        await extracted.put(plan)
+                    except Exception as e:
+                        fail(index, f"Error processing file: {str(e)}")
+                    finally:
+                        reporter.timing("extracting", time.perf_counter() - started)
+                        if os.path.exists(chunks_path):
+                            os.remove(chunks_path)
+            finally:
+                if upcoming is not None:
+                    upcoming.cancel()
+            await extracted.put(None)
+
+        async def embed_stage():
+            batch_size = max(1, settings.EMBED_BATCH_SIZE)
+            while (plan := await extracted.get()) is not None:
+                if failed(plan):
+                    continue
+                reporter.stage("embedding")
+                started = time.perf_counter()
+                chunk_texts = [chunk['text'] for chunk in plan["chunks"]]
+                embeddings = []
+                try:
+                    for start in range(0, len(chunk_texts), batch_size):
+                        embeddings.extend(await self.embed_texts(chunk_texts[start:start + batch_size]))
+                        totals["embedded"] += min(batch_size, len(chunk_texts) - start)
+                        self.chunks_embedded.inc(min(batch_size, len(chunk_texts) - start))
+                        reporter.progress(totals["embedded"], totals["chunks"])
+                except Exception as e:
+                    fail(plan["index"], f"Error generating embeddings: {str(e)}")
+                    continue
+                finally:
+                    reporter.timing("embedding", time.perf_counter() - started)
+
+                plan["texts"] = chunk_texts
+                plan["embeddings"] = embeddings
+                del plan["chunks"]
+                await embedded.put(plan)
+            await embedded.put(None)
+
+        async def store_stage():
+            pending = []
+
+            async def roll_back():
+                """Delete the chunks already added for documents that have since failed."""
+                for index in [index for index in written if results[index]["status"] == "failed"]:
+                    try:
+                        await self._store(vector_db_service.delete_ids, written.pop(index))
+                        results[index]["chunks_created"] = 0
+                    except Exception as e:
+                        print(f"Error removing chunks of failed document {results[index]['filename']}: {str(e)}")
+                reporter.chunks_written([chunk_id for ids in written.values() for chunk_id in ids])
+
+            async def flush():
+                pending[:] = [plan for plan in pending if not failed(plan)]
+                if not pending:
+                    return
+                reporter.stage("storing")
+                started = time.perf_counter()
+                try:
+                    texts = [text for plan in pending for text in plan["texts"]]
+                    if texts:
+                        await self._store(
+                            vector_db_service.add_documents,
+                            texts,
+                            [vector for plan in pending for vector in plan["embeddings"]],
+                            [meta for plan in pending for meta in plan["metadatas"]],
+                            [chunk_id for plan in pending for chunk_id in plan["ids"]]
+                        )
+                    # Stale chunks are removed only after their replacements are stored
+                    for plan in pending:
+                        await self._store(vector_db_service.update_metadatas, plan["update_ids"], plan["update_metadatas"])
+                        await self._store(vector_db_service.delete_ids, plan["stale_ids"])
+                except Exception as e:
+                    for plan in pending:
+                        fail(plan["index"], f"Error storing chunks: {str(e)}")
+                else:
+                    for plan in pending:
+                        result = results[plan["index"]]
+                        result["chunks_created"] += len(plan["ids"])
+                        result["chunks_unchanged"] += plan["unchanged"]
+                        if plan["final"]:
+                            written.pop(plan["index"], None)
+                            result.update(status="completed", chunks_deleted=len(plan["stale_ids"]))
+                            reporter.document_done(plan["index"], result)
+                        else:
+                            written.setdefault(plan["index"], []).extend(plan["ids"])
+                finally:
+                    reporter.timing("storing", time.perf_counter() - started)
+                pending.clear()
+                await roll_back()
+
+            while (plan := await embedded.get()) is not None:
+                pending.append(plan)
+                if sum(len(plan["texts"]) for plan in pending) >= settings.BULK_WRITE_BATCH_SIZE:
+                    await flush()
+            await flush()
+            await roll_back()
+
+        async with self._get_upload_slots():
+            stages = [asyncio.ensure_future(stage()) for stage in (extract_stage, embed_stage, store_stage)]
+            try:
+                await asyncio.gather(*stages)
+            except BaseException:
+                # Don't leave the other stages blocked on their queues
+                for task in stages:
+                    task.cancel()
+                raise
+
+        return results
+
+    def shutdown(self):
+        """Stop all worker pools."""
+        for pool in (self._extraction_pool, self._embedding_pool, self._storage_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        self._extraction_pool = None
+        self._embedding_pool = None
+        self._storage_pool = None
+
+
+# Singleton instance
+ingestion_service = IngestionService()
@@ -0,0 +1,445 @@
+import asyncio
+import json
+import os
+import posixpath
+import shutil
+import sqlite3
+import tarfile
+import threading
+import time
+import uuid
+import zipfile
+from collections import Counter
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+from config import settings
+from .metrics import metrics
+from .ingestion import ingestion_service, IngestionReporter
+
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz')
+
+
+class QueueFullError(Exception):
+    """Raised when the number of waiting jobs has reached JOB_QUEUE_MAX_PENDING."""
+
+
+def is_archive(filename: str) -> bool:
+    """Check whether a filename has a supported archive extension."""
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+class _JobReporter(IngestionReporter):
+    """
+    Persists ingestion pipeline events onto a job row.
+
+    Events only record the new column values; a task writes them on a thread,
+    so the event loop never waits on SQLite, and values that change again
+    while a write is in flight (e.g. progress) are coalesced into the next one.
+
+    `files` maps the positions of the ingested files to their positions in the
+    job, which differ when a resumed job skips the files it already finished.
+    """
+
+    def __init__(self, queue: "JobQueue", row: sqlite3.Row, files: List[int]):
+        self.queue = queue
+        self.job_id = row['id']
+        self.files = files
+        self.timings: Dict[str, float] = json.loads(row['timings'])
+        self.documents: List[Dict[str, Any]] = json.loads(row['documents'])
+        self.files_done: List[int] = json.loads(row['files_done'])
+        self._pending: Dict[str, Any] = {}
+        self._writer: Optional[asyncio.Task] = None
+
+    def _update(self, **columns):
+        self._pending.update(columns)
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._write())
+
+    async def _write(self):
+        while self._pending:
+            columns, self._pending = self._pending, {}
+            try:
+                await asyncio.to_thread(
+                    self.queue._execute,
+                    f"UPDATE jobs SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?",
+                    (*columns.values(), self.job_id)
+                )
+            except Exception as e:
+                print(f"Error updating job {self.job_id}: {str(e)}")
+
+    async def flush(self):
+        """Wait until every event reported so far is written."""
+        if self._writer is not None:
+            await self._writer
+
+    def stage(self, stage: str):
+        self._update(stage=stage)
+
+    def progress(self, chunks_embedded: int, chunks_total: int):
+        self._update(chunks_embedded=chunks_embedded, chunks_total=chunks_total, timings=json.dumps(self.timings))
+
+    def timing(self, stage: str, seconds: float):
+        self.timings[stage] = round(self.timings.get(stage, 0.0) + seconds, 4)
+
+    def document_done(self, index: int, result: Dict[str, Any]):
+        self.documents.append(dict(result))
+        self.files_done.append(self.files[index])
+        self._update(
+            documents=json.dumps(self.documents),
+            files_done=json.dumps(self.files_done),
+            timings=json.dumps(self.timings)
+        )
+
+    def chunks_written(self, chunk_ids: List[str]):
+        self._update(chunks_written=json.dumps(chunk_ids))
+
+
+class JobQueue:
+    """
+    Persistent local queue of ingestion jobs backed by SQLite.
+
+    Uploads are spooled to disk and recorded as queued jobs; a fixed number of
+    worker tasks claim jobs in submission order and run the ingestion pipeline.
+    A job holds one PDF or, for bulk uploads, many. Jobs interrupted by a
+    restart are re-queued on startup and resumed: files that already finished
+    are skipped, and chunks stored for unfinished ones are deleted first.
+    """
+
+    def __init__(self):
+        self.db_path = settings.JOB_DATABASE_PATH
+        self.spool_directory = settings.UPLOAD_SPOOL_DIRECTORY
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+        metrics.gauge("job_queue_pending", "Ingestion jobs waiting for a worker", self.pending_count)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            os.makedirs(self.spool_directory, exist_ok=True)
+
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    spool_path TEXT NOT NULL,
+                    file_size INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    chunks_total INTEGER NOT NULL DEFAULT 0,
+                    chunks_embedded INTEGER NOT NULL DEFAULT 0,
+                    chunks_created INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    timings TEXT NOT NULL DEFAULT '{}',
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+            self._migrate(self._conn)
+        return self._conn
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """Add columns introduced after the table was first created."""
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if 'files' not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN files TEXT")
+        if 'documents' not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN documents TEXT NOT NULL DEFAULT '[]'")
+        if 'mode' not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN mode TEXT NOT NULL DEFAULT 'append'")
+        if 'files_done' not in columns:
+            # Positions of the job's files that finished, skipped when it is resumed
+            conn.execute("ALTER TABLE jobs ADD COLUMN files_done TEXT NOT NULL DEFAULT '[]'")
+        if 'chunks_written' not in columns:
+            # Chunks stored for unfinished files, deleted before the job is resumed
+            conn.execute("ALTER TABLE jobs ADD COLUMN chunks_written TEXT NOT NULL DEFAULT '[]'")
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._connect().execute(sql, params)
+
+    @staticmethod
+    def _row_files(row: sqlite3.Row) -> List[Tuple[str, str]]:
+        """Spooled (filename, path) pairs of a job."""
+        if row['files'] is None:
+            # Single-file job created before bulk uploads were supported
+            return [(row['filename'], row['spool_path'])]
+        return [(f['filename'], f['path']) for f in json.loads(row['files'])]
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job['job_id'] = job.pop('id')
+        job['timings'] = json.loads(job['timings'])
+        job['documents'] = json.loads(job['documents'])
+        job['file_count'] = len(JobQueue._row_files(row))
+        job.pop('spool_path')
+        job.pop('files')
+        job.pop('files_done')
+        job.pop('chunks_written')
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job by ID, or None if it does not exist."""
+        row = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def pending_count(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+
+    def _check_capacity(self):
+        if self.pending_count() >= settings.JOB_QUEUE_MAX_PENDING:
+            raise QueueFullError(
+                f"Ingestion queue is full ({settings.JOB_QUEUE_MAX_PENDING} jobs waiting)"
+            )
+
+    @staticmethod
+    def _spool(source: BinaryIO, path: str) -> int:
+        with open(path, 'wb') as f:
+            shutil.copyfileobj(source, f, length=1024 * 1024)
+        return os.path.getsize(path)
+
+    @staticmethod
+    def _expand_archive(archive_path: str, job_directory: str) -> List[Dict[str, Any]]:
+        """Extract the PDF members of a zip or tar archive into the job's spool directory."""
+        members = []
+
+        def add(name: str, source: BinaryIO):
+            if len(members) >= settings.BULK_MAX_FILES:
+                raise ValueError(f"Archive contains more than {settings.BULK_MAX_FILES} PDF files")
+            # Members are written under generated names, so archive paths can't escape the spool;
+            # the path within the archive names the document, so a/x.pdf and b/x.pdf stay distinct
+            path = os.path.join(job_directory, f"{len(members)}.pdf")
+            size = JobQueue._spool(source, path)
+            members.append({"filename": posixpath.normpath(name.replace("\\", "/")).lstrip("/"), "path": path, "size": size})
+
+        if archive_path.lower().endswith('.zip'):
+            with zipfile.ZipFile(archive_path) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and info.filename.lower().endswith('.pdf'):
+                        with archive.open(info) as source:
+                            add(info.filename, source)
+        else:
+            with tarfile.open(archive_path) as archive:
+                for info in archive:
+                    if info.isfile() and info.name.lower().endswith('.pdf'):
+                        add(info.name, archive.extractfile(info))
+
+        return members
+
+    def _enqueue(self, job_id: str, filename: str, files: List[Dict[str, Any]], mode: str) -> Dict[str, Any]:
+        self._execute(
+            "INSERT INTO jobs (id, filename, mode, spool_path, file_size, status, stage, files, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                job_id,
+                filename,
+                mode,
+                os.path.join(self.spool_directory, job_id),
+                sum(f['size'] for f in files),
+                QUEUED,
+                QUEUED,
+                json.dumps(files),
+                time.time()
+            )
+        )
+        return self.get(job_id)
+
+    def _queued(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        # Called on the event loop once the job is written; asyncio.Event is not thread-safe
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    def _create_job_directory(self) -> Tuple[str, str]:
+        self._connect()
+        job_id = uuid.uuid4().hex
+        job_directory = os.path.join(self.spool_directory, job_id)
+        os.makedirs(job_directory, exist_ok=True)
+        return job_id, job_directory
+
+    async def submit(self, source: BinaryIO, filename: str, mode: str = "append") -> Dict[str, Any]:
+        """
+        Spool an uploaded PDF to disk and queue it for ingestion.
+        mode is 'append' or 'replace' (see IngestionService.ingest_files).
+        Returns the created job.
+        """
+        # The job database is shared with worker threads, so it is only touched off the event loop
+        await asyncio.to_thread(self._check_capacity)
+
+        job_id, job_directory = await asyncio.to_thread(self._create_job_directory)
+        path = os.path.join(job_directory, "0.pdf")
+        size = await asyncio.to_thread(self._spool, source, path)
+
+        files = [{"filename": filename, "path": path, "size": size}]
+        return self._queued(await asyncio.to_thread(self._enqueue, job_id, filename, files, mode))
+
+    async def submit_bulk(self, uploads: List[Tuple[BinaryIO, str]], mode: str = "append") -> Dict[str, Any]:
+        """
+        Spool many uploaded PDFs, or a single zip/tar archive of PDFs, and queue
+        them as one job. Returns the created job.
+        """
+        await asyncio.to_thread(self._check_capacity)
+
+        job_id, job_directory = await asyncio.to_thread(self._create_job_directory)
+        try:
+            if len(uploads) == 1 and is_archive(uploads[0][1]):
+                source, archive_name = uploads[0]
+                archive_path = os.path.join(job_directory, os.path.basename(archive_name))
+                await asyncio.to_thread(self._spool, source, archive_path)
+                files = await asyncio.to_thread(self._expand_archive, archive_path, job_directory)
+                os.remove(archive_path)
+                label = archive_name
+            else:
+                files = []
+                for index, (source, filename) in enumerate(uploads):
+                    path = os.path.join(job_directory, f"{index}.pdf")
+                    size = await asyncio.to_thread(self._spool, source, path)
+                    files.append({"filename": filename, "path": path, "size": size})
+                label = f"{len(files)} files"
+
+            if not files:
+                raise ValueError("No PDF files found in upload")
+
+            # Documents are identified by filename, so one job can't hold two with the same name
+            counts = Counter(f['filename'] for f in files)
+            duplicates = sorted(name for name, count in counts.items() if count > 1)
+            if duplicates:
+                raise ValueError(f"Duplicate filenames in upload: {', '.join(duplicates)}")
+
+        except BaseException:
+            shutil.rmtree(job_directory, ignore_errors=True)
+            raise
+
+        return self._queued(await asyncio.to_thread(self._enqueue, job_id, label, files, mode))
+
+    def _claim_next(self) -> Optional[sqlite3.Row]:
+        """Atomically move the oldest queued job to running."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            started_at = time.time()
+            timings = {QUEUED: round(started_at - row['created_at'], 4)}
+            conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, timings = ? WHERE id = ?",
+                (RUNNING, started_at, json.dumps(timings), row['id'])
+            )
+            return conn.execute("SELECT * FROM jobs WHERE id = ?", (row['id'],)).fetchone()
+
+    def _finish(self, row: sqlite3.Row, reporter: _JobReporter, error: Optional[str] = None):
+        completed = [doc for doc in reporter.documents if doc['status'] == COMPLETED]
+        if error is None and not completed:
+            # Every document failed; surface the first error on the job
+            error = reporter.documents[0]['error'] if reporter.documents else "No documents processed"
+
+        timings = reporter.timings
+        timings['total'] = round(time.time() - row['started_at'], 4)
+        status = FAILED if error is not None else COMPLETED
+
+        self._execute(
+            "UPDATE jobs SET status = ?, stage = ?, chunks_created = ?, error = ?, timings = ?, "
+            "documents = ?, finished_at = ? WHERE id = ?",
+            (
+                status,
+                status,
+                sum(doc['chunks_created'] for doc in completed),
+                error,
+                json.dumps(timings),
+                json.dumps(reporter.documents),
+                time.time(),
+                row['id']
+            )
+        )
+
+    async def _process(self, row: sqlite3.Row):
+        files = self._row_files(row)
+        done = set(json.loads(row['files_done']))
+        remaining = [index for index in range(len(files)) if index not in done]
+        reporter = _JobReporter(self, row, remaining)
+
+        error = None
+        try:
+            # A resumed job first removes what it stored for the files it did not finish
+            chunk_ids = json.loads(row['chunks_written'])
+            if chunk_ids:
+                await ingestion_service.delete_chunks(chunk_ids)
+                reporter.chunks_written([])
+            await ingestion_service.ingest_files([files[index] for index in remaining], reporter, mode=row['mode'])
+        except Exception as e:
+            error = f"Error processing job: {str(e)}"
+
+        # Pending progress writes must not land after the final state
+        await reporter.flush()
+        await asyncio.to_thread(self._finish, row, reporter, error)
+
+        # Keep the spooled files if the worker was cancelled so the job can be resumed
+        if os.path.isdir(row['spool_path']):
+            shutil.rmtree(row['spool_path'], ignore_errors=True)
+        elif os.path.exists(row['spool_path']):
+            os.remove(row['spool_path'])
+
+    async def _worker(self):
+        while True:
+            row = await asyncio.to_thread(self._claim_next)
+            if row is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._process(row)
+
+    def start(self):
+        """Re-queue interrupted jobs and start the worker tasks."""
+        if self._workers:
+            return
+
+        self._execute(
+            "UPDATE jobs SET status = ?, stage = ?, chunks_embedded = 0, started_at = NULL "
+            "WHERE status = ?",
+            (QUEUED, QUEUED, RUNNING)
+        )
+
+        self._wakeup = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        self._workers = [loop.create_task(self._worker()) for _ in range(max(1, settings.JOB_WORKERS))]
+        print(f"Job queue started with {len(self._workers)} workers ({self.pending_count()} jobs pending)")
+
+    async def stop(self):
+        """Stop the worker tasks; running jobs are re-queued on next start."""
+        for task in self._workers:
+            task.cancel()
+        for task in self._workers:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._workers = []
+
+
+# Singleton instance
+job_queue = JobQueue()
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from config import settings
+from .backend_client import backend_client
+from .embedding_service import embedding_service
+from .job_queue import job_queue
+from .metrics import metrics
+from .vector_db_service import vector_db_service
+
+
+class ServiceLifecycle:
+    """
+    Deferred startup of the services.
+
+    Importing the services does no heavy work; start() opens the vector store,
+    loads the model and warms it up in a background thread, then starts the job
+    queue and marks the process ready. The duration of each startup stage
+    (including the import, recorded by main) is kept in `timings` and exported
+    as a startup_<stage>_seconds gauge.
+
+    HTTP workers of a multi-process server (REMOTE_BACKEND) load nothing: they
+    follow the backend process's startup and are ready once it is.
+    """
+
+    def __init__(self):
+        self.stage = "starting"  # starting, vector_store, model_load, warmup, backend, ready, failed
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        metrics.gauge("service_ready", "1 once the model is loaded and warmed up, else 0", lambda: float(self.ready))
+
+    @property
+    def ready(self) -> bool:
+        return self.stage == "ready"
+
+    def record(self, stage: str, seconds: float):
+        """Record the duration of a startup stage."""
+        self.timings[stage] = seconds
+        metrics.gauge(f"startup_{stage}_seconds", f"Seconds spent in the {stage} startup stage", lambda: self.timings[stage])
+
+    @contextmanager
+    def _stage(self, stage: str) -> Iterator[None]:
+        self.stage = stage
+        started = time.perf_counter()
+        yield
+        self.record(stage, time.perf_counter() - started)
+
+    def initialize(self):
+        """Open the vector store, load the model and warm it up (blocking)."""
+        with self._stage("vector_store"):
+            vector_db_service.initialize()
+        with self._stage("model_load"):
+            embedding_service.load()
+        if settings.WARMUP_BATCH_SIZES:
+            with self._stage("warmup"):
+                embedding_service.warmup(settings.WARMUP_BATCH_SIZES)
+
+    async def start(self):
+        """
+        Initialize the services off the event loop, then start the job queue.
+        A failure is recorded in `error` (reported by the probes) rather than raised.
+        """
+        if settings.REMOTE_BACKEND:
+            await self._follow_backend()
+            return
+
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self.initialize)
+            job_queue.start()
+        except Exception as e:
+            self.stage, self.error = "failed", str(e)
+            print(f"Startup failed: {self.error}")
+            return
+
+        self.record("total", time.perf_counter() - started)
+        self.stage = "ready"
+        print("Ready in " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.timings.items()))
+
+    async def _follow_backend(self):
+        """Poll the backend's startup until it is ready or failed; its stage timings are recorded as backend_<stage>."""
+        self.stage = "backend"
+        while True:
+            try:
+                status = await backend_client.acall("status")
+            except OSError:
+                # Not listening yet
+                status = None
+
+            if status is not None:
+                for stage, seconds in status["timings"].items():
+                    self.record(f"backend_{stage}", seconds)
+                if status["stage"] in ("ready", "failed"):
+                    self.stage, self.error = status["stage"], status["error"]
+                    print(f"Backend {self.stage}" + (f": {self.error}" if self.error else ""))
+                    return
+
+            await asyncio.sleep(0.5)
+
+
+# Singleton instance
+lifecycle = ServiceLifecycle()
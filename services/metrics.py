@@ -0,0 +1,206 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Collection, Dict, Iterator, List, Any, Optional, Sequence
+
+
+# Default bucket upper bounds (seconds) for latency histograms
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Stage durations of the HTTP request being handled, for the Server-Timing header.
+# Only set while a request is in flight and Server-Timing is enabled.
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def start_request_timing():
+    """Start collecting stage durations for the current request. Returns a token for end_request_timing."""
+    return _request_timings.set({})
+
+
+def end_request_timing(token) -> Dict[str, float]:
+    """Stop collecting and return the stage durations (seconds) of the current request."""
+    timings = _request_timings.get() or {}
+    _request_timings.reset(token)
+    return timings
+
+
+def record_request_timing(name: str, seconds: float):
+    """Add a stage duration to the current request's Server-Timing, if one is being collected."""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    """Format stage durations as a Server-Timing header value (milliseconds)."""
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items())
+
+
+class Histogram:
+    """Thread-safe cumulative histogram with fixed bucket upper bounds."""
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets: List[float] = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Record a single observation."""
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return count, sum and cumulative bucket counts."""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            running += bucket_count
+            cumulative[str(bound)] = running
+        cumulative["+Inf"] = count
+
+        return {"count": count, "sum": total, "buckets": cumulative}
+
+
+class Counter:
+    """Thread-safe monotonically increasing counter."""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self) -> float:
+        return self._value
+
+
+class Gauge:
+    """Value computed on demand when metrics are collected."""
+
+    def __init__(self, name: str, description: str, func: Callable[[], float]):
+        self.name = name
+        self.description = description
+        self._func = func
+
+    @property
+    def value(self) -> float:
+        return self._func()
+
+    def snapshot(self) -> float:
+        return self._func()
+
+
+class MetricsRegistry:
+    """Process-wide registry of named metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, name: str, factory):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = factory()
+            return self._metrics[name]
+
+    def histogram(self, name: str, description: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, description, buckets))
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, description))
+
+    def gauge(self, name: str, description: str, func: Callable[[], float]) -> Gauge:
+        return self._get_or_create(name, lambda: Gauge(name, description, func))
+
+    @contextmanager
+    def timer(self, name: str, description: str) -> Iterator[None]:
+        """
+        Time a block of code into the histogram `name` (seconds) and the
+        current request's Server-Timing, where it appears without the
+        `_seconds` suffix.
+        """
+        histogram = self.histogram(name, description)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            histogram.observe(elapsed)
+            record_request_timing(name.removesuffix("_seconds"), elapsed)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current value of every registered metric."""
+        with self._lock:
+            items = list(self._metrics.items())
+
+        snapshot = {}
+        for name, metric in sorted(items):
+            try:
+                snapshot[name] = metric.snapshot()
+            except Exception:
+                # A gauge whose source is unavailable is left out
+                continue
+        return snapshot
+
+    def names(self) -> List[str]:
+        """Names of the registered metrics."""
+        with self._lock:
+            return sorted(self._metrics)
+
+    def to_prometheus(self, skip: Collection[str] = ()) -> str:
+        """Render every registered metric, except those named in `skip`, in the Prometheus text exposition format."""
+        with self._lock:
+            items = sorted((name, metric) for name, metric in self._metrics.items() if name not in skip)
+
+        lines = []
+        for name, metric in items:
+            lines.append(f"# HELP {name} {metric.description}")
+            if isinstance(metric, Histogram):
+                snapshot = metric.snapshot()
+                lines.append(f"# TYPE {name} histogram")
+                for bound, count in snapshot["buckets"].items():
+                    lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+                lines.append(f"{name}_sum {snapshot['sum']}")
+                lines.append(f"{name}_count {snapshot['count']}")
+            else:
+                try:
+                    value = metric.snapshot()
+                except Exception:
+                    # A gauge whose source is unavailable is left out of this scrape
+                    lines.pop()
+                    continue
+                kind = "counter" if isinstance(metric, Counter) else "gauge"
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Singleton instance
+metrics = MetricsRegistry()
@@ -0,0 +1,434 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from .metrics import metrics
+from .vector_store import VectorStore, check_unique_ids
+
+
+# Rows copied per step when compacting the vector segment
+_COPY_ROWS = 65536
+
+# Chroma where operators and their SQL equivalents
+_COMPARISONS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+def where_to_sql(where: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """
+    Translate a Chroma-style metadata filter into an SQL condition on the
+    rows table. Supports equality, $eq/$ne/$gt/$gte/$lt/$lte, $in/$nin and
+    nested $and/$or.
+    """
+    clauses, params = [], []
+
+    for key, value in where.items():
+        if key in ("$and", "$or"):
+            parts = [where_to_sql(condition) for condition in value]
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + (joiner.join(sql for sql, _ in parts) or "1") + ")")
+            params.extend(param for _, part_params in parts for param in part_params)
+            continue
+
+        field = "filename" if key == "filename" else f"json_extract(metadata, '$.\"{key}\"')"
+        operator, operand = next(iter(value.items())) if isinstance(value, dict) else ("$eq", value)
+
+        if operator in ("$in", "$nin"):
+            if not operand:
+                clauses.append("0" if operator == "$in" else "1")
+                continue
+            negation = "NOT " if operator == "$nin" else ""
+            clauses.append(f"{field} {negation}IN ({','.join('?' * len(operand))})")
+            params.extend(operand)
+        elif operator in _COMPARISONS:
+            clauses.append(f"{field} {_COMPARISONS[operator]} ?")
+            params.append(operand)
+        else:
+            raise ValueError(f"Unsupported where operator: {operator}")
+
+    return " AND ".join(clauses) or "1", params
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Exact-search vector store over a memory-mapped float32 matrix.
+
+    Vectors are appended to a contiguous segment file (`<name>.f32`, one row
+    per chunk); IDs, texts and metadata live in a SQLite table keyed by row,
+    with an index on filename. Queries compute the distance (in the
+    collection's space, fixed when it is created) to every live row with one
+    matrix product and pick the nearest with argpartition, so results are
+    exact and deterministic.
+
+    Deleted rows become tombstones. Once they outnumber the live rows a
+    background thread rewrites the segment without them into a file of the
+    next generation (`<name>.<generation>.f32`), which replaces the old one in
+    the same SQLite transaction that renumbers the rows.
+    """
+
+    exact = True
+
+    def __init__(self, directory: str, name: str, space: str = "l2"):
+        self.directory = directory
+        self.name = name
+        self.space = space
+        self.dimension: Optional[int] = None
+        self._lock = threading.Lock()
+        # Row -> chunk ID, None for tombstones. Only appended to or replaced, so queries can keep a reference
+        self._ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._norms = np.empty(0, dtype=np.float32)  # Squared norm of every row
+        self._alive = np.empty(0, dtype=bool)  # False for tombstones; replaced, never modified in place
+        self._segment = 0  # Generation of the segment file
+        self._epoch = 0  # Bumped by clear() so an in-flight compaction knows its snapshot is gone
+        self._map: Optional[np.ndarray] = None
+        self._compaction: Optional[threading.Thread] = None
+        self._conn = self._connect()
+        self._load()
+
+        metrics.gauge("numpy_store_tombstones", "Deleted rows awaiting compaction", lambda: len(self._ids) - len(self._rows))
+
+    def _segment_file(self, generation: int) -> str:
+        # Stores created before compaction switched generations use the unnumbered file
+        suffix = f".{generation}" if generation else ""
+        return os.path.join(self.directory, f"{self.name}{suffix}.f32")
+
+    @property
+    def _segment_path(self) -> str:
+        return self._segment_file(self._segment)
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(self.directory, exist_ok=True)
+        conn = sqlite3.connect(
+            os.path.join(self.directory, f"{self.name}.db"),
+            check_same_thread=False,
+            isolation_level=None
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rows (
+                row INTEGER PRIMARY KEY,
+                id TEXT UNIQUE NOT NULL,
+                filename TEXT,
+                document TEXT,
+                metadata TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_rows_filename ON rows (filename)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        return conn
+
+    def _load(self):
+        """Read the configuration, row IDs and norms, and truncate the segment past the last committed row."""
+        meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        if "space" in meta:
+            self.space = meta["space"]
+        else:
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('space', ?)", (self.space,))
+        self.dimension = int(meta["dimension"]) if "dimension" in meta else None
+        self._segment = int(meta.get("segment", 0))
+
+        # A compaction interrupted before or after its commit leaves the other generation's file behind
+        pattern = re.compile(re.escape(self.name) + r"(\.\d+)?\.f32")
+        for filename in os.listdir(self.directory):
+            path = os.path.join(self.directory, filename)
+            if pattern.fullmatch(filename) and path != self._segment_path:
+                os.remove(path)
+
+        total = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM rows").fetchone()[0]
+        self._ids = [None] * total
+        for row_number, chunk_id in self._conn.execute("SELECT row, id FROM rows"):
+            self._ids[row_number] = chunk_id
+            self._rows[chunk_id] = row_number
+        self._alive = np.array([chunk_id is not None for chunk_id in self._ids], dtype=bool)
+
+        if self.dimension is None:
+            return
+
+        # An interrupted append may have written vectors for rows that were never recorded
+        if os.path.exists(self._segment_path):
+            os.truncate(self._segment_path, total * self.dimension * 4)
+        vectors = self._vectors()
+        self._norms = np.concatenate(
+            [np.einsum("ij,ij->i", block, block) for block in self._blocks(vectors)]
+            or [np.empty(0, dtype=np.float32)]
+        ).astype(np.float32)
+
+    @staticmethod
+    def _blocks(vectors: np.ndarray):
+        for start in range(0, len(vectors), _COPY_ROWS):
+            yield np.asarray(vectors[start:start + _COPY_ROWS])
+
+    def _vectors(self) -> np.ndarray:
+        """Read-only memory map of the segment."""
+        if self._map is None:
+            rows = len(self._ids)
+            if rows == 0:
+                return np.empty((0, self.dimension or 0), dtype=np.float32)
+            self._map = np.memmap(self._segment_path, dtype=np.float32, mode="r", shape=(rows, self.dimension))
+        return self._map
+
+    def add(self, ids, embeddings, documents, metadatas):
+        check_unique_ids(ids)
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            # Like Chroma, IDs that already exist are left unchanged
+            new = [i for i, chunk_id in enumerate(ids) if chunk_id not in self._rows]
+            if not new:
+                return
+
+            dimension = self.dimension if self.dimension is not None else vectors.shape[1]
+            if vectors.shape[1] != dimension:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match collection dimensionality {dimension}")
+
+            # Vectors past the last committed row are ignored on load, so appending first is safe;
+            # a failed insert truncates them again so later rows stay aligned with their vectors
+            vectors = vectors[new]
+            size = os.path.getsize(self._segment_path) if os.path.exists(self._segment_path) else 0
+            start = len(self._ids)
+            try:
+                with open(self._segment_path, "ab") as f:
+                    f.write(np.ascontiguousarray(vectors).tobytes())
+
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dimension', ?)", (str(dimension),))
+                    self._conn.executemany(
+                        "INSERT INTO rows (row, id, filename, document, metadata) VALUES (?, ?, ?, ?, ?)",
+                        [
+                            (start + n, ids[i], (metadatas[i] or {}).get("filename"), documents[i], json.dumps(metadatas[i] or {}))
+                            for n, i in enumerate(new)
+                        ]
+                    )
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            except BaseException:
+                if os.path.exists(self._segment_path):
+                    os.truncate(self._segment_path, size)
+                raise
+
+            self.dimension = dimension
+            for n, i in enumerate(new):
+                self._ids.append(ids[i])
+                self._rows[ids[i]] = start + n
+            self._norms = np.concatenate([self._norms, np.einsum("ij,ij->i", vectors, vectors)])
+            self._alive = np.concatenate([self._alive, np.ones(len(new), dtype=bool)])
+            self._map = None
+
+    def _select_rows(self, where: Dict[str, Any]) -> np.ndarray:
+        sql, params = where_to_sql(where)
+        return np.array(
+            [row for (row,) in self._conn.execute(f"SELECT row FROM rows WHERE {sql} ORDER BY row", params)],
+            dtype=np.int64
+        )
+
+    def _fetch(self, ids: List[str]) -> Dict[str, Tuple[Optional[str], Dict[str, Any]]]:
+        """Text and metadata of the given chunks."""
+        fetched = {}
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            for chunk_id, document, metadata in self._conn.execute(
+                f"SELECT id, document, metadata FROM rows WHERE id IN ({','.join('?' * len(batch))})", batch
+            ):
+                fetched[chunk_id] = (document, json.loads(metadata))
+        return fetched
+
+    def query(self, query_embeddings, n_results=10, where=None, ef=None):
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        with self._lock:
+            vectors, norms, alive, row_ids = self._vectors(), self._norms, self._alive, self._ids
+            rows = self._select_rows(where) if where else np.flatnonzero(alive)
+
+        empty = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if len(rows) == 0:
+            return {key: [[] for _ in queries] for key in empty}
+
+        # One BLAS matrix product of the candidate rows with all queries
+        if where:
+            dots, row_norms = np.asarray(vectors[rows]) @ queries.T, norms[rows, None]
+        else:
+            dots, row_norms = vectors @ queries.T, norms[:, None]
+        query_norms = np.einsum("ij,ij->i", queries, queries)[None, :]
+
+        if self.space == "ip":
+            distances = 1 - dots
+        elif self.space == "cosine":
+            distances = 1 - dots / np.maximum(np.sqrt(row_norms * query_norms), 1e-12)
+        else:
+            # Squared L2: |v|^2 - 2 v.q + |q|^2
+            distances = np.maximum(row_norms - 2 * dots + query_norms, 0)
+        if not where:
+            distances[~alive] = np.inf
+
+        k = min(n_results, len(rows))
+        nearest = []
+        for q in range(len(queries)):
+            top = np.argpartition(distances[:, q], k - 1)[:k]
+            top = top[np.argsort(distances[top, q])]
+            # Rows are resolved to IDs from the snapshot, as compaction may renumber them
+            nearest.append([(row_ids[rows[i] if where else i], float(distances[i, q])) for i in top])
+
+        with self._lock:
+            # IDs of rows deleted since the snapshot read as None
+            fetched = self._fetch(sorted({chunk_id for matches in nearest for chunk_id, _ in matches} - {None}))
+
+        results = {key: [] for key in empty}
+        for matches in nearest:
+            # Chunks deleted while the query ran are dropped
+            matches = [(chunk_id, distance) for chunk_id, distance in matches if chunk_id in fetched]
+            results["ids"].append([chunk_id for chunk_id, _ in matches])
+            results["documents"].append([fetched[chunk_id][0] for chunk_id, _ in matches])
+            results["metadatas"].append([fetched[chunk_id][1] for chunk_id, _ in matches])
+            results["distances"].append([distance for _, distance in matches])
+        return results
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None):
+        include = include if include is not None else ["metadatas", "documents"]
+        conditions, params = [], []
+        if ids is not None:
+            conditions.append(f"id IN ({','.join('?' * len(ids))})" if ids else "0")
+            params.extend(ids)
+        if where:
+            sql, where_params = where_to_sql(where)
+            conditions.append(sql)
+            params.extend(where_params)
+
+        with self._lock:
+            selected = self._conn.execute(
+                f"SELECT row, id, document, metadata FROM rows WHERE {' AND '.join(conditions) or '1'} "
+                f"ORDER BY row LIMIT ? OFFSET ?",
+                params + [limit if limit is not None else -1, offset or 0]
+            ).fetchall()
+            vectors = self._vectors() if "embeddings" in include else None
+
+        result = {"ids": [chunk_id for _, chunk_id, _, _ in selected]}
+        if "documents" in include:
+            result["documents"] = [document for _, _, document, _ in selected]
+        if "metadatas" in include:
+            result["metadatas"] = [json.loads(metadata) for _, _, _, metadata in selected]
+        if vectors is not None:
+            result["embeddings"] = np.asarray(vectors[[row for row, _, _, _ in selected]]).tolist()
+        return result
+
+    def update(self, ids, metadatas):
+        # Like Chroma, given keys are merged into the existing metadata
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for chunk_id, metadata in zip(ids, metadatas):
+                row = self._conn.execute("SELECT metadata FROM rows WHERE id = ?", (chunk_id,)).fetchone()
+                if row is None:
+                    continue
+                merged = {**json.loads(row[0]), **metadata}
+                self._conn.execute(
+                    "UPDATE rows SET metadata = ?, filename = ? WHERE id = ?",
+                    (json.dumps(merged), merged.get("filename"), chunk_id)
+                )
+            self._conn.execute("COMMIT")
+
+    def delete(self, ids):
+        with self._lock:
+            rows = [self._rows.pop(chunk_id) for chunk_id in ids if chunk_id in self._rows]
+            for row in rows:
+                self._ids[row] = None
+            alive = self._alive.copy()
+            alive[rows] = False
+            self._alive = alive
+            self._conn.execute("BEGIN")
+            for start in range(0, len(rows), 500):
+                batch = rows[start:start + 500]
+                self._conn.execute(f"DELETE FROM rows WHERE row IN ({','.join('?' * len(batch))})", batch)
+            self._conn.execute("COMMIT")
+
+            tombstones = len(self._ids) - len(self._rows)
+            if tombstones > max(len(self._rows), 1000) and self._compaction is None:
+                self._compaction = threading.Thread(target=self._compact, name="numpy-store-compaction", daemon=True)
+                self._compaction.start()
+
+    def _compact(self):
+        """
+        Rewrite the segment without tombstones into the next generation's file.
+        Writes continue while live rows are copied.
+        """
+        with self._lock:
+            temporary = self._segment_file(self._segment + 1)
+            epoch = self._epoch
+        try:
+            with self._lock:
+                vectors = self._vectors()
+                snapshot = len(self._ids)
+                live = np.flatnonzero(self._alive).tolist()
+
+            with open(temporary, "wb") as f:
+                for start in range(0, len(live), _COPY_ROWS):
+                    f.write(np.ascontiguousarray(vectors[live[start:start + _COPY_ROWS]]).tobytes())
+
+            with self._lock:
+                if self._epoch != epoch:
+                    # Cleared while copying; the copied rows no longer exist
+                    os.remove(temporary)
+                    return
+
+                # Rows appended while copying; rows deleted meanwhile are copied as tombstones
+                appended = [row for row in range(snapshot, len(self._ids)) if self._ids[row] is not None]
+                with open(temporary, "ab") as f:
+                    f.write(np.ascontiguousarray(self._vectors()[appended]).tobytes())
+
+                order = live + appended
+                # The renumbered rows and the new segment are committed together; until then
+                # a crash leaves the old segment in use and the new file is removed on load
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "UPDATE rows SET row = ? WHERE row = ?",
+                    [(new, old) for new, old in enumerate(order) if new != old]
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('segment', ?)", (str(self._segment + 1),)
+                )
+                self._conn.execute("COMMIT")
+
+                previous = self._segment_path
+                self._segment += 1
+                self._ids = [self._ids[old] for old in order]
+                self._rows = {chunk_id: row for row, chunk_id in enumerate(self._ids) if chunk_id is not None}
+                self._norms = self._norms[order]
+                self._alive = self._alive[order]
+                self._map = None
+                os.remove(previous)
+        except Exception as e:
+            print(f"Error compacting vector store: {str(e)}")
+            if temporary != self._segment_path and os.path.exists(temporary):
+                os.remove(temporary)
+        finally:
+            self._compaction = None
+
+    def count(self) -> int:
+        return len(self._rows)
+
+    def config(self) -> Dict[str, Any]:
+        # Exact search has no index parameters
+        return {"space": self.space, "hnsw_m": None, "hnsw_construction_ef": None, "hnsw_search_ef": None}
+
+    def recreate(self, config):
+        self.clear()
+        with self._lock:
+            self.space = config["space"]
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('space', ?)", (self.space,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM rows")
+            self._conn.execute("DELETE FROM meta WHERE key != 'space'")
+            if os.path.exists(self._segment_path):
+                os.remove(self._segment_path)
+            self._ids, self._rows, self._map = [], {}, None
+            self._norms = np.empty(0, dtype=np.float32)
+            self._alive = np.empty(0, dtype=bool)
+            self._segment = 0
+            self._epoch += 1
+            self.dimension = None
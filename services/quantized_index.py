@@ -0,0 +1,364 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .vector_store import check_unique_ids, compute_distances
+
+
+# Number of set bits in every byte value, for Hamming distances between packed codes
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+# Rows scored per block, bounding the temporary float copy of the codes and the score matrix
+_BLOCK_ROWS = 65536
+
+
+class QuantizedIndex:
+    """
+    Compact search tier kept alongside the vector store.
+
+    Each vector is stored three ways in append-only files under `directory`:
+    a quantized code (`int8`: one signed byte per dimension with a per-row
+    scale; `binary`: one sign bit per dimension), and the full float32 vector.
+    Codes are memory-mapped and scanned exhaustively to pick
+    `top_k * oversampling` candidates, which are then rescored exactly against
+    the float vectors, read from disk only for those rows.
+
+    Row IDs live in SQLite. Deleted rows become tombstones that are skipped by
+    searches. Once they outnumber live rows a background thread rewrites the
+    files without them under the next generation number, switched to in the
+    same SQLite transaction that renumbers the rows.
+    It is kept up to date by VectorDBService on every add/delete/clear.
+    """
+
+    def __init__(self, directory: str, mode: str):
+        if mode not in ("int8", "binary"):
+            raise ValueError(f"Unsupported quantization mode: {mode}")
+
+        self.directory = directory
+        self.mode = mode
+        self.dimension: Optional[int] = None
+        self._lock = threading.Lock()
+        # Row -> chunk ID, None for tombstones. Only appended to or replaced, so searches can keep a reference
+        self._ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._dead = np.empty(0, dtype=bool)  # True for tombstones; replaced, never modified in place
+        self._generation = 0  # Generation of the data files
+        self._epoch = 0  # Bumped by clear() so an in-flight compaction knows its snapshot is gone
+        self._maps: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        self._compaction: Optional[threading.Thread] = None
+        self._conn = self._connect()
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{self.mode}.{name}")
+
+    def _data_path(self, name: str, generation: Optional[int] = None) -> str:
+        """Path of a data file ('codes', 'scales' or 'vectors'), of the current generation by default."""
+        generation = self._generation if generation is None else generation
+        # Indexes created before compaction switched generations use unnumbered files
+        return self._path(name) + (f".{generation}" if generation else "")
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(self.directory, exist_ok=True)
+        conn = sqlite3.connect(self._path("rows.db"), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS rows (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        return conn
+
+    def _load(self):
+        """Read row IDs and the vector dimension, and truncate files past the last committed row."""
+        meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        self.dimension = int(meta["dimension"]) if "dimension" in meta else None
+        self._generation = int(meta.get("generation", 0))
+
+        # A compaction interrupted before or after its commit leaves the other generation's files behind
+        current = {self._data_path(name) for name in ("codes", "scales", "vectors")}
+        pattern = re.compile(re.escape(self.mode) + r"\.(codes|scales|vectors)(\.\d+)?")
+        for filename in os.listdir(self.directory):
+            path = os.path.join(self.directory, filename)
+            if pattern.fullmatch(filename) and path not in current:
+                os.remove(path)
+
+        total = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM rows").fetchone()[0]
+        self._ids = [None] * total
+        for row_number, chunk_id in self._conn.execute("SELECT row, id FROM rows"):
+            self._ids[row_number] = chunk_id
+            self._rows[chunk_id] = row_number
+        self._dead = np.array([chunk_id is None for chunk_id in self._ids], dtype=bool)
+
+        if self.dimension is not None:
+            # An interrupted append may have written data for rows that were never recorded
+            for name, width in self._row_bytes().items():
+                if os.path.exists(self._data_path(name)):
+                    os.truncate(self._data_path(name), total * width)
+
+    def _row_bytes(self) -> Dict[str, int]:
+        """Bytes per row in each data file."""
+        code_bytes = self.dimension if self.mode == "int8" else math.ceil(self.dimension / 8)
+        return {"codes": code_bytes, "scales": 4, "vectors": self.dimension * 4}
+
+    def _memory_maps(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Read-only memory maps of the codes, per-row scales and float vectors."""
+        if self._maps is None:
+            rows = len(self._ids)
+            code_dtype = np.int8 if self.mode == "int8" else np.uint8
+            code_width = self._row_bytes()["codes"]
+            self._maps = (
+                np.memmap(self._data_path("codes"), dtype=code_dtype, mode="r", shape=(rows, code_width)),
+                np.memmap(self._data_path("scales"), dtype=np.float32, mode="r", shape=(rows,)),
+                np.memmap(self._data_path("vectors"), dtype=np.float32, mode="r", shape=(rows, self.dimension))
+            )
+        return self._maps
+
+    def _quantize(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Codes and per-row scales for float vectors."""
+        if self.mode == "binary":
+            return np.packbits(vectors > 0, axis=1), np.ones(len(vectors), dtype=np.float32)
+
+        scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def count(self) -> int:
+        """Number of live rows."""
+        return len(self._rows)
+
+    def add(self, ids: List[str], embeddings: List[List[float]]):
+        """Append vectors. IDs already present are replaced."""
+        if not ids:
+            return
+
+        check_unique_ids(ids)
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            dimension = self.dimension if self.dimension is not None else vectors.shape[1]
+            if vectors.shape[1] != dimension:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match quantized index dimension {dimension}")
+
+            replaced = [chunk_id for chunk_id in ids if chunk_id in self._rows]
+            codes, scales = self._quantize(vectors)
+            files = (("codes", codes), ("scales", scales), ("vectors", vectors))
+            sizes = {
+                name: os.path.getsize(self._data_path(name)) if os.path.exists(self._data_path(name)) else 0
+                for name, _ in files
+            }
+            start = len(self._ids)
+
+            # Data past the last committed row is ignored on load, so appending first is safe;
+            # a failed insert truncates it again so later rows stay aligned with their data
+            try:
+                for name, data in files:
+                    with open(self._data_path(name), "ab") as f:
+                        f.write(np.ascontiguousarray(data).tobytes())
+
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dimension', ?)", (str(dimension),))
+                    self._delete_rows([self._rows[chunk_id] for chunk_id in replaced])
+                    self._conn.executemany(
+                        "INSERT INTO rows (row, id) VALUES (?, ?)",
+                        [(start + i, chunk_id) for i, chunk_id in enumerate(ids)]
+                    )
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            except BaseException:
+                for name, size in sizes.items():
+                    if os.path.exists(self._data_path(name)):
+                        os.truncate(self._data_path(name), size)
+                raise
+
+            self.dimension = dimension
+            self._tombstone(replaced)
+            for i, chunk_id in enumerate(ids):
+                self._ids.append(chunk_id)
+                self._rows[chunk_id] = start + i
+            self._dead = np.concatenate([self._dead, np.zeros(len(ids), dtype=bool)])
+            self._maps = None
+
+    def remove(self, ids: List[str]):
+        """Tombstone the rows of deleted chunks, compacting in the background once most rows are dead."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._delete_rows([self._rows[chunk_id] for chunk_id in ids if chunk_id in self._rows])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._tombstone(ids)
+
+            if len(self._ids) - len(self._rows) > max(len(self._rows), 1000) and self._compaction is None:
+                self._compaction = threading.Thread(target=self._compact, name="quantized-index-compaction", daemon=True)
+                self._compaction.start()
+
+    def _delete_rows(self, rows: List[int]):
+        for start in range(0, len(rows), 500):
+            batch = rows[start:start + 500]
+            self._conn.execute(f"DELETE FROM rows WHERE row IN ({','.join('?' * len(batch))})", batch)
+
+    def _tombstone(self, ids: List[str]):
+        """Mark the rows of chunks as dead in memory, once their rows are deleted."""
+        rows = [self._rows.pop(chunk_id) for chunk_id in ids if chunk_id in self._rows]
+        for row in rows:
+            self._ids[row] = None
+        dead = self._dead.copy()
+        dead[rows] = True
+        self._dead = dead
+
+    def _compact(self):
+        """
+        Rewrite the data files without tombstones as the next generation and renumber the rows.
+        Writes and searches continue while live rows are copied.
+        """
+        names = ("codes", "scales", "vectors")
+        with self._lock:
+            targets = [self._data_path(name, self._generation + 1) for name in names]
+            epoch = self._epoch
+        try:
+            with self._lock:
+                maps = self._memory_maps()
+                snapshot = len(self._ids)
+                live = np.flatnonzero(~self._dead)
+
+            for target, data in zip(targets, maps):
+                with open(target, "wb") as f:
+                    for start in range(0, len(live), _BLOCK_ROWS):
+                        f.write(np.ascontiguousarray(data[live[start:start + _BLOCK_ROWS]]).tobytes())
+
+            with self._lock:
+                if self._epoch != epoch:
+                    # Cleared while copying; the copied rows no longer exist
+                    for target in targets:
+                        os.remove(target)
+                    return
+
+                # Rows appended while copying; rows deleted meanwhile are copied as tombstones
+                appended = [row for row in range(snapshot, len(self._ids)) if self._ids[row] is not None]
+                for target, data in zip(targets, self._memory_maps()):
+                    with open(target, "ab") as f:
+                        f.write(np.ascontiguousarray(data[appended]).tobytes())
+
+                order = live.tolist() + appended
+                # The renumbered rows and the new files are committed together; until then
+                # a crash leaves the old files in use and the new ones are removed on load
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "UPDATE rows SET row = ? WHERE row = ?",
+                    [(new, old) for new, old in enumerate(order) if new != old]
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('generation', ?)", (str(self._generation + 1),)
+                )
+                self._conn.execute("COMMIT")
+
+                previous = [self._data_path(name) for name in names]
+                self._generation += 1
+                self._ids = [self._ids[old] for old in order]
+                self._rows = {chunk_id: row for row, chunk_id in enumerate(self._ids) if chunk_id is not None}
+                self._dead = self._dead[order]
+                self._maps = None
+                for path in previous:
+                    os.remove(path)
+        except Exception as e:
+            print(f"Error compacting quantized index: {str(e)}")
+            for target in targets:
+                if target not in [self._data_path(name) for name in names] and os.path.exists(target):
+                    os.remove(target)
+        finally:
+            self._compaction = None
+
+    def clear(self):
+        """Forget every vector."""
+        with self._lock:
+            self._conn.execute("DELETE FROM rows")
+            self._conn.execute("DELETE FROM meta")
+            for name in ("codes", "scales", "vectors"):
+                if os.path.exists(self._data_path(name)):
+                    os.remove(self._data_path(name))
+            self._ids, self._rows, self._maps = [], {}, None
+            self._dead = np.empty(0, dtype=bool)
+            self._generation = 0
+            self._epoch += 1
+            self.dimension = None
+
+    def rebuild(self, collection, page_size: int = 1000):
+        """Rebuild the index from the vector store collection, one page at a time."""
+        self.clear()
+        offset = 0
+        while True:
+            page = collection.get(include=["embeddings"], limit=page_size, offset=offset)
+            if not page['ids']:
+                break
+
+            self.add(page['ids'], page['embeddings'])
+            offset += len(page['ids'])
+
+    def _block_scores(self, codes: np.ndarray, scales: np.ndarray, probes: np.ndarray) -> np.ndarray:
+        """Approximate similarity (higher is better) of a block of rows to every query, shape (queries, rows)."""
+        if self.mode == "binary":
+            block = np.asarray(codes)
+            return -np.stack([
+                _POPCOUNT[np.bitwise_xor(block, probe)].sum(axis=1, dtype=np.int32) for probe in probes
+            ]).astype(np.float32)
+
+        block = np.asarray(codes, dtype=np.float32)
+        return (block @ probes.T).T * np.asarray(scales)
+
+    def search(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int,
+        oversampling: float,
+        space: str = "l2"
+    ) -> Tuple[List[List[str]], List[List[float]]]:
+        """
+        Nearest chunks for each query embedding.
+
+        Returns chunk IDs and distances per query, nearest first. Distances are
+        computed exactly in the given space, like the vector store's: squared
+        L2, 1 - cosine similarity, or 1 - dot product (ip).
+        """
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        with self._lock:
+            if not self._rows:
+                return [[] for _ in queries], [[] for _ in queries]
+
+            codes, scales, vectors = self._memory_maps()
+            ids, dead = self._ids, self._dead
+            live = len(self._rows)
+
+        k = min(n_results, live)
+        candidates = min(live, max(k, math.ceil(k * oversampling)))
+        probes = np.packbits(queries > 0, axis=1) if self.mode == "binary" else queries
+
+        # Codes are scored one block at a time, keeping each query's best candidates so far
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        for start in range(0, len(codes), _BLOCK_ROWS):
+            stop = min(start + _BLOCK_ROWS, len(codes))
+            scores = self._block_scores(codes[start:stop], scales[start:stop], probes)
+            scores[:, dead[start:stop]] = -np.inf
+            scores = np.concatenate([best_scores, scores], axis=1)
+            rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, stop), (len(queries), stop - start))], axis=1)
+            if scores.shape[1] > candidates:
+                top = np.argpartition(-scores, candidates - 1, axis=1)[:, :candidates]
+                scores, rows = np.take_along_axis(scores, top, axis=1), np.take_along_axis(rows, top, axis=1)
+            best_scores, best_rows = scores, rows
+
+        all_ids, all_distances = [], []
+        for q, query in enumerate(queries):
+            rows = np.sort(best_rows[q][best_scores[q] > -np.inf])
+            exact = vectors[rows]
+            distances = compute_distances(space, np.asarray(exact), query[None, :])[:, 0]
+            # IDs of rows deleted since the snapshot read as None
+            order = [i for i in np.argsort(distances) if ids[rows[i]] is not None][:k]
+            all_ids.append([ids[rows[i]] for i in order])
+            all_distances.append([float(distances[i]) for i in order])
+
+        return all_ids, all_distances
@@ -0,0 +1,157 @@
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from config import settings
+from .embedding_service import embedding_service
+from .metrics import metrics
+
+
+# Bucket upper bounds for the batch size histogram
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class QueryBatcher:
+    """
+    Collects concurrent query embedding requests into micro-batches.
+
+    The first queued query opens a batch; the batch is closed after
+    QUERY_BATCH_MAX_WAIT_MS or once QUERY_BATCH_MAX_SIZE queries are waiting,
+    then embedded with a single model call and fanned back to the callers.
+    """
+
+    def __init__(self):
+        self.max_batch_size = max(1, settings.QUERY_BATCH_MAX_SIZE)
+        self.max_wait = max(0.0, settings.QUERY_BATCH_MAX_WAIT_MS / 1000)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self.batch_size_histogram = metrics.histogram(
+            "query_embedding_batch_size",
+            "Number of queries embedded per model call",
+            BATCH_SIZE_BUCKETS
+        )
+        self.queue_wait_histogram = metrics.histogram(
+            "query_embedding_queue_wait_seconds",
+            "Time a query waited before its batch was sent to the model"
+        )
+        metrics.gauge(
+            "query_embedding_queue_depth",
+            "Queries waiting to be batched",
+            lambda: self._queue.qsize() if self._queue is not None else 0
+        )
+
+    def _ensure_started(self):
+        """Start the batching worker on the running event loop."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._executor = self._executor or ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="query-embedding"
+            )
+            # Run in a fresh context so the worker does not inherit the first caller's request state
+            self._worker = asyncio.get_running_loop().create_task(self._run(), context=contextvars.Context())
+
+    async def embed(self, text: str) -> List[float]:
+        """Generate an embedding for a query, batched with concurrent queries."""
+        self._ensure_started()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future, time.perf_counter()))
+        return await future
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed a caller-assembled batch of queries with a single model call."""
+        self._ensure_started()
+
+        self.batch_size_histogram.observe(len(texts))
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            functools.partial(embedding_service.embed_texts, texts, use_cache=False)
+        )
+
+    async def _collect_batch(self) -> List[Tuple[str, asyncio.Future, float]]:
+        """Wait for the first query, then gather more until the batch is full or the wait expires."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await self._collect_batch()
+
+            # Drop queries whose callers have gone away (e.g. client disconnected)
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                self.queue_wait_histogram.observe(started - enqueued)
+            self.batch_size_histogram.observe(len(batch))
+
+            texts = [text for text, _, _ in batch]
+            try:
+                # Queries bypass the on-disk chunk embedding cache
+                embeddings = await loop.run_in_executor(
+                    self._executor,
+                    functools.partial(embedding_service.embed_texts, texts, use_cache=False)
+                )
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future, _), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+
+    async def stop(self):
+        """Stop the batching worker and fail any queries still waiting."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("Query batcher stopped"))
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# Singleton instance; HTTP workers of a multi-process server batch in the backend process instead
+if settings.REMOTE_BACKEND:
+    from .backend_client import RemoteQueryBatcher, backend_client
+    query_batcher = RemoteQueryBatcher(backend_client)
+else:
+    query_batcher = QueryBatcher()
@@ -0,0 +1,153 @@
+import json
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+from config import settings
+from .metrics import metrics
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a fixed time."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _hit_rate(hits, misses) -> float:
+    lookups = hits.value + misses.value
+    return hits.value / lookups if lookups else 0.0
+
+
+class QueryCache:
+    """
+    Two-level in-process cache for search queries.
+
+    The embedding tier maps normalized query text to its embedding. The result
+    tier maps (normalized query, top_k, filters) to formatted search results
+    and is tied to the vector store generation: a lookup with a newer
+    generation than the cached results were computed for drops the whole
+    tier, so results are never served across a write.
+    """
+
+    def __init__(self):
+        self.enabled = settings.QUERY_CACHE_ENABLED
+        self.embeddings = TTLCache(settings.QUERY_CACHE_MAX_EMBEDDINGS, settings.QUERY_CACHE_TTL_SECONDS)
+        self.results = TTLCache(settings.QUERY_CACHE_MAX_RESULTS, settings.QUERY_CACHE_TTL_SECONDS)
+        self._generation: Optional[int] = None
+        self._lock = threading.Lock()
+
+        self.embedding_hits = metrics.counter("query_cache_embedding_hits_total", "Query embeddings served from the cache")
+        self.embedding_misses = metrics.counter("query_cache_embedding_misses_total", "Query embeddings computed by the model")
+        self.result_hits = metrics.counter("query_cache_result_hits_total", "Searches answered from the result cache")
+        self.result_misses = metrics.counter("query_cache_result_misses_total", "Searches that queried the vector store")
+        metrics.gauge(
+            "query_cache_embedding_hit_rate",
+            "Fraction of query embedding lookups served from the cache",
+            lambda: _hit_rate(self.embedding_hits, self.embedding_misses)
+        )
+        metrics.gauge(
+            "query_cache_result_hit_rate",
+            "Fraction of searches answered from the result cache",
+            lambda: _hit_rate(self.result_hits, self.result_misses)
+        )
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Canonical form of a query: Unicode NFC with whitespace collapsed."""
+        return " ".join(unicodedata.normalize("NFC", query).split())
+
+    @staticmethod
+    def _filters_key(filters: Optional[Dict[str, Any]]) -> Optional[str]:
+        return json.dumps(filters, sort_keys=True, default=str) if filters else None
+
+    def get_embedding(self, query: str) -> Optional[List[float]]:
+        if not self.enabled:
+            return None
+
+        embedding = self.embeddings.get(self.normalize(query))
+        (self.embedding_hits if embedding is not None else self.embedding_misses).inc()
+        return embedding
+
+    def put_embedding(self, query: str, embedding: List[float]):
+        if self.enabled:
+            self.embeddings.put(self.normalize(query), embedding)
+
+    def get_results(
+        self,
+        query: str,
+        top_k: int,
+        filters: Optional[Dict[str, Any]],
+        generation: int
+    ) -> Optional[List[Any]]:
+        """Cached results for a search, or None. generation is the vector store's current generation."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            if generation != self._generation:
+                self.results.clear()
+                self._generation = generation
+
+        results = self.results.get((self.normalize(query), top_k, self._filters_key(filters), generation))
+        (self.result_hits if results is not None else self.result_misses).inc()
+        return results
+
+    def put_results(
+        self,
+        query: str,
+        top_k: int,
+        filters: Optional[Dict[str, Any]],
+        generation: int,
+        results: List[Any]
+    ):
+        """
+        Cache results computed against the given generation. Pass the generation
+        read before querying, so results racing with a write are never reused.
+        """
+        if self.enabled:
+            self.results.put((self.normalize(query), top_k, self._filters_key(filters), generation), results)
+
+    def clear(self):
+        self.embeddings.clear()
+        self.results.clear()
+
+
+# Singleton instance
+query_cache = QueryCache()
@@ -1,111 +1,379 @@
-from typing import List, Dict, Any
-import chromadb
-from chromadb.config import Settings as ChromaSettings
+from typing import List, Dict, Any, Optional
 from config import settings
+from .document_catalog import DocumentCatalog
+from .metrics import metrics
+from .quantized_index import QuantizedIndex
+from .vector_store import VectorStore, compute_distances, create_vector_store, distance_to_similarity
+import hashlib
+import numpy as np
+import os
+import threading
 import uuid
 
 
+def make_chunk_ids(filename: str, texts: List[str], occurrences: Optional[Dict[str, int]] = None) -> List[str]:
+    """
+    Deterministic chunk IDs derived from the filename and a hash of each chunk's text.
+    Repeated texts within a document get an occurrence suffix so IDs stay unique.
+    
+    To compute the IDs of a document in batches, pass the same `occurrences`
+    dict for every batch.
+    """
+    prefix = hashlib.sha256(filename.encode('utf-8')).hexdigest()[:16]
+    occurrences = {} if occurrences is None else occurrences
+    ids = []
+    
+    for text in texts:
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+        occurrence = occurrences.get(digest, 0)
+        occurrences[digest] = occurrence + 1
+        ids.append(f"{prefix}-{digest}" + (f"-{occurrence}" if occurrence else ""))
+    
+    return ids
+
+
+def where_filenames(where: Optional[Dict[str, Any]]) -> Optional[List[str]]:
+    """Filenames a where clause restricts results to, or None if it matches any filename."""
+    if not where:
+        return None
+    
+    for clause in where.get("$and", [where]):
+        value = clause.get("filename")
+        if isinstance(value, str):
+            return [value]
+        if isinstance(value, dict) and "$eq" in value:
+            return [value["$eq"]]
+        if isinstance(value, dict) and "$in" in value:
+            return list(value["$in"])
+    
+    return None
+
+
 class VectorDBService:
-    """Service for managing ChromaDB vector database."""
+    """
+    Service for managing the vector database.
+    
+    Chunks are stored in the VectorStore selected by VECTOR_STORE: a ChromaDB
+    collection (HNSW) or a memory-mapped NumPy matrix searched exactly.
+    
+    `generation` increases after every write (add, update, delete, clear), so
+    callers caching search results can tell when they may be stale.
+    
+    With QUANTIZED_INDEX set, every write is mirrored into a QuantizedIndex that
+    serves searches in the "quantized" mode; "hnsw" searches use the vector store.
+    
+    Filtered searches pass the filters to the vector store as a where clause.
+    When the filter names documents holding few chunks, the chunk IDs are looked
+    up in the catalog's filename index and scored exactly instead.
+    
+    Nothing is opened on construction; initialize() (called at server startup)
+    opens the store, the catalog and the quantized index.
+    """
     
     def __init__(self):
-        self.client = None
-        self.collection = None
-        self._initialize_db()
+        self.collection: Optional[VectorStore] = None
+        self.catalog: Optional[DocumentCatalog] = None
+        self.quantized: Optional[QuantizedIndex] = None
+        self.generation = 0
+        self._generation_lock = threading.Lock()
+        self._initialize_lock = threading.Lock()
+        
+        # Gauges are left out of scrapes until the store is open
+        metrics.gauge("vector_db_chunks", "Chunks stored in the collection", self.count_documents)
+        metrics.gauge("vector_db_documents", "Distinct documents in the catalog", self.count_filenames)
+        metrics.gauge("vector_db_generation", "Writes applied to the collection since startup", lambda: self.generation)
     
-    def _initialize_db(self):
-        """Initialize ChromaDB with persistence."""
-        try:
-            # Create persistent client
-            self.client = chromadb.Client(
-                ChromaSettings(
-                    persist_directory=settings.CHROMA_PERSIST_DIRECTORY,
-                    is_persistent=True
-                )
-            )
+    def initialize(self):
+        """Open the vector store, document catalog and quantized index, once."""
+        with self._initialize_lock:
+            if self.collection is not None:
+                return
             
-            # Get or create collection
-            self.collection = self.client.get_or_create_collection(
-                name=settings.COLLECTION_NAME,
-                metadata={"description": "Document embeddings for search"}
+            self.catalog = DocumentCatalog(
+                os.path.join(settings.CHROMA_PERSIST_DIRECTORY, "document_catalog.db")
             )
+            if settings.QUANTIZED_INDEX != "none":
+                self.quantized = QuantizedIndex(
+                    os.path.join(settings.CHROMA_PERSIST_DIRECTORY, "quantized_index"),
+                    settings.QUANTIZED_INDEX
+                )
+            self._initialize_db()
+    
+    def _initialize_db(self):
+        """Open the configured vector store with persistence."""
+        try:
+            self.collection = create_vector_store()
             
-            print(f"ChromaDB initialized. Collection '{settings.COLLECTION_NAME}' ready.")
+            print(f"Vector store ({settings.VECTOR_STORE}) initialized. Collection '{settings.COLLECTION_NAME}' ready.")
             print(f"Existing documents in collection: {self.collection.count()}")
             
+            # Rebuild the document catalog if it is missing or out of sync with the collection
+            if self.catalog.count_chunks() != self.collection.count():
+                print("Rebuilding document catalog from collection...")
+                self.catalog.rebuild(self.collection)
+            
+            # Also rebuild it when the collection's vectors were re-projected to another dimension
+            if self.quantized is not None and (
+                self.quantized.count() != self.collection.count()
+                or self.quantized.dimension != self._collection_dimension()
+            ):
+                print(f"Rebuilding {settings.QUANTIZED_INDEX} quantized index from collection...")
+                self.quantized.rebuild(self.collection)
+            
         except Exception as e:
-            print(f"Error initializing ChromaDB: {str(e)}")
+            print(f"Error initializing vector store: {str(e)}")
             raise
     
+    def _collection_dimension(self) -> Optional[int]:
+        """Dimension of the stored vectors, or None for an empty collection."""
+        sample = self.collection.get(limit=1, include=["embeddings"])
+        return len(sample['embeddings'][0]) if sample['ids'] else None
+    
+    def _bump_generation(self):
+        """Mark the collection as changed. Called after each write, even a failed one."""
+        with self._generation_lock:
+            self.generation += 1
+    
     def add_documents(
         self,
         texts: List[str],
         embeddings: List[List[float]],
-        metadatas: List[Dict[str, Any]]
+        metadatas: List[Dict[str, Any]],
+        ids: Optional[List[str]] = None
     ) -> List[str]:
         """
         Add documents to the vector database.
+        Random IDs are generated unless explicit IDs are given.
         Returns list of document IDs.
         """
-        # Generate unique IDs for each chunk
-        ids = [str(uuid.uuid4()) for _ in range(len(texts))]
+        if ids is None:
+            # Generate unique IDs for each chunk
+            ids = [str(uuid.uuid4()) for _ in range(len(texts))]
         
-        self.collection.add(
-            ids=ids,
-            embeddings=embeddings,
-            documents=texts,
-            metadatas=metadatas
-        )
+        try:
+            # The quantized rows go first, so a rejected embedding leaves the collection untouched
+            if self.quantized is not None:
+                self.quantized.add(ids, embeddings)
+            try:
+                with metrics.timer("vector_db_add_seconds", "Time spent adding chunks to the collection"):
+                    self.collection.add(
+                        ids=ids,
+                        embeddings=embeddings,
+                        documents=texts,
+                        metadatas=metadatas
+                    )
+                self.catalog.add_chunks(ids, [metadata['filename'] for metadata in metadatas], texts)
+            except Exception:
+                if self.quantized is not None:
+                    self.quantized.remove(ids)
+                raise
+        finally:
+            self._bump_generation()
         
         return ids
     
     def search(
         self,
         query_embedding: List[float],
-        n_results: int = 10
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        mode: Optional[str] = None,
+        oversampling: Optional[float] = None,
+        ef: Optional[int] = None
     ) -> Dict[str, Any]:
         """
-        Search for similar documents.
+        Search for similar documents, optionally restricted by a metadata where clause.
         Returns documents with their metadata and distances.
         """
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results
-        )
+        return self.search_many([query_embedding], n_results, where, mode=mode, oversampling=oversampling, ef=ef)
+    
+    def search_many(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        mode: Optional[str] = None,
+        oversampling: Optional[float] = None,
+        ef: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Search for several query embeddings in one collection query.
+        Results are lists with one entry per query embedding, in order.
+        
+        `mode` is "hnsw" (the vector store's own search: HNSW for Chroma, exact
+        for the NumPy store) or "quantized" (the quantized
+        tier, rescored exactly; defaults to SEARCH_MODE). Filtered searches
+        always use the collection. `ef` overrides the HNSW search breadth.
+        """
+        if (mode or settings.SEARCH_MODE) == "quantized" and where is None:
+            return self._search_quantized(
+                query_embeddings,
+                n_results,
+                oversampling if oversampling is not None else settings.QUANTIZED_OVERSAMPLING
+            )
         
+        filenames = where_filenames(where)
+        if (
+            filenames is not None
+            and not self.collection.exact
+            and self.catalog.count_chunks_for(filenames) <= settings.FILTERED_EXACT_SEARCH_MAX_CHUNKS
+        ):
+            return self._search_subset(query_embeddings, n_results, where, filenames)
+        
+        with metrics.timer("vector_db_query_seconds", "Time spent in collection queries"):
+            return self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=where,
+                ef=ef
+            )
+    
+    def _search_subset(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int,
+        where: Dict[str, Any],
+        filenames: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Exact search over the chunks of a few documents, in the collection's query result format.
+        
+        An HNSW index filtered down to a small subset may miss matches; reading
+        the subset by ID and scoring every chunk is both exact and fast.
+        """
+        empty = {key: [[] for _ in query_embeddings] for key in ("ids", "distances", "documents", "metadatas")}
+        ids = self.catalog.get_chunk_ids_for(filenames)
+        if not ids:
+            return empty
+        
+        with metrics.timer("vector_db_get_seconds", "Time spent reading chunks from the collection"):
+            found = self.collection.get(ids=ids, where=where, include=["embeddings", "documents", "metadatas"])
+        if not found['ids']:
+            return empty
+        
+        with metrics.timer("vector_db_subset_search_seconds", "Time spent scoring filtered document subsets exactly"):
+            distances = compute_distances(
+                self.collection.space,
+                np.asarray(found['embeddings'], dtype=np.float32),
+                np.asarray(query_embeddings, dtype=np.float32)
+            )
+        
+        results = {key: [] for key in empty}
+        for q in range(len(query_embeddings)):
+            order = np.argsort(distances[:, q], kind="stable")[:n_results]
+            results["ids"].append([found['ids'][i] for i in order])
+            results["distances"].append([float(distances[i, q]) for i in order])
+            results["documents"].append([found['documents'][i] for i in order])
+            results["metadatas"].append([found['metadatas'][i] for i in order])
         return results
     
+    def similarity(self, distance: float) -> float:
+        """Similarity score (higher is better) for a distance returned by a search."""
+        return distance_to_similarity(self.collection.space, distance)
+    
+    def get_collection_config(self) -> Dict[str, Any]:
+        """The collection's name, store, distance space and index parameters."""
+        return {
+            "name": settings.COLLECTION_NAME,
+            "vector_store": settings.VECTOR_STORE,
+            **self.collection.config()
+        }
+    
+    def recreate_collection(self, config: Dict[str, Any]):
+        """Delete all documents and recreate the collection with a new space and index parameters."""
+        try:
+            self.collection.recreate(config)
+            self.catalog.clear()
+            if self.quantized is not None:
+                self.quantized.clear()
+        finally:
+            self._bump_generation()
+    
+    def _search_quantized(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int,
+        oversampling: float
+    ) -> Dict[str, Any]:
+        """Search the quantized tier and fetch the matches' texts, in the collection's query result format."""
+        if self.quantized is None:
+            raise ValueError("Quantized search requires QUANTIZED_INDEX to be int8 or binary")
+        
+        with metrics.timer("quantized_query_seconds", "Time spent scanning and rescoring the quantized index"):
+            ids, distances = self.quantized.search(query_embeddings, n_results, oversampling, self.collection.space)
+        
+        unique_ids = list({chunk_id: None for row in ids for chunk_id in row})
+        with metrics.timer("vector_db_get_seconds", "Time spent reading chunks from the collection"):
+            found = self.collection.get(ids=unique_ids, include=["documents", "metadatas"]) if unique_ids else None
+        
+        stored = {}
+        if found:
+            stored = dict(zip(found['ids'], zip(found['documents'], found['metadatas'])))
+        
+        return {
+            "ids": ids,
+            "distances": distances,
+            "documents": [[stored.get(chunk_id, (None, None))[0] for chunk_id in row] for row in ids],
+            "metadatas": [[stored.get(chunk_id, (None, None))[1] for chunk_id in row] for row in ids]
+        }
+    
     def delete_by_filename(self, filename: str) -> int:
         """
         Delete all chunks associated with a filename.
         Returns number of deleted documents.
         """
-        # Query all documents with the filename
-        results = self.collection.get(
-            where={"filename": filename}
-        )
+        # Look up the chunk IDs in the catalog instead of scanning the collection
+        ids = self.catalog.get_chunk_ids(filename)
         
-        if results['ids']:
-            self.collection.delete(ids=results['ids'])
-            return len(results['ids'])
+        return self.delete_ids(ids)
+    
+    def get_document_chunks(self, filename: str) -> Dict[str, Dict[str, Any]]:
+        """Get the IDs and metadata of all chunks stored for a filename."""
+        with metrics.timer("vector_db_get_seconds", "Time spent reading chunks from the collection"):
+            results = self.collection.get(
+                where={"filename": filename},
+                include=["metadatas"]
+            )
         
-        return 0
+        return dict(zip(results['ids'], results['metadatas']))
+    
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        """Replace the metadata of existing chunks without touching their embeddings."""
+        if ids:
+            try:
+                with metrics.timer("vector_db_update_seconds", "Time spent updating chunk metadata"):
+                    self.collection.update(ids=ids, metadatas=metadatas)
+            finally:
+                self._bump_generation()
+    
+    def delete_ids(self, ids: List[str]) -> int:
+        """Delete chunks by ID. Returns number of deleted chunks."""
+        if ids:
+            try:
+                with metrics.timer("vector_db_delete_seconds", "Time spent deleting chunks from the collection"):
+                    self.collection.delete(ids=ids)
+                self.catalog.remove_chunks(ids)
+                if self.quantized is not None:
+                    self.quantized.remove(ids)
+            finally:
+                self._bump_generation()
+        return len(ids)
     
     def get_all_filenames(self) -> List[str]:
         """Get list of all unique filenames in the database."""
-        # Get all documents
-        all_docs = self.collection.get()
-        
-        if not all_docs['metadatas']:
-            return []
-        
-        # Extract unique filenames
-        filenames = set()
-        for metadata in all_docs['metadatas']:
-            if 'filename' in metadata:
-                filenames.add(metadata['filename'])
-        
-        return sorted(list(filenames))
+        return [document['filename'] for document in self.catalog.list_documents(limit=-1)]
+    
+    def list_documents(self, offset: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get a page of document catalog entries ordered by filename."""
+        return self.catalog.list_documents(offset=offset, limit=limit)
+    
+    def get_document(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Get the catalog entry of a document, or None if it is not indexed."""
+        return self.catalog.get_document(filename)
+    
+    def count_filenames(self) -> int:
+        """Get number of distinct documents in the database."""
+        return self.catalog.count_documents()
     
     def count_documents(self) -> int:
         """Get total count of chunks in the database."""
@@ -113,13 +381,18 @@ class VectorDBService:
     
     def clear_collection(self):
         """Delete all documents from the collection."""
-        # Delete the collection and recreate it
-        self.client.delete_collection(name=settings.COLLECTION_NAME)
-        self.collection = self.client.get_or_create_collection(
-            name=settings.COLLECTION_NAME,
-            metadata={"description": "Document embeddings for search"}
-        )
+        try:
+            self.collection.clear()
+            self.catalog.clear()
+            if self.quantized is not None:
+                self.quantized.clear()
+        finally:
+            self._bump_generation()
 
 
-# Singleton instance
-vector_db_service = VectorDBService()
+# Singleton instance; HTTP workers of a multi-process server call the backend process's instead
+if settings.REMOTE_BACKEND:
+    from .backend_client import RemoteVectorDBService, backend_client
+    vector_db_service = RemoteVectorDBService(backend_client)
+else:
+    vector_db_service = VectorDBService()
@@ -0,0 +1,226 @@
+from typing import Any, Dict, List, Optional
+import numpy as np
+from config import settings
+
+
+# Distance functions a collection can be created with (ChromaDB's hnsw:space values)
+SPACES = ("l2", "cosine", "ip")
+
+
+def default_collection_config() -> Dict[str, Any]:
+    """Collection configuration for new collections, from Settings."""
+    return {
+        "space": settings.VECTOR_SPACE,
+        "hnsw_m": settings.HNSW_M,
+        "hnsw_construction_ef": settings.HNSW_CONSTRUCTION_EF,
+        "hnsw_search_ef": settings.HNSW_SEARCH_EF
+    }
+
+
+def distance_to_similarity(space: str, distance: float) -> float:
+    """
+    Similarity score (higher is better) for a distance in the given space.
+    cosine and ip distances are 1 - similarity; squared L2 is mapped to (0, 1].
+    """
+    if space == "l2":
+        return 1 / (1 + distance)
+    return 1 - distance
+
+
+def compute_distances(space: str, vectors: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """Distances of every vector to every query in the given space, shape (vectors, queries)."""
+    dots = vectors @ queries.T
+    if space == "ip":
+        return 1 - dots
+
+    vector_norms = np.linalg.norm(vectors, axis=1)[:, None]
+    query_norms = np.linalg.norm(queries, axis=1)[None, :]
+    if space == "cosine":
+        return 1 - dots / np.maximum(vector_norms * query_norms, 1e-12)
+
+    # Squared L2
+    return np.maximum(vector_norms ** 2 - 2 * dots + query_norms ** 2, 0)
+
+
+def check_unique_ids(ids: List[str]):
+    """Raise ValueError if a batch repeats a chunk ID, as ChromaDB does."""
+    if len(set(ids)) != len(ids):
+        seen, duplicates = set(), []
+        for chunk_id in ids:
+            if chunk_id in seen and chunk_id not in duplicates:
+                duplicates.append(chunk_id)
+            seen.add(chunk_id)
+        raise ValueError(f"Expected IDs to be unique, found duplicates of: {', '.join(duplicates)}")
+
+
+class VectorStore:
+    """
+    Storage backend of VectorDBService.
+
+    Mirrors the subset of the ChromaDB collection API the service uses, so
+    results keep the collection's shapes: `query` returns lists with one entry
+    per query embedding, `get` flat lists. Distances follow the collection's
+    `space`: squared L2 for l2, 1 - cosine similarity for cosine and
+    1 - dot product for ip.
+    """
+
+    space: str = "l2"
+    exact: bool = False  # Whether query() scores every matching chunk rather than an approximate index
+
+    def add(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        raise NotImplementedError
+
+    def query(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        ef: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Nearest chunks per query embedding. `ef` widens approximate searches; exact stores ignore it."""
+        raise NotImplementedError
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def update(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def delete(self, ids: List[str]):
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def clear(self):
+        """Delete every chunk, keeping the collection's configuration."""
+        raise NotImplementedError
+
+    def config(self) -> Dict[str, Any]:
+        """The collection's distance space and index parameters."""
+        raise NotImplementedError
+
+    def recreate(self, config: Dict[str, Any]):
+        """Delete every chunk and recreate the collection with a new configuration."""
+        raise NotImplementedError
+
+
+class ChromaVectorStore(VectorStore):
+    """ChromaDB collection with persistence (HNSW index plus SQLite)."""
+
+    def __init__(self, persist_directory: str, name: str, config: Dict[str, Any]):
+        import chromadb
+        from chromadb.config import Settings as ChromaSettings
+
+        self.name = name
+        self.client = chromadb.Client(
+            ChromaSettings(
+                persist_directory=persist_directory,
+                is_persistent=True
+            )
+        )
+        # Existing collections keep the configuration they were created with
+        self.collection = self.client.get_or_create_collection(name=self.name, metadata=self._metadata(config))
+
+    @staticmethod
+    def _metadata(config: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "description": "Document embeddings for search",
+            "hnsw:space": config["space"],
+            "hnsw:M": config["hnsw_m"],
+            "hnsw:construction_ef": config["hnsw_construction_ef"],
+            "hnsw:search_ef": config["hnsw_search_ef"]
+        }
+
+    @property
+    def space(self) -> str:
+        return (self.collection.metadata or {}).get("hnsw:space", "l2")
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self.collection.add(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def query(self, query_embeddings, n_results=10, where=None, ef=None):
+        if ef is None or ef <= n_results:
+            return self.collection.query(query_embeddings=query_embeddings, n_results=n_results, where=where)
+
+        # hnswlib searches with max(search_ef, k) candidates, so asking for ef results widens
+        # the search; texts and metadata are only fetched for the n_results kept
+        wide = self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=ef,
+            where=where,
+            include=["distances"]
+        )
+        ids = [row[:n_results] for row in wide['ids']]
+        distances = [row[:n_results] for row in wide['distances']]
+
+        unique_ids = list({chunk_id: None for row in ids for chunk_id in row})
+        stored = {}
+        if unique_ids:
+            found = self.collection.get(ids=unique_ids, include=["documents", "metadatas"])
+            stored = dict(zip(found['ids'], zip(found['documents'], found['metadatas'])))
+
+        return {
+            "ids": ids,
+            "distances": distances,
+            "documents": [[stored.get(chunk_id, (None, None))[0] for chunk_id in row] for row in ids],
+            "metadatas": [[stored.get(chunk_id, (None, None))[1] for chunk_id in row] for row in ids]
+        }
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None):
+        return self.collection.get(
+            ids=ids,
+            where=where,
+            limit=limit,
+            offset=offset,
+            include=include if include is not None else ["metadatas", "documents"]
+        )
+
+    def update(self, ids, metadatas):
+        self.collection.update(ids=ids, metadatas=metadatas)
+
+    def delete(self, ids):
+        self.collection.delete(ids=ids)
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def config(self) -> Dict[str, Any]:
+        metadata = self.collection.metadata or {}
+        # Chroma's defaults apply to parameters a collection was created without
+        return {
+            "space": metadata.get("hnsw:space", "l2"),
+            "hnsw_m": metadata.get("hnsw:M", 16),
+            "hnsw_construction_ef": metadata.get("hnsw:construction_ef", 100),
+            "hnsw_search_ef": metadata.get("hnsw:search_ef", 10)
+        }
+
+    def clear(self):
+        self.recreate(self.config())
+
+    def recreate(self, config):
+        # Delete the collection and recreate it
+        self.client.delete_collection(name=self.name)
+        self.collection = self.client.get_or_create_collection(name=self.name, metadata=self._metadata(config))
+
+
+def create_vector_store() -> VectorStore:
+    """The storage backend selected by VECTOR_STORE."""
+    if settings.VECTOR_STORE == "numpy":
+        from .numpy_store import NumpyVectorStore
+        return NumpyVectorStore(settings.NUMPY_STORE_DIRECTORY, settings.COLLECTION_NAME, settings.VECTOR_SPACE)
+
+    return ChromaVectorStore(settings.CHROMA_PERSIST_DIRECTORY, settings.COLLECTION_NAME, default_collection_config())
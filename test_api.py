@@ -48,17 +48,32 @@ def test_upload(pdf_path):
         files = {'file': (os.path.basename(pdf_path), f, 'application/pdf')}
         response = requests.post(f"{BASE_URL}/api/upload", files=files)
     
-    if response.status_code == 200:
-        data = response.json()
+    if response.status_code != 202:
+        print("✗ Upload failed")
+        print(f"  Status: {response.status_code}")
+        print(f"  Response: {response.text}")
+        return False
+    
+    job_id = response.json()['job_id']
+    print(f"  Job queued: {job_id}")
+    
+    # Poll the job until ingestion finishes
+    while True:
+        data = requests.get(f"{BASE_URL}/api/jobs/{job_id}").json()
+        if data['status'] in ('completed', 'failed'):
+            break
+        print(f"  Stage: {data['stage']} ({data['chunks_embedded']}/{data['chunks_total']} chunks embedded)")
+        time.sleep(1)
+    
+    if data['status'] == 'completed':
         print("✓ Upload successful")
         print(f"  Filename: {data['filename']}")
         print(f"  Chunks Created: {data['chunks_created']}")
-        print(f"  Message: {data['message']}")
+        print(f"  Timings: {data['timings']}")
         return True
     else:
         print("✗ Upload failed")
-        print(f"  Status: {response.status_code}")
-        print(f"  Response: {response.text}")
+        print(f"  Error: {data['error']}")
         return False
 
 
@@ -142,7 +157,6 @@ def main():
     pdf_path = input("\n\nEnter path to a test PDF file (or press Enter to skip): ").strip()
     if pdf_path:
         if test_upload(pdf_path):
-            time.sleep(2)  # Wait for indexing
             
             # Test search
             query = input("\nEnter a search query to test: ").strip()
@@ -0,0 +1,114 @@
+"""
+Golden-output tests for header detection and chunking.
+
+Chunks produced for seeded synthetic documents and hand-written edge cases
+are compared with testdata/chunking_golden.json, recorded from the reference
+chunker. Run with --update only when a change to the chunks is intended.
+
+    python test_chunking_golden.py [--update]
+"""
+import json
+import os
+import sys
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.synthetic import LINES_PER_PAGE, generate_lines
+from services.document_processor import document_processor
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "testdata", "chunking_golden.json")
+
+# (pages, header_density, seed) of the synthetic documents
+SYNTHETIC_CASES = [(2, 0.3, 0), (2, 0.8, 1), (3, 0.05, 2), (1, 0.0, 3)]
+
+EDGE_CASE_LINES = [
+    "Preamble text before any header.",
+    "",
+    "EXECUTIVE SUMMARY OF RESULTS",
+    "This document contains important information.",
+    "",
+    "1. Introduction",
+    "    1.1 Indented Subsection",
+    "Body text of the subsection.",
+    "\x0c",
+    "II. Roman Numeral Header",
+    "A. Lettered Header",
+    "Three Title Case Words",
+    "Notes on the design:",
+    "        Chapter 4 Deeply Indented",
+    "Appendix B: Tables",
+    "ab",
+    "a line that is not a header at all",
+    "Section 12 - Long Section",
+] + [f"Paragraph {i} " + "lorem ipsum dolor sit amet " * 12 + "\n" for i in range(12)] + [
+    "CONCLUSION AND NEXT STEPS",
+    "   ",
+    "Final thoughts.",
+]
+
+
+def _pages(lines: List[str], lines_per_page: int) -> List[Tuple[int, str]]:
+    return [
+        (number, "\n".join(lines[start:start + lines_per_page]))
+        for number, start in enumerate(range(0, len(lines), lines_per_page), start=1)
+    ]
+
+
+def cases() -> Dict[str, List[Tuple[int, str]]]:
+    """Named documents as (page_number, text) pairs."""
+    documents = {
+        f"synthetic-{pages}p-{density}-{seed}": _pages(generate_lines(pages, density, seed=seed), LINES_PER_PAGE)
+        for pages, density, seed in SYNTHETIC_CASES
+    }
+    documents["edge-cases"] = _pages(EDGE_CASE_LINES, 7)
+    return documents
+
+
+def chunk(pages: List[Tuple[int, str]]) -> Dict[str, Any]:
+    text = "".join(page_text + "\n" for _, page_text in pages).strip()
+    return {
+        "headers": [
+            [header["position"], header["level"], header["text"]]
+            for header in document_processor._detect_headers(text)
+        ],
+        "chunks": list(document_processor.chunk_pages(pages, "golden.pdf"))
+    }
+
+
+def test_golden_chunks():
+    """Chunks and detected headers match the recorded golden output."""
+    with open(GOLDEN_PATH) as f:
+        golden = json.load(f)
+
+    assert sorted(golden) == sorted(cases()), "Golden cases changed; run with --update"
+    for name, pages in cases().items():
+        # Round-trip through JSON so tuples and lists compare equal
+        assert json.loads(json.dumps(chunk(pages))) == golden[name], f"Chunks differ for {name}"
+
+
+def test_headerless_document_streams():
+    """A document without headers is chunked as its pages are read, not held until its end."""
+    lines = [f"Paragraph {i} " + "lorem ipsum dolor sit amet " * 12 + "\n" for i in range(200)]
+    pages = _pages(lines, 10)
+    read = []
+
+    def reading(pages):
+        for page in pages:
+            read.append(page[0])
+            yield page
+
+    chunks = document_processor.chunk_pages(reading(pages), "headerless.pdf")
+    first = next(chunks)
+    assert first["chunk_type"] == "paragraph_group"
+    assert len(read) <= document_processor.preamble_max_pages + 1 < len(pages)
+    assert len(list(chunks)) + 1 == len(list(document_processor.chunk_pages(pages, "headerless.pdf")))
+
+
+if __name__ == "__main__":
+    if "--update" in sys.argv:
+        with open(GOLDEN_PATH, "w") as f:
+            json.dump({name: chunk(pages) for name, pages in cases().items()}, f, indent=1)
+        print(f"Golden output written to {GOLDEN_PATH}")
+    else:
+        test_golden_chunks()
+        test_headerless_document_streams()
+        print("✓ Chunks match the golden output")